@@ -0,0 +1,216 @@
+class benchmark(object):
+    """
+    This file is part of the Multi-Orientation MAXWELL software
+    
+    File author(s): Sierra Dean <ccnd@live.com>
+    
+    Distributed under the GPLv3 Licence.
+    See accompanying file LICENSE.txt or copy at
+        http://www.gnu.org/licenses/gpl-3.0.html
+    
+    source: https://github.com/SierraD/Multi-Orientation-Maxwell
+    
+    Last Updated: Oct 17 2026
+    """
+    def __init__(self, sizes=[10**3, 10**4, 10**5, 10**6], repeats=1, seed=0, engine=None, memory=True,
+                 distribution="norm", **generation):
+        """
+        A technique to measure the time and the memory taken by every step of the method, for
+        simulated data (Synthetic.py) of increasing size, so that changes in the scaling of the
+        method can be followed.
+        
+        For every size, a pair of XY and XZ ThunderSTORM results tables is generated and written
+        to a temporary folder, and the steps are then run in order: setting, set_to_center,
+        limiting, indexes, values, merge, selection, points, the evaluation of the Surface.py
+        class and the get_precision of the Precision.py class. The peak memory of each step is
+        measured with the tracemalloc module, which also follows the arrays allocated by NumPy,
+        but slows down the steps written in Python, so it can be turned off for the timings.
+        
+        The benchmark can also be run from the command line, with the other classes of the method
+        kept in the same folder:
+            
+            python Benchmark.py --sizes 1000 10000 100000 --output Benchmark_Results
+        
+        Attributes:
+        sizes: list of int
+            The numbers of localizations in each orientation.
+        repeats: int
+            The number of times the steps are run for each size. The shortest time and the
+            largest peak memory are kept in the summary.
+        seed: int
+            The seed of the simulated data.
+        engine: None or str "sweep", "grid"
+            The method used by the indexes method of the Overlap.py class. If "grid" is specified,
+            the building of the index is measured as an additional indexing step.
+        memory: bool
+            The decision to measure the peak memory of each step.
+        distribution: str "norm", "lognorm", etc.
+            The distribution fitted by the get_precision method.
+        generation:
+            The parameters of the generate method of the Synthetic.py class, such as density,
+            uncertainty, uncertainty_xy, overlap_fraction and shape.
+        
+        Return:
+            None. Will modify the data established in place.
+        """
+        self.sizes = list(sizes)
+        self.repeats = repeats
+        self.seed = seed
+        self.engine = engine
+        self.memory = memory
+        self.distribution = distribution
+        self.generation = generation
+        return
+    
+    def run(self):
+        """
+        A technique to run the benchmark for every size.
+        
+        Attributes:
+            None.
+        
+        Return:
+            None. Will modify the data established in place, with every measurement saved as the
+            results dataframe, and the shortest time and largest peak memory of each step saved as
+            the summary dataframe.
+        """
+        import os
+        import tempfile
+        records = []
+        for size in self.sizes:
+            with tempfile.TemporaryDirectory() as folder:
+                simulated = synthetic(seed=self.seed).generate(size, **self.generation)
+                simulated = simulated.download_dataframe(os.path.join(folder, "Synthetic"))
+                for repeat in range(0, self.repeats):
+                    records.extend(self.steps(simulated, size, repeat))
+        self.results = pandas.DataFrame(records, columns=["Localizations", "Repeat", "Step", "Rows",
+                                                          "Time [s]", "Peak Memory [MB]"])
+        self.summary = self.results.groupby(["Localizations", "Step"], sort=False).agg(
+            {"Rows": "max", "Time [s]": "min", "Peak Memory [MB]": "max"}).reset_index()
+        return self
+    
+    def steps(self, simulated, size, repeat=0):
+        """
+        A technique to run and measure every step of the method once, for one pair of simulated
+        results tables.
+        
+        Attributes:
+        simulated: synthetic
+            The simulated data, previously written to files by the Synthetic.py class.
+        size: int
+            The number of localizations in each orientation.
+        repeat: int
+            The number of the repetition.
+        
+        Return:
+            The measurements as a list of dicts.
+        """
+        records = []
+        
+        def measured(step, rows, function, *args, **kwargs):
+            result, seconds, peak = self.measure(function, *args, **kwargs)
+            records.append({"Localizations": size, "Repeat": repeat, "Step": step, "Rows": rows(result),
+                            "Time [s]": seconds, "Peak Memory [MB]": peak})
+            return result
+        
+        data = measured("setting", lambda d: d.xy_len+d.xz_len, preparation().setting,
+                        simulated.file_xy, simulated.file_xz, magnification=simulated.magnification,
+                        pixelsize_xy=simulated.xypix, pixelsize_xz=simulated.zpix)
+        data = measured("set_to_center", lambda d: len(d.dfxy)+len(d.dfxz), data.set_to_center)
+        limit = 0.9*data.dfxy["X_XY"].max()
+        data = measured("limiting", lambda d: len(d.dfxy)+len(d.dfxz), data.limiting, "X", limit, "less")
+        if self.engine == "grid":
+            data = measured("indexing", lambda d: d.grid_xy.size+d.grid_xz.size, data.indexing)
+        matched = measured("indexes", lambda m: len(m.XY_indexes), overlap(data).indexes, data.zpix, data.xypix,
+                           engine=self.engine)
+        matched = measured("values", lambda m: len(m.localizations), matched.values)
+        filtered = measured("merge", lambda f: len(f.merged_indexes), filtering(matched).merge)
+        filtered = measured("selection", lambda f: len(f.point_indexes), filtered.selection, "uncertainty")
+        filtered = measured("points", lambda f: len(f.points), filtered.points)
+        measured("evaluation", lambda s: len(s.radius_i), surface(filtered).evaluation)
+        measured("get_precision", lambda p: len(p.height),
+                 precision(filtered, data_type="Uncertainty Z [nm]").get_precision, distribution=self.distribution, 
+                 verbose=False)
+        return records
+    
+    def measure(self, function, *args, **kwargs):
+        """
+        A technique to measure the time and the peak memory taken by a single call.
+        
+        Attributes:
+        function:
+            The method to be called.
+        args & kwargs:
+            The arguments of the method.
+        
+        Return:
+            The result of the call, the time taken in seconds, and the peak memory in MB (NaN if
+            the memory is not measured).
+        """
+        import time
+        import tracemalloc
+        peak = numpy.nan
+        if self.memory:
+            tracemalloc.start()
+        try:
+            start = time.perf_counter()
+            result = function(*args, **kwargs)
+            seconds = time.perf_counter()-start
+            if self.memory:
+                peak = tracemalloc.get_traced_memory()[1]/2**20
+        finally:
+            if self.memory:
+                tracemalloc.stop()
+        return result, seconds, peak
+    
+    def download_dataframe(self, filename="Benchmark_Results"):
+        """
+        A technique to download the results of the benchmark as a CSV file named
+        "Benchmark_Results.csv", with the summary as "Benchmark_Results_Summary.csv".
+        
+        Attributes:
+        filename: str
+            The name of the file, without the extension.
+        
+        Return:
+            None. Will download the dataframes as CSV files.
+        """
+        self.results.to_csv(filename+".csv", index=False, encoding='utf-8')
+        self.summary.to_csv(filename+"_Summary.csv", index=False, encoding='utf-8')
+        return self
+
+
+if (__name__ == "__main__") and ("__file__" in globals()):
+    import argparse
+    import os
+    import matplotlib
+    matplotlib.use("Agg")
+    import numpy
+    import pandas
+    import plotly
+    from plotly import subplots
+    import fitter
+    import seaborn
+    import scipy
+    import scipy.sparse
+    import scipy.sparse.csgraph
+    import scipy.optimize
+    import scipy.stats
+    folder = os.path.dirname(os.path.abspath(__file__))
+    for name in sorted(os.listdir(folder)):
+        if name.endswith(".py") and (name not in ["Pipeline.py", "Benchmark.py"]):
+            with open(os.path.join(folder, name)) as f:
+                exec(f.read(), globals())
+    parser = argparse.ArgumentParser(description="Measure the time and memory of every step of the Multi-Orientation MAXWELL method.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10**3, 10**4, 10**5, 10**6], help="The numbers of localizations in each orientation.")
+    parser.add_argument("--repeats", type=int, default=1, help="The number of times the steps are run for each size.")
+    parser.add_argument("--engine", default=None, help="The method used by the overlap search, 'sweep' or 'grid'.")
+    parser.add_argument("--density", type=float, default=10, help="The number of localizations per cubic micrometer.")
+    parser.add_argument("--overlap-fraction", type=float, default=0.5, help="The fraction of localizations found in both orientations.")
+    parser.add_argument("--no-memory", action="store_true", help="Do not measure the peak memory.")
+    parser.add_argument("--output", default="Benchmark_Results", help="The name of the results file, without the extension.")
+    arguments = parser.parse_args()
+    results = benchmark(arguments.sizes, repeats=arguments.repeats, engine=arguments.engine, memory=not arguments.no_memory,
+                        density=arguments.density, overlap_fraction=arguments.overlap_fraction).run()
+    results.download_dataframe(arguments.output)
+    print(results.summary.to_string(index=False))
@@ -0,0 +1,157 @@
+class cache(object):
+    """
+    This file is part of the Multi-Orientation MAXWELL software
+    
+    File author(s): Sierra Dean <ccnd@live.com>
+    
+    Distributed under the GPLv3 Licence.
+    See accompanying file LICENSE.txt or copy at
+        http://www.gnu.org/licenses/gpl-3.0.html
+    
+    source: https://github.com/SierraD/Multi-Orientation-Maxwell
+    
+    Last Updated: Oct 17 2026
+    """
+    def __init__(self, directory="Multi-Orientation-MAXWELL_Cache"):
+        """
+        A technique to store the prepared and intermediate dataframes of the method in a binary
+        columnar format, so that later sessions can reuse them instead of parsing the ThunderSTORM
+        results files again.
+        
+        Each dataframe is saved as a folder containing one NumPy (.npy) file per column, which keeps
+        the data type of every column, and can be memory-mapped when loaded so that only the parts
+        of the data which are used are read from the disk. Entries are identified by a key built
+        from the contents of the input files and the parameters used to process them, so that a
+        changed file or parameter never reuses an outdated entry.
+        
+        Attributes:
+        directory: str
+            The folder in which the cache is kept. It will be created if it does not exist.
+        
+        Return:
+            None.
+        """
+        import os
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+        return
+    
+    def key(self, *files, **parameters):
+        """
+        A technique to build the key identifying a cache entry.
+        
+        Attributes:
+        files: str "XY_File.csv", "XZ_File.csv", etc.
+            The files whose contents the entry depends on. The files are read in blocks, so the
+            memory used does not depend on their size.
+        parameters:
+            The parameters the entry depends on, such as pixelsize_xy, pixelsize_xz and TS_dims,
+            or the key of a previous entry.
+        
+        Return:
+            The key as a hexadecimal str.
+        """
+        import hashlib
+        import json
+        digest = hashlib.sha256()
+        for name in files:
+            with open(name, "rb") as f:
+                for block in iter(lambda: f.read(2**24), b""):
+                    digest.update(block)
+            digest.update(b"\0")
+        digest.update(json.dumps(parameters, sort_keys=True, default=str).encode("utf-8"))
+        return digest.hexdigest()
+    
+    def path(self, key, name):
+        """
+        A technique to obtain the folder of a cache entry.
+        
+        Attributes:
+        key: str
+            The key of the entry, as returned by the key method.
+        name: str "preparation_xy", "overlap", etc.
+            The name of the dataframe within the entry.
+        
+        Return:
+            The path of the folder as a str.
+        """
+        import os
+        return os.path.join(self.directory, key, name)
+    
+    def exists(self, key, name):
+        """
+        A technique to check whether a dataframe has been stored in the cache.
+        
+        Attributes:
+        key: str
+            The key of the entry.
+        name: str
+            The name of the dataframe within the entry.
+        
+        Return:
+            True if the dataframe is stored, False otherwise.
+        """
+        import os
+        return os.path.exists(os.path.join(self.path(key, name), "columns.json"))
+    
+    def store(self, key, name, df, block=2**20):
+        """
+        A technique to store a dataframe in the cache, as one binary file per column.
+        
+        Attributes:
+        key: str
+            The key of the entry.
+        name: str
+            The name of the dataframe within the entry.
+        df: dataframe
+            The dataframe to be stored, with numerical columns. The columns are written in blocks, 
+            so that columns memory-mapped from the disk are not copied into memory.
+        block: int
+            The number of rows written at once.
+        
+        Return:
+            None. Will write the dataframe to the cache folder.
+        """
+        import json
+        import os
+        path = self.path(key, name)
+        os.makedirs(path, exist_ok=True)
+        columns = [str(c) for c in df.columns]
+        for i, c in enumerate(columns):
+            values = df[c].to_numpy()
+            stored = numpy.lib.format.open_memmap(os.path.join(path, str(i)+".npy"), mode="w+", 
+                                                  dtype=values.dtype, shape=(len(values),))
+            for start in range(0, len(values), block):
+                stored[start:start+block] = values[start:start+block]
+            stored.flush()
+            del stored
+        with open(os.path.join(path, "columns.json"), "w") as f:
+            json.dump({"columns": columns, "rows": len(df)}, f)
+        return self
+    
+    def load(self, key, name, mmap=True):
+        """
+        A technique to load a dataframe from the cache.
+        
+        Attributes:
+        key: str
+            The key of the entry.
+        name: str
+            The name of the dataframe within the entry.
+        mmap: bool
+            If True, the columns will be memory-mapped as read-only arrays instead of being read
+            into memory. Any modification of a column will then replace it with a copy in memory.
+        
+        Return:
+            The dataframe.
+        """
+        import json
+        import os
+        path = self.path(key, name)
+        with open(os.path.join(path, "columns.json")) as f:
+            description = json.load(f)
+        columns = description["columns"]
+        rows = description["rows"]
+        mode = "r" if (mmap and rows > 0) else None
+        data = {c: numpy.load(os.path.join(path, str(i)+".npy"), mmap_mode=mode) for i, c in enumerate(columns)}
+        return pandas.DataFrame(data, columns=columns, copy=False)
@@ -0,0 +1,144 @@
+class clustering(object):
+    """
+    This file is part of the Multi-Orientation MAXWELL software
+    
+    File author(s): Sierra Dean <ccnd@live.com>
+    
+    Distributed under the GPLv3 Licence.
+    See accompanying file LICENSE.txt or copy at
+        http://www.gnu.org/licenses/gpl-3.0.html
+    
+    source: https://github.com/SierraD/Multi-Orientation-Maxwell
+    
+    Last Updated: Oct 17 2026
+    """
+    def __init__(self, data):
+        """
+        A technique to separate the three-dimensional localizations returned by the Filtering.py
+        class into the particles they belong to, before the sphere fitting of the Surface.py class.
+        
+        The localizations are grouped with a density-based clustering (DBSCAN): a localization with
+        enough other localizations near it is a core localization, core localizations near each
+        other belong to the same particle, the localizations near a core localization join its
+        particle, and all other localizations are noise. The neighbours of every localization are
+        found with the spatial grid of the Grid.py class, so that only the localizations of the
+        surrounding cells are compared, and the particles are the connected components of the
+        sparse graph linking the core localizations.
+        
+        The points are returned with a Particle column, which is used by the batch_evaluation and
+        robust_evaluation methods of the Surface.py class to fit every particle at once.
+        
+        Attributes:
+        data:
+            The data previously developed and contained within the Filtering.py class.
+        
+        Return:
+            None. Will modify the data established in place.
+        """
+        self.data = data
+        return
+    
+    def dbscan(self, eps, min_samples=5, block_size=2**16):
+        """
+        A technique to label every localization with the particle it belongs to, using a
+        density-based clustering.
+        
+        Attributes:
+        eps: num
+            The largest distance in nm between two neighbouring localizations.
+        min_samples: int
+            The number of localizations within eps of a core localization, itself included.
+        block_size: int
+            The number of localizations whose neighbours are found at once, which limits the
+            memory used by the search.
+        
+        Return:
+            None. Will modify the data established in place, with the particle of each
+            localization saved as labels (-1 for noise), numbered in the order of their first
+            localization, the points with the Particle column saved as points, and the number of
+            particles saved as n_particles.
+        """
+        if eps <= 0:
+            raise ValueError("The eps distance should be positive.")
+        points = self.data.points
+        positions = numpy.column_stack([points["X [nm]"].to_numpy(dtype=float),
+                                        points["Y [nm]"].to_numpy(dtype=float),
+                                        points["Z [nm]"].to_numpy(dtype=float)])
+        N = len(positions)
+        index = grid(positions, cell_size=eps)
+        counts = numpy.zeros(N, dtype=numpy.int64)
+        all_items = []
+        all_queries = []
+        for start in range(0, N, block_size):
+            stop = min(start+block_size, N)
+            items, query = index.query_radius(positions[start:stop], eps)
+            counts[start:stop] = numpy.bincount(query, minlength=stop-start)
+            query = query+start
+            keep = items < query
+            all_items.append(items[keep])
+            all_queries.append(query[keep])
+        items = numpy.concatenate(all_items) if all_items else numpy.zeros(0, dtype=numpy.int64)
+        query = numpy.concatenate(all_queries) if all_queries else numpy.zeros(0, dtype=numpy.int64)
+        
+        core = counts >= min_samples
+        linked = core[items] & core[query]
+        graph = scipy.sparse.coo_matrix((numpy.ones(linked.sum()), (items[linked], query[linked])), shape=(N, N))
+        components = scipy.sparse.csgraph.connected_components(graph, directed=False)[1]
+        labels = numpy.full(N, -1, dtype=numpy.int64)
+        labels[core] = components[core]
+        
+        border = core[items] != core[query]
+        inner = numpy.where(core[items], items, query)[border]
+        outer = numpy.where(core[items], query, items)[border]
+        order = numpy.lexsort((inner, outer))
+        outer, first = numpy.unique(outer[order], return_index=True)
+        labels[outer] = components[inner[order][first]]
+        
+        self.labels = self.numbered(labels)
+        self.n_particles = int(self.labels.max()+1) if N else 0
+        self.points = points.copy()
+        self.points["Particle"] = self.labels
+        return self
+    
+    @staticmethod
+    def numbered(labels):
+        """
+        A technique to number the particles from 0, in the order of their first localization.
+        
+        Attributes:
+        labels: array of int
+            The particle of each localization, with -1 for noise.
+        
+        Return:
+            The renumbered particles as an integer array, with -1 for noise.
+        """
+        clustered = labels >= 0
+        first = numpy.unique(labels[clustered], return_index=True)[1]
+        rank = numpy.full(labels.max()+1 if clustered.any() else 0, -1, dtype=numpy.int64)
+        rank[labels[clustered][numpy.sort(first)]] = numpy.arange(len(first))
+        numbered = numpy.full(len(labels), -1, dtype=numpy.int64)
+        numbered[clustered] = rank[labels[clustered]]
+        return numbered
+    
+    def download_dataframe(self, filename="Clustering_Dataframe", file_format="csv"):
+        """
+        A technique to download the points labelled by the Clustering.py method as a CSV file
+        named "Clustering_Dataframe.csv".
+        
+        Attributes:
+        filename: str
+            The name of the file, without the extension.
+        file_format: str "csv", "npz"
+            The format of the file. If "npz" is specified, the columns will be saved as a
+            compressed NumPy archive, which keeps the data type of every column.
+        
+        Return:
+            None. Will download the dataframe as a CSV or NPZ file.
+        """
+        self.points.index.set_names('id', level=None, inplace=True)
+        if file_format == "npz":
+            columns = {c: self.points[c].to_numpy() for c in self.points.columns}
+            numpy.savez_compressed(filename+".npz", id=self.points.index.to_numpy(), **columns)
+            return self
+        self.points.to_csv(filename+".csv", index=True, encoding='utf-8')
+        return self
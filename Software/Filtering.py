@@ -10,7 +10,7 @@ class filtering(object):
         
     source: https://github.com/SierraD/Multi-Orientation-MAXWELL
     
-    Last Updated: Sept 26 2024
+    Last Updated: Oct 17 2026
     """
     def __init__(self, data):
         """
@@ -40,50 +40,95 @@ class filtering(object):
         A technique to group indexes which contain points which overlap with multiple other
         points, which can then be used to filter out duplicates.
         
+        Each overlapped point is a pair of one XY and one XZ localization. Points which share 
+        either their XY or their XZ localization are duplicates of each other, and are grouped 
+        together by finding the connected components of the graph linking the XY and XZ 
+        localizations through every overlapped point.
+        
         Attributes:
             None. 
  
         Return:
-            None. Will modify the data established in place.
+            None. Will modify the data established in place, with the group of each point saved 
+            as labels, and the points of each group saved as merged_indexes.
         """
-        unique_XY = numpy.unique(self.data.df["X_XY"])
-        unique_XZ = numpy.unique(self.data.df["X_XZ"])
-        XY_indexes = []
-        XZ_indexes = []
-        for i in unique_XZ:
-            XZ_indexes.append(numpy.where(self.data.df["X_XZ"]==i)[0].tolist())
-        for j in unique_XY:
-            XY_indexes.append(numpy.where(self.data.df["X_XY"]==j)[0].tolist())
-        all_items = numpy.arange(0, len(self.data.df["X_XZ"]))
-        all_indexes = []
-        for k in all_items:
-            list_all = numpy.array([k])
-            for l in list_all:
-                list_z = []
-                list_y = []
-                [list_z.append(sub_list) for sub_list in XZ_indexes if l in sub_list]
-                [list_y.append(sub_list) for sub_list in XY_indexes if l in sub_list]
-                list_all = numpy.unique(numpy.append(list_all, list_z))
-                list_all = numpy.unique(numpy.append(list_all, list_y))
-            all_indexes.append(list_all.tolist())
-        self.all_indexes = all_indexes
-        merged_indexes = []
-        for m in all_indexes:
-            m = set(m)
-            for n in merged_indexes:
-                if m & n:
-                    n.update(m)
-                    break
-            else:
-                merged_indexes.append(m)
-        merged_indexes = [list(o) for o in merged_indexes]
-        self.merged_indexes = merged_indexes
+        XY_sources, XZ_sources = self.sources()
+        self.labels = self.components(XY_sources, XZ_sources)
+        order = numpy.argsort(self.labels, kind="stable")
+        splits = numpy.cumsum(numpy.bincount(self.labels))[:-1]
+        self.merged_indexes = [o.tolist() for o in numpy.split(order, splits)] if len(order) else []
         return self
     
+    @staticmethod
+    def components(XY_sources, XZ_sources):
+        """
+        A technique to label the groups of overlapped points which share an XY or an XZ 
+        localization, using the connected components of a sparse graph.
+        
+        Attributes:
+        XY_sources & XZ_sources: array (N,)
+            The XY and XZ localization of every overlapped point.
+            
+        Return:
+            The group of every point as an integer array, with the groups numbered in the order 
+            of their first point.
+        """
+        XY_nodes = numpy.unique(XY_sources, return_inverse=True)[1].reshape(-1)
+        XZ_nodes = numpy.unique(XZ_sources, return_inverse=True)[1].reshape(-1)
+        n_xy = XY_nodes.max()+1 if len(XY_nodes) else 0
+        n_nodes = n_xy+(XZ_nodes.max()+1 if len(XZ_nodes) else 0)
+        graph = scipy.sparse.coo_matrix((numpy.ones(len(XY_nodes)), (XY_nodes, n_xy+XZ_nodes)), 
+                                        shape=(n_nodes, n_nodes))
+        components = scipy.sparse.csgraph.connected_components(graph, directed=False)[1]
+        labels = components[XY_nodes]
+        first = numpy.unique(labels, return_index=True)[1]
+        rank = numpy.empty(len(components), dtype=numpy.int64)
+        rank[labels[numpy.sort(first)]] = numpy.arange(len(first))
+        return rank[labels]
+    
+    def sources(self):
+        """
+        A technique to obtain the XY and XZ localization of every overlapped point.
+        
+        The indexes determined by the Overlap.py class are used when available. Otherwise, the 
+        localizations are identified by their X position in each orientation.
+        
+        Attributes:
+            None.
+            
+        Return:
+            The XY and XZ source of every row of the overlapped dataframe as arrays.
+        """
+        pairs = self.pairs()
+        if hasattr(pairs, "XY_indexes"):
+            return pairs.XY_indexes, pairs.XZ_indexes
+        if hasattr(self.data, "XY_indexes") and (len(self.data.XY_indexes) == len(pairs)):
+            return numpy.asarray(self.data.XY_indexes), numpy.asarray(self.data.XZ_indexes)
+        return pairs["X_XY"].to_numpy(), pairs["X_XZ"].to_numpy()
+    
+    def pairs(self):
+        """
+        A technique to obtain the overlapped points, either as the compact store of the Overlap.py 
+        class (Localizations.py), or as its dataframe.
+        
+        Attributes:
+            None.
+            
+        Return:
+            The store of the overlapped points, or the dataframe if there is no store.
+        """
+        if getattr(self.data, "localizations", None) is not None:
+            return self.data.localizations
+        return self.data.df
+    
     def selection(self, selection_type="uncertainty"):
         """
         A technique to filter all of the indexes which contain overlaps from multiple 
         localizations to remove all non-unique localizations.
+        
+        A score is computed for every overlapped point, and the points are sorted by group and 
+        then by score, so that the first point of each group is the selected one. When several 
+        points of a group share the lowest score, the first of them is kept.
                 
         Attributes:
         selection_type: str "uncertainty", "Uncertainty", "intensity", "Intensity"
@@ -94,35 +139,53 @@ class filtering(object):
         Return:
             None. Will modify the data established in place.
         """
+        score = self.scores(self.pairs(), selection_type)
+        if score is None:
+            return self
+        self.selection_type = selection_type.lower()
+        self.point_indexes = self.lowest(self.labels, score)
+        return self
+    
+    @staticmethod
+    def scores(df, selection_type="uncertainty"):
+        """
+        A technique to compute the score used to select between duplicate points.
+        
+        Attributes:
+        df: dataframe or dict
+            The overlapped points, containing at least the uncertainty columns (U_XY, U_Z, U_X) 
+            or the intensity columns (I_XY, I_XZ).
+        selection_type: str "uncertainty", "Uncertainty", "intensity", "Intensity"
+            The method of filtering, as used by the selection method.
+            
+        Return:
+            The score of every point as an array, or None if the selection type is not known.
+        """
         if (selection_type=="uncertainty") or (selection_type=="Uncertainty"):
-            point_selection = []
-            for i in range(0, len(self.merged_indexes)):
-                u_xy = []
-                u_z = []
-                u_x = []
-                sumall = []
-                for j in self.merged_indexes[i]:
-                    u_xy.append(self.data.df["U_XY"][j])
-                    u_z.append(self.data.df["U_Z"][j])
-                    u_x.append(self.data.df["U_X"][j])
-                [sumall.append(sum(s)) for s in zip(*[u_xy, u_z, u_x])]
-                loc = numpy.where(sumall==min(sumall))[0]
-                point_selection.append(self.merged_indexes[i][loc[0]])
-            self.point_indexes = point_selection
+            return (numpy.asarray(df["U_XY"])+numpy.asarray(df["U_Z"]))+numpy.asarray(df["U_X"])
         elif (selection_type=="intensity") or (selection_type=="Intensity"):
-            point_selection = []
-            for i in range(0, len(self.merged_indexes)):
-                i_xy = []
-                i_xz = []
-                sumall = []
-                for j in self.merged_indexes[i]:
-                    i_xy.append(self.data.df["I_XY"][j])
-                    i_xz.append(self.data.df["I_XZ"][j])
-                [sumall.append(sum(s)) for s in zip(*[i_xy, i_xz])]
-                loc = numpy.where(sumall==min(sumall))[0]
-                point_selection.append(self.merged_indexes[i][loc[0]])
-            self.point_indexes = point_selection
-        return self
+            return numpy.asarray(df["I_XY"])+numpy.asarray(df["I_XZ"])
+        return None
+    
+    @staticmethod
+    def lowest(labels, score):
+        """
+        A technique to find the point with the lowest score within each group.
+        
+        Attributes:
+        labels: array (N,) of int
+            The group of each point.
+        score: array (N,)
+            The score of each point.
+            
+        Return:
+            The index of the selected point of each group as an integer array, ordered by group.
+        """
+        labels = numpy.asarray(labels)
+        order = numpy.lexsort((numpy.arange(len(labels)), score, labels))
+        first = numpy.ones(len(order), dtype=bool)
+        first[1:] = labels[order][1:] != labels[order][:-1]
+        return order[first]
     
     def points(self):
         """
@@ -134,39 +197,85 @@ class filtering(object):
             None.
             
         Return:
-            None. Will modify the data established in place.
+            None. Will modify the data established in place. If the data was prepared with a 
+            cache, the points are stored in it, and later reused for the same overlapped points 
+            and selection type.
         """
-        df = self.data.df
-        for i in range(0, len(df)):
-            if i not in (self.point_indexes):
-                df = df.drop(i, axis=0)
-        self.df = df
-        points = pandas.concat([df["X_XY"], df["Y_XY"], df["Z_XZ"], 
-                            df["U_XY"], df["U_Z"], 
-                            df["S_XY"], df["S_Z"], 
-                            df["I_XY"], df["I_XZ"], 
-                            df["O_XY"], df["O_XZ"],
-                            df["B_XY"], df["B_XZ"]], 
-                           keys = ["X [nm]", "Y [nm]", "Z [nm]", 
-                                   "Uncertainty XY [nm]", "Uncertainty Z [nm]",
-                                   "Sigma XY [nm]", "Sigma Z [nm]",
-                                   "Intensity XY [Photons]", "Intensity XZ [Photons]",
-                                   "Offset XY [Photons]", "Offset XZ [Photons]",
-                                   "Bkgstd XY [Photons]", "Bkgstd XZ [Photons]"], axis=1).reset_index(drop=True)
-        self.points = points
+        rows = numpy.sort(numpy.asarray(self.point_indexes, dtype=numpy.int64))
+        pairs = self.pairs()
+        self.__dict__.pop("df", None)
+        if isinstance(pairs, localizations):
+            self.localizations = pairs.subset(rows)
+        else:
+            self.localizations = None
+            self.df = pairs.iloc[rows]
+        self.cache = getattr(self.data, "cache", None)
+        if self.cache is not None:
+            self.cache_key = self.cache.key(parent=self.data.cache_key, selection_type=self.selection_type)
+            if self.cache.exists(self.cache_key, "filtering_points"):
+                self.points = self.cache.load(self.cache_key, "filtering_points", mmap=False)
+                return self
+        self.points = self.table(self.df if self.localizations is None else self.localizations)
+        if self.cache is not None:
+            self.cache.store(self.cache_key, "filtering_points", self.points)
         return self
     
-    def download_dataframe(self, filename="Filtering_Dataframe"):
+    def __getattr__(self, name):
+        """
+        A technique to build the df dataframe of the selected overlapped points from the store of 
+        the points method, only when it is first used.
+        """
+        if (name == "df") and (self.__dict__.get("localizations") is not None):
+            self.df = self.localizations.frame()
+            return self.df
+        raise AttributeError("'filtering' object has no attribute '"+name+"'")
+    
+    @staticmethod
+    def table(df):
+        """
+        A technique to arrange the values of the selected overlapped points into the final 
+        dataframe of 3D localizations.
+        
+        Attributes:
+        df: dataframe, dict or localizations
+            The selected overlapped points, with the columns defined by the Overlap.py class.
+            
+        Return:
+            The dataframe of 3D localizations.
+        """
+        return pandas.DataFrame({"X [nm]": numpy.asarray(df["X_XY"]), 
+                                 "Y [nm]": numpy.asarray(df["Y_XY"]), 
+                                 "Z [nm]": numpy.asarray(df["Z_XZ"]), 
+                                 "Uncertainty XY [nm]": numpy.asarray(df["U_XY"]), 
+                                 "Uncertainty Z [nm]": numpy.asarray(df["U_Z"]),
+                                 "Sigma XY [nm]": numpy.asarray(df["S_XY"]), 
+                                 "Sigma Z [nm]": numpy.asarray(df["S_Z"]),
+                                 "Intensity XY [Photons]": numpy.asarray(df["I_XY"]), 
+                                 "Intensity XZ [Photons]": numpy.asarray(df["I_XZ"]),
+                                 "Offset XY [Photons]": numpy.asarray(df["O_XY"]), 
+                                 "Offset XZ [Photons]": numpy.asarray(df["O_XZ"]),
+                                 "Bkgstd XY [Photons]": numpy.asarray(df["B_XY"]), 
+                                 "Bkgstd XZ [Photons]": numpy.asarray(df["B_XZ"])})
+    
+    def download_dataframe(self, filename="Filtering_Dataframe", file_format="csv"):
         """
         A technique to download the data prepared by the Filtering.py method as a 
         CSV file named "Filtering_Dataframe.csv".
         
         Attributes:
-            None.
+        filename: str
+            The name of the file, without the extension.
+        file_format: str "csv", "npz"
+            The format of the file. If "npz" is specified, the columns will be saved as a 
+            compressed NumPy archive, which keeps the data type of every column.
             
         Return:
-            None. Will download the dataframe as a CSV file.
+            None. Will download the dataframe as a CSV or NPZ file.
         """
         self.points.index.set_names('id', level=None, inplace=True)
+        if file_format == "npz":
+            columns = {c: self.points[c].to_numpy() for c in self.points.columns}
+            numpy.savez_compressed(filename+".npz", id=self.points.index.to_numpy(), **columns)
+            return self
         self.points.to_csv(filename+".csv", index=True, encoding='utf-8')
         return self
@@ -0,0 +1,347 @@
+class grid(object):
+    """
+    This file is part of the Multi-Orientation MAXWELL software
+
+    File author(s): Sierra Dean <ccnd@live.com>
+
+    Distributed under the GPLv3 Licence.
+    See accompanying file LICENSE.txt or copy at
+        http://www.gnu.org/licenses/gpl-3.0.html
+
+    source: https://github.com/SierraD/Multi-Orientation-Maxwell
+
+    Last Updated: Oct 17 2026
+    """
+    def __init__(self, centers, half_widths=None, cell_size=None):
+        """
+        A technique to build a reusable spatial index over the localizations of one orientation,
+        using a uniform three-dimensional grid hash.
+
+        Each localization is stored in the grid cell containing its position, together with the
+        half-widths of its uncertainty box. Localizations are sorted by cell, so that the contents
+        of any cell can be found by a binary search, and box, radius and nearest neighbour queries
+        only compare the localizations in the few cells surrounding the query. Localizations with
+        an uncertainty box wider than a cell, or with missing values, are kept aside and always
+        compared directly, so that a few very uncertain points do not slow down every query.
+
+        The tolerances which are not part of the data (i.e. the z_range and xy_range used by the
+        Overlap.py class) are not stored in the grid, but added at query time, so that the same
+        grid can be queried with any tolerance without being rebuilt.
+
+        Attributes:
+        centers: array (N, 3)
+            The X, Y and Z positions of the localizations in nm.
+        half_widths: array (N, 3) or None
+            The half-widths of the uncertainty box of each localization in X, Y and Z. If not
+            specified, the localizations will be treated as points.
+        cell_size: None, num or list [X, Y, Z]
+            The size of the grid cells in nm. If not specified, the cells will be sized to hold
+            about one localization each on average, and to be no smaller than the typical
+            uncertainty box.
+
+        Return:
+            None. Will build the grid in place.
+        """
+        self.centers = numpy.asarray(centers, dtype=float).reshape(-1, 3)
+        if half_widths is None:
+            self.half_widths = numpy.zeros_like(self.centers)
+        else:
+            self.half_widths = numpy.broadcast_to(numpy.asarray(half_widths, dtype=float), self.centers.shape).copy()
+        self.size = len(self.centers)
+        finite = numpy.all(numpy.isfinite(self.centers) & numpy.isfinite(self.half_widths), axis=1)
+        if cell_size is None:
+            if finite.any():
+                extent = numpy.ptp(self.centers[finite], axis=0)
+                typical = 2*numpy.percentile(self.half_widths[finite], 95, axis=0)
+                cell_size = numpy.maximum(extent/max(numpy.cbrt(finite.sum()), 1), typical)
+            else:
+                cell_size = numpy.ones(3)
+            cell_size = numpy.where(cell_size > 0, cell_size, 1.0)
+        self.cell_size = numpy.broadcast_to(numpy.asarray(cell_size, dtype=float), (3,)).copy()
+        if numpy.any(self.cell_size <= 0):
+            raise ValueError("The cell size must be positive in all three dimensions.")
+        self.index(finite & numpy.all(self.half_widths <= self.cell_size, axis=1))
+        return
+
+    def index(self, tight):
+        """
+        A technique to sort the localizations into the grid cells.
+
+        Attributes:
+        tight: array (N,) of bool
+            The localizations to be stored in the grid cells, with all others kept aside.
+
+        Return:
+            None. Will modify the grid established in place.
+        """
+        self.loose = numpy.flatnonzero(~tight)
+        stored = numpy.flatnonzero(tight)
+        if stored.size == 0:
+            self.origin = numpy.zeros(3)
+            self.dims = numpy.ones(3, dtype=numpy.int64)
+        else:
+            self.origin = self.centers[stored].min(axis=0)
+            self.dims = (numpy.floor((self.centers[stored].max(axis=0)-self.origin)/self.cell_size)).astype(numpy.int64)+1
+        keys = self.keys(self.cells(self.centers[stored]))
+        order = numpy.argsort(keys, kind="stable")
+        self.order = stored[order]
+        self.cell_keys, self.cell_start, counts = numpy.unique(keys[order], return_index=True, return_counts=True)
+        self.cell_stop = self.cell_start+counts
+        return self
+
+    def cells(self, positions):
+        """
+        A technique to determine the (unclipped) grid cell containing each position.
+
+        Attributes:
+        positions: array (N, 3)
+            The positions in nm.
+
+        Return:
+            The cell coordinates as a float array (N, 3).
+        """
+        return numpy.floor((positions-self.origin)/self.cell_size)
+
+    def keys(self, cells):
+        """
+        A technique to convert integer cell coordinates to the single key used to sort the grid.
+
+        Attributes:
+        cells: array (N, 3)
+            The cell coordinates, inside the grid.
+
+        Return:
+            The cell keys as an integer array (N,).
+        """
+        cells = numpy.asarray(cells).astype(numpy.int64)
+        return (cells[:, 0]*self.dims[1]+cells[:, 1])*self.dims[2]+cells[:, 2]
+
+    def candidates(self, lower, upper, pad, chunk_size=2**22):
+        """
+        A technique to list, for a set of query boxes, every stored localization whose position
+        falls in a grid cell touched by the query box widened by a padding, followed by all
+        localizations kept aside.
+
+        Attributes:
+        lower & upper: array (Q, 3)
+            The limits of the query boxes.
+        pad: array (3,)
+            The distance by which every query box is widened on each side.
+        chunk_size: int
+            The approximate number of query/cell combinations handled at once.
+
+        Return:
+            A generator of pairs of arrays, the localization indexes and the query indexes.
+        """
+        lower = numpy.asarray(lower, dtype=float).reshape(-1, 3)
+        upper = numpy.asarray(upper, dtype=float).reshape(-1, 3)
+        pad = numpy.asarray(pad, dtype=float)+1e-9*(numpy.abs(self.origin)+self.cell_size*self.dims)
+        first = numpy.clip(self.cells(lower-pad), 0, self.dims-1)
+        last = numpy.clip(self.cells(upper+pad), -1, self.dims-1)
+        spans = numpy.where(numpy.isnan(first) | numpy.isnan(last), 0, last-first+1)
+        spans = numpy.maximum(spans, 0).astype(numpy.int64)
+        first = numpy.nan_to_num(first).astype(numpy.int64)
+        counts = spans.prod(axis=1)
+        cumulative = numpy.cumsum(counts)
+        if len(counts) == 0:
+            return
+        splits = numpy.searchsorted(cumulative, numpy.arange(chunk_size, cumulative[-1], chunk_size), side="left")
+        edges = numpy.unique(numpy.concatenate([[0], splits, [len(counts)]]))
+        for a, b in zip(edges[:-1], edges[1:]):
+            chunk_counts = counts[a:b]
+            total = chunk_counts.sum()
+            query = numpy.repeat(numpy.arange(a, b), chunk_counts)
+            local = numpy.arange(total)-numpy.repeat(numpy.cumsum(chunk_counts)-chunk_counts, chunk_counts)
+            span = spans[query]
+            cell = numpy.column_stack([local//(span[:, 1]*span[:, 2]),
+                                       (local//span[:, 2]) % span[:, 1],
+                                       local % span[:, 2]])+first[query]
+            keys = self.keys(cell)
+            position = numpy.minimum(numpy.searchsorted(self.cell_keys, keys), max(len(self.cell_keys)-1, 0))
+            found = numpy.flatnonzero(self.cell_keys[position] == keys) if len(self.cell_keys) else numpy.zeros(0, dtype=numpy.int64)
+            start = self.cell_start[position[found]]
+            occupancy = self.cell_stop[position[found]]-start
+            query = numpy.repeat(query[found], occupancy)
+            offsets = numpy.arange(occupancy.sum())-numpy.repeat(numpy.cumsum(occupancy)-occupancy, occupancy)
+            items = self.order[numpy.repeat(start, occupancy)+offsets]
+            if self.loose.size != 0:
+                items = numpy.concatenate([items, numpy.tile(self.loose, b-a)])
+                query = numpy.concatenate([query, numpy.repeat(numpy.arange(a, b), self.loose.size)])
+            yield items, query
+        return
+
+    def query_boxes(self, lower, upper, expand=0, chunk_size=2**22, counted=False):
+        """
+        A technique to find every stored uncertainty box which overlaps each of the query boxes.
+
+        As with the pandas intervals used by the Overlap.py class, two boxes overlap when the lower
+        limit of each is strictly below the upper limit of the other, in all three dimensions.
+
+        Attributes:
+        lower & upper: array (Q, 3)
+            The limits of the query boxes.
+        expand: num or list [X, Y, Z]
+            An additional half-width added to every stored uncertainty box at query time,
+            such as the z_range used for the XY orientation.
+        chunk_size: int
+            The approximate number of query/cell combinations handled at once.
+        counted: bool
+            The decision to also return the number of candidate pairs compared.
+
+        Return:
+            The indexes of the stored localizations and of the query boxes which overlap, as integer
+            arrays ordered by the query index and then by the localization index, followed by the
+            number of candidate pairs if counted is True.
+        """
+        lower = numpy.asarray(lower, dtype=float).reshape(-1, 3)
+        upper = numpy.asarray(upper, dtype=float).reshape(-1, 3)
+        expand = numpy.broadcast_to(numpy.asarray(expand, dtype=float), (3,))
+        all_items = []
+        all_queries = []
+        compared = 0
+        for items, query in self.candidates(lower, upper, self.cell_size+expand, chunk_size):
+            compared += len(items)
+            keep = numpy.all((self.centers[items]-self.half_widths[items]-expand < upper[query]) &
+                             (lower[query] < self.centers[items]+self.half_widths[items]+expand), axis=1)
+            all_items.append(items[keep])
+            all_queries.append(query[keep])
+        if counted:
+            return self.ordered(all_items, all_queries)+(compared,)
+        return self.ordered(all_items, all_queries)
+
+    def query_box(self, lower, upper):
+        """
+        A technique to find every stored localization whose position lies strictly inside a box.
+
+        Attributes:
+        lower & upper: list [X, Y, Z]
+            The limits of the box, which may be infinite to leave an axis unbounded.
+
+        Return:
+            The indexes of the localizations inside the box as an ordered integer array.
+        """
+        lower = numpy.asarray(lower, dtype=float).reshape(1, 3)
+        upper = numpy.asarray(upper, dtype=float).reshape(1, 3)
+        all_items = []
+        for items, query in self.candidates(lower, upper, numpy.zeros(3)):
+            keep = numpy.all((lower < self.centers[items]) & (self.centers[items] < upper), axis=1)
+            all_items.append(items[keep])
+        return numpy.sort(numpy.concatenate(all_items)) if all_items else numpy.zeros(0, dtype=numpy.int64)
+
+    def query_radius(self, points, radius):
+        """
+        A technique to find every stored localization within a given distance of each query point.
+
+        Attributes:
+        points: array (Q, 3)
+            The positions of the query points in nm.
+        radius: num or array (Q,)
+            The search radius in nm around each query point.
+
+        Return:
+            The indexes of the stored localizations and of the query points within the radius,
+            as integer arrays ordered by the query index and then by the localization index.
+        """
+        points = numpy.asarray(points, dtype=float).reshape(-1, 3)
+        radius = numpy.broadcast_to(numpy.asarray(radius, dtype=float), (len(points),))
+        all_items = []
+        all_queries = []
+        for items, query in self.candidates(points-radius[:, None], points+radius[:, None], numpy.zeros(3)):
+            distance = numpy.sum((self.centers[items]-points[query])**2, axis=1)
+            keep = distance <= radius[query]**2
+            all_items.append(items[keep])
+            all_queries.append(query[keep])
+        return self.ordered(all_items, all_queries)
+
+    def nearest(self, points, k=1):
+        """
+        A technique to find the k nearest stored localizations to each query point, searching
+        outwards from the cell of the query one shell of cells at a time.
+
+        Every query point still searching is expanded by the same shell at once, and a query point
+        is complete once its k nearest candidates lie within the reach of the shell, so that each
+        shell only compares the query points which have not yet found their neighbours. The last
+        shell covers the whole grid, for the query points which lie far outside of it.
+
+        Attributes:
+        points: array (Q, 3)
+            The positions of the query points in nm.
+        k: int
+            The number of neighbours to return for each query point.
+
+        Return:
+            The distances in nm and the indexes of the neighbours, as arrays (Q, k) ordered from
+            the closest. Missing neighbours are given an infinite distance and an index of -1.
+        """
+        points = numpy.asarray(points, dtype=float).reshape(-1, 3)
+        distances = numpy.full((len(points), k), numpy.inf)
+        neighbours = numpy.full((len(points), k), -1, dtype=numpy.int64)
+        active = numpy.flatnonzero(numpy.all(numpy.isfinite(points), axis=1))
+        shells = int(self.dims.max())
+        for shell in range(0, shells+1):
+            if active.size == 0:
+                break
+            reach = (shell+1)*self.cell_size if shell < shells else numpy.full(3, numpy.inf)
+            done = numpy.full(len(active), shell == shells)
+            for items, query in self.candidates(points[active]-reach, points[active]+reach, numpy.zeros(3)):
+                distance = numpy.sqrt(numpy.sum((self.centers[items]-points[active[query]])**2, axis=1))
+                distance = numpy.where(numpy.isnan(distance), numpy.inf, distance)
+                ordered = numpy.lexsort((items, distance, query))
+                items, query, distance = items[ordered], query[ordered], distance[ordered]
+                rank = numpy.arange(len(query))-numpy.searchsorted(query, query, side="left")
+                top = rank < k
+                items, query, distance, rank = items[top], query[top], distance[top], rank[top]
+                close = numpy.bincount(query[distance <= reach.min()], minlength=len(active))
+                done |= close == k
+                found = done[query]
+                rows = active[query[found]]
+                distances[rows, rank[found]] = distance[found]
+                neighbours[rows, rank[found]] = numpy.where(numpy.isfinite(distance[found]), items[found], -1)
+            active = active[~done]
+        return distances, neighbours
+
+    def subset(self, keep):
+        """
+        A technique to restrict the grid to some of its localizations, renumbered in order,
+        without sorting the grid again.
+
+        Attributes:
+        keep: array (N,) of bool or array of int
+            The localizations to be kept.
+
+        Return:
+            None. Will modify the grid established in place.
+        """
+        mask = numpy.zeros(self.size, dtype=bool)
+        mask[keep] = True
+        renumber = numpy.cumsum(mask)-1
+        stored = mask[self.order]
+        keys = numpy.repeat(self.cell_keys, self.cell_stop-self.cell_start)[stored]
+        self.order = renumber[self.order[stored]]
+        self.loose = renumber[self.loose[mask[self.loose]]]
+        self.cell_keys, self.cell_start, counts = numpy.unique(keys, return_index=True, return_counts=True)
+        self.cell_stop = self.cell_start+counts
+        self.centers = self.centers[mask]
+        self.half_widths = self.half_widths[mask]
+        self.size = len(self.centers)
+        return self
+
+    @staticmethod
+    def ordered(all_items, all_queries):
+        """
+        A technique to join the matches found over several chunks and order them by the query
+        index and then by the localization index.
+
+        Attributes:
+        all_items & all_queries: list of arrays
+            The localization and query indexes of the matches.
+
+        Return:
+            The joined localization and query indexes as integer arrays.
+        """
+        if len(all_items) == 0:
+            return numpy.zeros(0, dtype=numpy.int64), numpy.zeros(0, dtype=numpy.int64)
+        items = numpy.concatenate(all_items)
+        query = numpy.concatenate(all_queries)
+        ordered = numpy.lexsort((items, query))
+        return items[ordered], query[ordered]
@@ -0,0 +1,184 @@
+class histograms(object):
+    """
+    This file is part of the Multi-Orientation MAXWELL software
+    
+    File author(s): Sierra Dean <ccnd@live.com>
+    
+    Distributed under the GPLv3 Licence.
+    See accompanying file LICENSE.txt or copy at
+        http://www.gnu.org/licenses/gpl-3.0.html
+    
+    source: https://github.com/SierraD/Multi-Orientation-Maxwell
+    
+    Last Updated: Oct 17 2026
+    """
+    def __init__(self, columns=["Uncertainty XY [nm]", "Uncertainty Z [nm]", "Sigma XY [nm]", "Sigma Z [nm]"],
+                 bin_width=0.1):
+        """
+        A technique to summarize the columns of the 3D localizations as histograms, so that the
+        precision of the method (Precision.py) can be obtained for datasets too large to be held
+        in memory.
+        
+        Every column is counted into bins of the same width, aligned on multiples of bin_width,
+        in a single pass over each block of localizations. Only the bins which are not empty are
+        kept, as their positions and counts, so that the memory used grows with the number of
+        filled bins rather than with the range of the values. As the bins do not depend on the
+        values already counted, the histograms of separate chunks, files or tiles (Tiling.py)
+        can be merged into the histograms of the whole dataset, which are the same as if the
+        whole dataset had been counted at once.
+        
+        Attributes:
+        columns: list of str "Uncertainty XY [nm]", "Uncertainty Z [nm]", "Sigma XY [nm]", etc.
+            The columns of the points to be counted.
+        bin_width: num
+            The width of the bins in nm.
+        
+        Return:
+            None. Will modify the data established in place.
+        """
+        if bin_width <= 0:
+            raise ValueError("The bin width should be positive.")
+        self.columns = list(columns)
+        self.bin_width = bin_width
+        self.indexes = {c: numpy.zeros(0, dtype=numpy.int64) for c in self.columns}
+        self.counts = {c: numpy.zeros(0, dtype=numpy.int64) for c in self.columns}
+        return
+    
+    def add(self, data):
+        """
+        A technique to count a block of localizations into the histograms.
+        
+        Attributes:
+        data: dataframe
+            The points, or the data previously developed and contained within the Filtering.py,
+            Tiling.py or Clustering.py classes. Values which are not finite are not counted.
+        
+        Return:
+            None. Will modify the data established in place.
+        """
+        df = data if isinstance(data, pandas.DataFrame) else data.points
+        for c in self.columns:
+            if c not in df.columns:
+                raise ValueError("The column '"+c+"' was not found in the points.")
+            values = numpy.asarray(df[c], dtype=float)
+            values = values[numpy.isfinite(values)]
+            if len(values) == 0:
+                continue
+            self.accumulate(c, *numpy.unique(self.index(values), return_counts=True))
+        return self
+    
+    def index(self, values):
+        """
+        A technique to find the bin of each value, as the number of bin widths below it. A value 
+        lying on the edge between two bins, within the rounding of the division, belongs to the 
+        upper bin, so that 0.3 is in the bin [0.3, 0.4) for a width of 0.1.
+        
+        Attributes:
+        values: array
+            The values in nm.
+        
+        Return:
+            The bins of the values as an integer array.
+        """
+        return numpy.floor(numpy.round(values/self.bin_width, 9)).astype(numpy.int64)
+    
+    def accumulate(self, column, indexes, counts):
+        """
+        A technique to add counts to the histogram of a column, merging the bins with the same 
+        position.
+        
+        Attributes:
+        column: str
+            The name of the column.
+        indexes: array of int
+            The positions of the bins, as multiples of bin_width.
+        counts: array of int
+            The counts of the bins.
+        
+        Return:
+            None. Will modify the data established in place.
+        """
+        indexes, inverse = numpy.unique(numpy.concatenate([self.indexes[column], indexes]), return_inverse=True)
+        weights = numpy.concatenate([self.counts[column], counts])
+        self.indexes[column] = indexes
+        self.counts[column] = numpy.bincount(inverse.ravel(), weights=weights, minlength=len(indexes)).astype(numpy.int64)
+        return self
+    
+    def merge(self, other):
+        """
+        A technique to add the histograms of another block of localizations, such as another
+        tile or file, counted separately.
+        
+        Attributes:
+        other: histograms
+            The histograms to be added, with the same bin width.
+        
+        Return:
+            None. Will modify the data established in place.
+        """
+        if not numpy.isclose(self.bin_width, other.bin_width):
+            raise ValueError("The histograms should have the same bin width to be merged.")
+        for c in other.columns:
+            if c not in self.columns:
+                self.columns.append(c)
+                self.indexes[c] = numpy.zeros(0, dtype=numpy.int64)
+                self.counts[c] = numpy.zeros(0, dtype=numpy.int64)
+            self.accumulate(c, other.indexes[c], other.counts[c])
+        return self
+    
+    def read(self, filename, chunksize=2**20):
+        """
+        A technique to count the localizations of a file written by the download_dataframe method
+        of the Filtering.py, Tiling.py or Clustering.py classes, one chunk at a time.
+        
+        Attributes:
+        filename: str "Filtering_Dataframe.csv", "Filtering_Dataframe.npz", etc.
+            The file, either a CSV file or a compressed NumPy archive.
+        chunksize: int
+            The number of rows of a CSV file read at once.
+        
+        Return:
+            None. Will modify the data established in place.
+        """
+        if filename.endswith(".npz"):
+            with numpy.load(filename) as archive:
+                return self.add(pandas.DataFrame({c: archive[c] for c in self.columns if c in archive.files}))
+        for chunk in pandas.read_csv(filename, usecols=lambda c: c in self.columns, chunksize=chunksize):
+            self.add(chunk)
+        return self
+    
+    def histogram(self, column):
+        """
+        A technique to obtain the histogram of a column.
+        
+        Attributes:
+        column: str
+            The name of the column.
+        
+        Return:
+            The lower edges in nm of the bins which are not empty, in increasing order, and the 
+            counts of these bins.
+        """
+        if column not in self.columns:
+            raise ValueError("The column '"+column+"' was not counted.")
+        return self.indexes[column]*self.bin_width, self.counts[column]
+    
+    def download_dataframe(self, filename="Histograms_Dataframe"):
+        """
+        A technique to download the histograms as a CSV file named "Histograms_Dataframe.csv",
+        with the bins which are not empty.
+        
+        Attributes:
+        filename: str
+            The name of the file, without the extension.
+        
+        Return:
+            None. Will download the dataframe as a CSV file.
+        """
+        frames = []
+        for c in self.columns:
+            lower, counts = self.histogram(c)
+            frames.append(pandas.DataFrame({"Column": c, "Lower [nm]": lower,
+                                            "Upper [nm]": lower+self.bin_width, "Count": counts}))
+        pandas.concat(frames, ignore_index=True).to_csv(filename+".csv", index=False, encoding='utf-8')
+        return self
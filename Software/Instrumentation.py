@@ -0,0 +1,270 @@
+class instrumentation(object):
+    """
+    This file is part of the Multi-Orientation MAXWELL software
+    
+    File author(s): Sierra Dean <ccnd@live.com>
+    
+    Distributed under the GPLv3 Licence.
+    See accompanying file LICENSE.txt or copy at
+        http://www.gnu.org/licenses/gpl-3.0.html
+    
+    source: https://github.com/SierraD/Multi-Orientation-Maxwell
+    
+    Last Updated: Oct 17 2026
+    """
+    def __init__(self, classes=None, memory=False):
+        """
+        A technique to record the time, the number of rows and the memory used by every method
+        call of the classes of the method, to find where the time of a slow analysis is spent.
+        
+        The instrumentation is opt-in: once attached, every method of the chosen classes is
+        replaced by a wrapper which records the call and then passes it on, and detaching it
+        restores the original methods. For every call, the wall time, the number of rows of the
+        data given to the class and of the data returned, the number of candidate pairs compared
+        by the overlap search, and, if requested, the memory high-water mark, are recorded. The
+        records can be obtained as a report, or passed as they happen to callback functions, such
+        as those of a monitoring service.
+        
+        Attributes:
+        classes: None or list [preparation, overlap, filtering, etc.]
+            The classes to be instrumented. If not specified, the preparation, overlap, filtering,
+            clustering, surface, precision and plotting classes will be used.
+        memory: bool
+            The decision to record the memory high-water mark of every call with the tracemalloc
+            module, which also follows the arrays allocated by NumPy, but slows down the methods
+            written in Python. The tracing is only started and stopped, and its peak only reset, 
+            if it was not already started outside of the instrumentation, in which case the peak 
+            of a call is only known when the call raises the high-water mark, and is otherwise 
+            given as the memory used at the start or the end of the call.
+        
+        Return:
+            None. Will modify the data established in place.
+        """
+        if classes is None:
+            classes = [globals()[name] for name in ["preparation", "overlap", "filtering", "clustering",
+                                                    "surface", "precision", "plotting"] if name in globals()]
+        self.classes = list(classes)
+        self.memory = memory
+        self.calls = []
+        self.callbacks = []
+        self.originals = {}
+        self.peaks = []
+        self.owned = False
+        self.depth = 0
+        return
+    
+    def attach(self):
+        """
+        A technique to replace the methods of the instrumented classes with recording wrappers.
+        
+        Attributes:
+            None.
+        
+        Return:
+            None. Will modify the classes in place until the detach method is used.
+        """
+        for cls in self.classes:
+            for name, method in list(vars(cls).items()):
+                if ((cls, name) in self.originals) or (not callable(method)) or isinstance(method, type):
+                    continue
+                if isinstance(method, (staticmethod, classmethod)):
+                    continue
+                if name.startswith("__") and (name != "__init__"):
+                    continue
+                self.originals[(cls, name)] = method
+                setattr(cls, name, self.wrap(cls, name, method))
+        return self
+    
+    def detach(self):
+        """
+        A technique to restore the original methods of the instrumented classes.
+        
+        Attributes:
+            None.
+        
+        Return:
+            None. Will modify the classes in place.
+        """
+        for (cls, name), method in self.originals.items():
+            setattr(cls, name, method)
+        self.originals = {}
+        return self
+    
+    def add_callback(self, callback):
+        """
+        A technique to pass every record to a function as soon as the call has finished.
+        
+        Attributes:
+        callback: function
+            A function accepting a single record, as a dict with the keys "class", "method",
+            "depth", "time", "rows_in", "rows_out", "candidates", "memory_start_mb",
+            "peak_memory_mb" and "error".
+        
+        Return:
+            None. Will modify the data established in place.
+        """
+        self.callbacks.append(callback)
+        return self
+    
+    def wrap(self, cls, name, method):
+        """
+        A technique to build the recording wrapper of a single method.
+        
+        Attributes:
+        cls: class
+            The class of the method.
+        name: str
+            The name of the method.
+        method: function
+            The original method.
+        
+        Return:
+            The wrapper function.
+        """
+        import functools
+        instrument = self
+        
+        @functools.wraps(method)
+        def wrapper(obj, *args, **kwargs):
+            return instrument.call(cls, name, method, obj, args, kwargs)
+        
+        return wrapper
+    
+    def call(self, cls, name, method, obj, args, kwargs):
+        """
+        A technique to perform and record a single method call.
+        
+        Attributes:
+        cls: class
+            The class of the method.
+        name: str
+            The name of the method.
+        method: function
+            The original method.
+        obj:
+            The instance the method is called on.
+        args & kwargs:
+            The arguments of the call.
+        
+        Return:
+            The result of the original method.
+        """
+        import time
+        import tracemalloc
+        record = {"class": cls.__name__, "method": name, "depth": self.depth,
+                  "rows_in": self.rows(getattr(obj, "data", obj)), "rows_out": None, "candidates": None,
+                  "memory_start_mb": None, "peak_memory_mb": None, "error": None}
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self.owned = True
+            current, peak = tracemalloc.get_traced_memory()
+            if not self.owned:
+                self.peaks.append(peak)
+            else:
+                if len(self.peaks) != 0:
+                    self.peaks[-1] = max(self.peaks[-1], peak)
+                self.peaks.append(0)
+                tracemalloc.reset_peak()
+            record["memory_start_mb"] = current/2**20
+        self.depth += 1
+        start = time.perf_counter()
+        try:
+            result = method(obj, *args, **kwargs)
+        except Exception as error:
+            record["error"] = type(error).__name__+": "+str(error)
+            raise
+        finally:
+            record["time"] = time.perf_counter()-start
+            self.depth -= 1
+            if self.memory:
+                current, peak = tracemalloc.get_traced_memory()
+                if not self.owned:
+                    if peak <= self.peaks.pop():
+                        peak = max(record["memory_start_mb"]*2**20, current)
+                else:
+                    peak = max(self.peaks.pop(), peak)
+                    if len(self.peaks) != 0:
+                        self.peaks[-1] = max(self.peaks[-1], peak)
+                    else:
+                        tracemalloc.stop()
+                        self.owned = False
+                record["peak_memory_mb"] = peak/2**20
+            if record["error"] is None:
+                record["rows_out"] = self.rows(obj if (result is None) or (result is obj) else result)
+                if name == "indexes":
+                    record["candidates"] = getattr(obj, "candidates", None)
+            self.calls.append(record)
+            for callback in self.callbacks:
+                callback(record)
+        return result
+    
+    @staticmethod
+    def rows(data):
+        """
+        A technique to count the rows of the data held by an instance of one of the classes.
+        
+        Attributes:
+        data:
+            The instance, such as the data given to or returned by a method.
+        
+        Return:
+            The number of rows as an int, or None if the instance does not hold any data yet.
+        """
+        for name in ["points", "point_indexes", "merged_indexes", "localizations", "df", "XY_indexes", "radius_i", "height"]:
+            value = getattr(data, name, None)
+            if hasattr(value, "__len__"):
+                return int(len(value))
+        if (getattr(data, "dfxy", None) is not None) and (getattr(data, "dfxz", None) is not None):
+            return int(len(data.dfxy)+len(data.dfxz))
+        return None
+    
+    def report(self):
+        """
+        A technique to summarize the recorded calls.
+        
+        Attributes:
+            None.
+        
+        Return:
+            A dict with every record as "calls", and the number of calls, the total time and the
+            largest peak memory of every method as "summary".
+        """
+        summary = {}
+        for record in self.calls:
+            key = record["class"]+"."+record["method"]
+            entry = summary.setdefault(key, {"calls": 0, "time": 0.0, "peak_memory_mb": None})
+            entry["calls"] += 1
+            entry["time"] += record["time"]
+            if record["peak_memory_mb"] is not None:
+                entry["peak_memory_mb"] = max(entry["peak_memory_mb"] or 0, record["peak_memory_mb"])
+        return {"calls": list(self.calls), "summary": summary}
+    
+    def download_report(self, filename="Instrumentation_Report"):
+        """
+        A technique to download the report as a JSON file named "Instrumentation_Report.json".
+        
+        Attributes:
+        filename: str
+            The name of the file, without the extension.
+        
+        Return:
+            None. Will download the report as a JSON file.
+        """
+        import json
+        with open(filename+".json", "w") as f:
+            json.dump(self.report(), f, indent=4, default=str)
+        return self
+    
+    def reset(self):
+        """
+        A technique to remove all recorded calls, while keeping the instrumentation attached.
+        
+        Attributes:
+            None.
+        
+        Return:
+            None. Will modify the data established in place.
+        """
+        self.calls = []
+        return self
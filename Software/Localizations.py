@@ -0,0 +1,154 @@
+class localizations(object):
+    """
+    This file is part of the Multi-Orientation MAXWELL software
+    
+    File author(s): Sierra Dean <ccnd@live.com>
+    
+    Distributed under the GPLv3 Licence.
+    See accompanying file LICENSE.txt or copy at
+        http://www.gnu.org/licenses/gpl-3.0.html
+    
+    source: https://github.com/SierraD/Multi-Orientation-Maxwell
+    
+    Last Updated: Oct 17 2026
+    """
+    def __init__(self, data, XY_indexes, XZ_indexes, index=None):
+        """
+        A technique to hold pairs of localizations from the two orientations compactly, as the
+        indexes of each localization in the prepared data, instead of as a new dataframe.
+        
+        The prepared data (Preparation.py) is shared by every step of the method, and each step
+        only passes on the indexes of the pairs it keeps, so that the values of a column are
+        only gathered when they are used, and only for the pairs which are used. A dataframe of
+        the pairs is built only when it is requested.
+        
+        As the values are gathered later, the prepared dataframes and their version are noted
+        when the store is created, and gathering a column fails if the prepared data has since
+        been replaced or modified, such as by the set_to_center or limiting methods, instead of
+        silently returning values which no longer match the pairs.
+        
+        Attributes:
+        data:
+            The data previously developed and contained within the Preparation.py class.
+        XY_indexes & XZ_indexes: array of int
+            The XY and XZ localization of every pair.
+        index: None or array of int
+            The row number of every pair, used as the index of the dataframe. If not specified,
+            the pairs will be numbered in order.
+        
+        Return:
+            None. Will modify the data established in place.
+        """
+        self.data = data
+        self.XY_indexes = numpy.asarray(XY_indexes, dtype=numpy.int64)
+        self.XZ_indexes = numpy.asarray(XZ_indexes, dtype=numpy.int64)
+        self.index = index
+        self.sources = (data.dfxy, data.dfxz)
+        self.version = getattr(data, "version", None)
+        return
+    
+    def __len__(self):
+        """
+        A technique to obtain the number of pairs.
+        """
+        return len(self.XY_indexes)
+    
+    def __getitem__(self, column):
+        """
+        A technique to gather the values of a single column for every pair.
+        
+        Attributes:
+        column: str "X_XY", "U_Z", etc.
+            The name of the column, as defined by the Preparation.py class.
+        
+        Return:
+            The values as an array.
+        """
+        self.check()
+        if column in self.data.dfxy.columns:
+            return self.data.dfxy[column].to_numpy().take(self.XY_indexes)
+        elif column in self.data.dfxz.columns:
+            return self.data.dfxz[column].to_numpy().take(self.XZ_indexes)
+        raise KeyError(column)
+    
+    def check(self):
+        """
+        A technique to ensure that the prepared data has not changed since the store was created.
+        
+        Attributes:
+            None.
+        
+        Return:
+            None. Will raise an error if the prepared dataframes were replaced or modified.
+        """
+        if ((self.data.dfxy is not self.sources[0]) or (self.data.dfxz is not self.sources[1]) or 
+            (getattr(self.data, "version", None) != self.version)):
+            raise ValueError("The prepared data has changed since the pairs were found, so the values "
+                             "method should be used again.")
+        return self
+    
+    def columns(self):
+        """
+        A technique to obtain the names of the columns of the pairs.
+        
+        Attributes:
+            None.
+        
+        Return:
+            The names of the XY columns followed by those of the XZ columns, as a list of str.
+        """
+        return preparation.columns("XY")+preparation.columns("XZ")
+    
+    def subset(self, rows):
+        """
+        A technique to keep some of the pairs, without gathering any values.
+        
+        Attributes:
+        rows: array of bool or array of int
+            The pairs to be kept.
+        
+        Return:
+            The kept pairs, as a new localizations store sharing the same prepared data.
+        """
+        rows = numpy.asarray(rows)
+        if rows.dtype == bool:
+            rows = numpy.flatnonzero(rows)
+        index = rows if self.index is None else numpy.asarray(self.index)[rows]
+        kept = localizations(self.data, self.XY_indexes[rows], self.XZ_indexes[rows], index)
+        kept.sources = self.sources
+        kept.version = self.version
+        return kept
+    
+    def frame(self, columns=None):
+        """
+        A technique to build a dataframe of the pairs.
+        
+        Attributes:
+        columns: None or list of str
+            The columns to be gathered. If not specified, all columns of both orientations are used.
+        
+        Return:
+            The dataframe of the pairs.
+        """
+        if columns is None:
+            columns = self.columns()
+        index = None if self.index is None else pandas.Index(self.index)
+        return pandas.DataFrame({c: self[c] for c in columns}, index=index, copy=False)
+    
+    def structured(self, columns=None):
+        """
+        A technique to build a structured array of the pairs, with one float field for each column.
+        
+        Attributes:
+        columns: None or list of str
+            The columns to be gathered. If not specified, all columns of both orientations are used.
+        
+        Return:
+            The structured array of the pairs.
+        """
+        if columns is None:
+            columns = self.columns()
+        pairs = numpy.empty(len(self), dtype=[(c, numpy.float64) for c in columns])
+        for c in columns:
+            pairs[c] = self[c]
+        return pairs
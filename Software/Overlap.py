@@ -10,7 +10,7 @@ class overlap(object):
         
     source: https://github.com/SierraD/Multi-Orientation-MAXWELL
     
-    Last Updated: Sept 26 2024
+    Last Updated: Oct 17 2026
     """
     
     def __init__(self, data):
@@ -35,7 +35,7 @@ class overlap(object):
         self.magnification = self.data.magnification
         return 
     
-    def indexes(self, z_range, xy_range):
+    def indexes(self, z_range, xy_range, engine=None, n_workers=1):
         """
         A technique to determine the indexes of the dataframe where the points from the two different 
         orientations overlap in 3D space. 
@@ -59,6 +59,383 @@ class overlap(object):
             include Y uncertainty values.
             The recommended value is the in-plane pixel size [nm], which designates the Y step [nm]
             when the in-plane data is subjected to a pixelwise transformation without interpolation.
+        engine: None or str "grid", "sweep", "reference"
+            The method used to find the overlapping pairs. If "grid" is specified, the spatial index 
+            built by the indexing method of the Preparation.py class is queried with the XZ boxes. 
+            If "sweep" is specified, the lower and upper bounds of every uncertainty box are built 
+            as arrays in a single pass, and the overlapping pairs are found with a sort-and-sweep 
+            along the X axis. If "reference" is specified, the original row by row comparison is 
+            performed, which also appends the interval columns to the prepared dataframes. 
+            If not specified, the grid will be used when it has been built, and the sweep otherwise.
+            All return the same indexes, ordered by the XZ index and then by the XY index.
+            If the data was prepared with a cache, the indexes are stored in it, and later 
+            reused for the same data and ranges. The number of candidate pairs compared is 
+            saved as candidates.
+        n_workers: int
+            The number of processes used by the grid and sweep methods. The XZ localizations are 
+            split into consecutive blocks shared between the processes, while the XY data is shared 
+            through memory-mapped files. The indexes are the same for any number of processes.
+            
+        Return:
+            None. Will modify the data established in place.
+        """
+        if (engine == "reference") or (engine == "Reference"):
+            return self.reference(z_range, xy_range)
+        if engine is None:
+            engine = "grid" if hasattr(self.data, "grid_xy") else "sweep"
+        self.bounds(z_range, xy_range)
+        self.cache = getattr(self.data, "cache", None)
+        if self.cache is not None:
+            self.cache_key = self.cache.key(parent=self.data.cache_key, z_range=z_range, xy_range=xy_range)
+            if self.cache.exists(self.cache_key, "overlap_indexes"):
+                cached = self.cache.load(self.cache_key, "overlap_indexes", mmap=False)
+                self.XY_indexes = cached["XY"].to_numpy()
+                self.XZ_indexes = cached["XZ"].to_numpy()
+                self.candidates = 0
+                return self
+        if (engine == "grid") or (engine == "Grid"):
+            if (self.data.grid_xy.size != len(self.data.dfxy)) or (self.data.grid_xz.size != len(self.data.dfxz)):
+                raise ValueError("The spatial index does not match the prepared data, the indexing method should be repeated.")
+            found = self.search(self.data.grid_xy, self.lower_xz, self.upper_xz, [0, 0, z_range], 
+                                n_workers=n_workers, counted=True)
+        else:
+            found = self.sweep(self.lower_xy, self.upper_xy, self.lower_xz, self.upper_xz, 
+                               n_workers=n_workers, counted=True)
+        self.XY_indexes, self.XZ_indexes, self.candidates = found
+        if self.cache is not None:
+            self.cache.store(self.cache_key, "overlap_indexes", 
+                             pandas.DataFrame({"XY": self.XY_indexes, "XZ": self.XZ_indexes}))
+        return self
+    
+    def bounds(self, z_range, xy_range):
+        """
+        A technique to determine the lower and upper limits of the 3D uncertainty box around every 
+        localization in both orientations, computed for all points at once.
+        
+        Attributes:
+        z_range: int
+            The radius of the Z uncertainty for the XY data, as used by the indexes method.
+        xy_range: int
+            The radius of the Y uncertainty for the XZ data, as used by the indexes method.
+            
+        Return:
+            None. Will modify the data established in place, with the limits saved as arrays 
+            of shape (N, 3), in the order X, Y, Z.
+        """
+        self.lower_xy, self.upper_xy = self.limits_xy(self.data.dfxy, z_range)
+        self.lower_xz, self.upper_xz = self.limits_xz(self.data.dfxz, xy_range)
+        return self
+    
+    @staticmethod
+    def limits_xy(dfxy, z_range, rows=None):
+        """
+        A technique to determine the limits of the 3D uncertainty box around XY localizations.
+        
+        Attributes:
+        dfxy: dataframe
+            The prepared XY dataframe.
+        z_range: int
+            The radius of the Z uncertainty for the XY data, as used by the indexes method.
+        rows: None or array of int
+            The localizations to be used. If not specified, all localizations will be used.
+            
+        Return:
+            The lower and upper limits as arrays of shape (N, 3), in the order X, Y, Z.
+        """
+        x_xy, y_xy, z_xy, u_xy = [numpy.asarray(dfxy[c].to_numpy() if rows is None else dfxy[c].to_numpy()[rows], dtype=float) 
+                                  for c in ("X_XY", "Y_XY", "Z_XY", "U_XY")]
+        return (numpy.column_stack([x_xy-u_xy, y_xy-u_xy, z_xy-z_range]), 
+                numpy.column_stack([x_xy+u_xy, y_xy+u_xy, z_xy+z_range]))
+    
+    @staticmethod
+    def limits_xz(dfxz, xy_range, rows=None):
+        """
+        A technique to determine the limits of the 3D uncertainty box around XZ localizations.
+        
+        Attributes:
+        dfxz: dataframe
+            The prepared XZ dataframe.
+        xy_range: int
+            The radius of the Y uncertainty for the XZ data, as used by the indexes method.
+        rows: None or array of int
+            The localizations to be used. If not specified, all localizations will be used.
+            
+        Return:
+            The lower and upper limits as arrays of shape (N, 3), in the order X, Y, Z.
+        """
+        x_xz, y_xz, z_xz, u_x, u_z = [numpy.asarray(dfxz[c].to_numpy() if rows is None else dfxz[c].to_numpy()[rows], dtype=float) 
+                                      for c in ("X_XZ", "Y_XZ", "Z_XZ", "U_X", "U_Z")]
+        return (numpy.column_stack([x_xz-u_x, y_xz-xy_range, z_xz-u_z]), 
+                numpy.column_stack([x_xz+u_x, y_xz+xy_range, z_xz+u_z]))
+    
+    @staticmethod
+    def sweep(lower_xy, upper_xy, lower_xz, upper_xz, chunk_size=2**22, n_workers=1, counted=False):
+        """
+        A technique to find every pair of overlapping XY and XZ uncertainty boxes using a 
+        sort-and-sweep along the X axis.
+        
+        The XY boxes are sorted by their lower X limit, so that for each XZ box the candidates 
+        are a contiguous window of the sorted boxes, bounded by the upper X limit of the XZ box 
+        and by its lower X limit less the widest XY box. XY boxes much wider than the rest (or 
+        unbounded) are kept in a separate "loose" list compared with every XZ box, so that a few 
+        wide boxes do not widen the window of every query. The candidates are then compared in 
+        all three dimensions at once. As with the pandas intervals used by the reference method, two 
+        boxes overlap when the lower limit of each is strictly below the upper limit of the other.
+        
+        Attributes:
+        lower_xy & upper_xy: array (N_xy, 3)
+            The limits of the XY uncertainty boxes.
+        lower_xz & upper_xz: array (N_xz, 3)
+            The limits of the XZ uncertainty boxes.
+        chunk_size: int
+            The approximate number of candidate pairs compared at once, which bounds the memory used.
+        n_workers: int
+            The number of processes sharing the XZ boxes.
+        counted: bool
+            The decision to also return the number of candidate pairs compared.
+            
+        Return:
+            The XY and XZ indexes of the overlapping pairs as integer arrays, ordered by the XZ index 
+            and then by the XY index, followed by the number of candidate pairs if counted is True.
+        """
+        if (len(lower_xy) == 0) or (len(lower_xz) == 0):
+            return overlap.joined([], counted)
+        widths = upper_xy[:, 0]-lower_xy[:, 0]
+        finite = numpy.isfinite(widths) & numpy.isfinite(lower_xy[:, 0])
+        limit = 2*numpy.percentile(widths[finite], 95) if finite.any() else 0
+        loose = numpy.flatnonzero(~finite | (widths > limit))
+        tight = numpy.flatnonzero(finite & (widths <= limit))
+        order = tight[numpy.argsort(lower_xy[tight, 0], kind="stable")]
+        sorted_lower = lower_xy[order, 0]
+        width = widths[tight].max() if len(tight) > 0 else 0
+        margin = 1e-9*(numpy.abs(lower_xz[:, 0])+width)
+        start = numpy.searchsorted(sorted_lower, lower_xz[:, 0]-width-margin, side="left")
+        stop = numpy.searchsorted(sorted_lower, upper_xz[:, 0], side="left")
+        counts = numpy.maximum(stop-start, 0)+len(loose)
+        if n_workers > 1:
+            chunk_size = max(min(chunk_size, int(counts.sum())//(4*n_workers)), 1)
+        edges = overlap.blocks(counts, chunk_size)
+        tasks = [(lower_xz[a:b], upper_xz[a:b], start[a:b], counts[a:b], a) for a, b in zip(edges[:-1], edges[1:])]
+        shared = {"lower_xy": lower_xy, "upper_xy": upper_xy, "order": order, "loose": loose}
+        results = overlap.parallel("sweep_block", shared, tasks, n_workers)
+        if counted:
+            results = [r+(int(task[3].sum()),) for r, task in zip(results, tasks)]
+        return overlap.joined(results, counted)
+    
+    @staticmethod
+    def sweep_block(shared, lower_xz, upper_xz, start, counts, offset):
+        """
+        A technique to compare a block of consecutive XZ boxes with their window of candidate 
+        XY boxes, as determined by the sweep method.
+        
+        Attributes:
+        shared: dict
+            The XY limits ("lower_xy", "upper_xy"), the order of the sorted XY boxes ("order") and 
+            the wide XY boxes compared with every XZ box ("loose").
+        lower_xz & upper_xz: array (N, 3)
+            The limits of the XZ boxes of the block.
+        start & counts: array (N,)
+            The first sorted XY box and the number of candidates of each XZ box, loose boxes included.
+        offset: int
+            The index of the first XZ box of the block.
+            
+        Return:
+            The XY and XZ indexes of the overlapping pairs of the block, ordered by the XZ index 
+            and then by the XY index.
+        """
+        loose = numpy.asarray(shared["loose"])
+        window = counts-len(loose)
+        xz = numpy.repeat(numpy.arange(len(window)), window)
+        offsets = numpy.arange(window.sum())-numpy.repeat(numpy.cumsum(window)-window, window)
+        xy = numpy.asarray(shared["order"][numpy.repeat(start, window)+offsets])
+        if len(loose) > 0:
+            xy = numpy.concatenate([xy, numpy.tile(loose, len(window))])
+            xz = numpy.concatenate([xz, numpy.repeat(numpy.arange(len(window)), len(loose))])
+        keep = numpy.all((shared["lower_xy"][xy] < upper_xz[xz]) & (lower_xz[xz] < shared["upper_xy"][xy]), axis=1)
+        xy = xy[keep]
+        xz = xz[keep]+offset
+        ordered = numpy.lexsort((xy, xz))
+        return xy[ordered], xz[ordered]
+    
+    @staticmethod
+    def search(index, lower_xz, upper_xz, expand, chunk_size=2**16, n_workers=1, counted=False):
+        """
+        A technique to query a spatial index (Grid.py) with the XZ uncertainty boxes.
+        
+        Attributes:
+        index: grid
+            The spatial index of the XY localizations.
+        lower_xz & upper_xz: array (N_xz, 3)
+            The limits of the XZ uncertainty boxes.
+        expand: list [X, Y, Z]
+            The half-width added to the stored XY boxes, i.e. [0, 0, z_range].
+        chunk_size: int
+            The number of XZ boxes queried at once when shared between processes.
+        n_workers: int
+            The number of processes sharing the XZ boxes.
+        counted: bool
+            The decision to also return the number of candidate pairs compared.
+            
+        Return:
+            The XY and XZ indexes of the overlapping pairs as integer arrays, ordered by the XZ index 
+            and then by the XY index, followed by the number of candidate pairs if counted is True.
+        """
+        if n_workers <= 1:
+            return index.query_boxes(lower_xz, upper_xz, expand=expand, counted=counted)
+        chunk_size = max(min(chunk_size, len(lower_xz)//(4*n_workers)), 1)
+        tasks = [(lower_xz[a:a+chunk_size], upper_xz[a:a+chunk_size], expand, a, counted) for a in range(0, len(lower_xz), chunk_size)]
+        shared = {n: getattr(index, n) for n in ("centers", "half_widths", "cell_size", "origin", "dims", 
+                                                  "order", "loose", "cell_keys", "cell_start", "cell_stop")}
+        return overlap.joined(overlap.parallel("search_block", shared, tasks, n_workers), counted)
+    
+    @staticmethod
+    def search_block(shared, lower_xz, upper_xz, expand, offset, counted=False):
+        """
+        A technique to query a spatial index, shared as arrays, with a block of consecutive XZ boxes.
+        
+        Attributes:
+        shared: dict
+            The arrays of the spatial index.
+        lower_xz & upper_xz: array (N, 3)
+            The limits of the XZ boxes of the block.
+        expand: list [X, Y, Z]
+            The half-width added to the stored XY boxes.
+        offset: int
+            The index of the first XZ box of the block.
+        counted: bool
+            The decision to also return the number of candidate pairs compared.
+            
+        Return:
+            The XY and XZ indexes of the overlapping pairs of the block, followed by the number of 
+            candidate pairs if counted is True.
+        """
+        index = grid.__new__(grid)
+        index.__dict__.update(shared)
+        index.size = len(index.centers)
+        found = index.query_boxes(lower_xz, upper_xz, expand=expand, counted=counted)
+        return (found[0], found[1]+offset)+tuple(found[2:])
+    
+    @staticmethod
+    def blocks(counts, chunk_size):
+        """
+        A technique to split consecutive items into blocks holding about the same number of candidates.
+        
+        Attributes:
+        counts: array (N,)
+            The number of candidates of each item.
+        chunk_size: int
+            The approximate number of candidates in each block.
+            
+        Return:
+            The edges of the blocks as an integer array, starting at 0 and ending at N.
+        """
+        cumulative = numpy.cumsum(counts)
+        splits = numpy.searchsorted(cumulative, numpy.arange(chunk_size, cumulative[-1], chunk_size), side="left")
+        return numpy.unique(numpy.concatenate([[0], splits, [len(counts)]]))
+    
+    @staticmethod
+    def parallel(kernel, shared, tasks, n_workers=1):
+        """
+        A technique to run a block method of this class over a list of tasks, either in this process 
+        or in a pool of processes.
+        
+        When processes are used, the shared arrays are written once to memory-mapped files in a 
+        temporary folder, rather than being sent to every process, and the results are returned 
+        in the order of the tasks.
+        
+        Attributes:
+        kernel: str "sweep_block", "search_block"
+            The name of the block method.
+        shared: dict
+            The arrays used by every task.
+        tasks: list
+            The arguments of each task.
+        n_workers: int
+            The number of processes.
+            
+        Return:
+            The list of the results of every task.
+        """
+        if (n_workers <= 1) or (len(tasks) <= 1):
+            return [getattr(overlap, kernel)(shared, *task) for task in tasks]
+        import concurrent.futures
+        import multiprocessing
+        import os
+        import tempfile
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else None)
+        with tempfile.TemporaryDirectory() as directory:
+            for name, array in shared.items():
+                numpy.save(os.path.join(directory, name+".npy"), numpy.asarray(array))
+            with concurrent.futures.ProcessPoolExecutor(max_workers=n_workers, mp_context=context) as pool:
+                futures = [pool.submit(overlap.worker, kernel, directory, list(shared), task) for task in tasks]
+                return [f.result() for f in futures]
+    
+    @staticmethod
+    def worker(kernel, directory, names, task):
+        """
+        A technique to run one task of a block method in a separate process, with the shared 
+        arrays memory-mapped from the temporary folder.
+        
+        Attributes:
+        kernel: str
+            The name of the block method.
+        directory: str
+            The temporary folder holding the shared arrays.
+        names: list of str
+            The names of the shared arrays.
+        task: tuple
+            The arguments of the task.
+            
+        Return:
+            The result of the task.
+        """
+        import os
+        shared = {}
+        for name in names:
+            array = numpy.load(os.path.join(directory, name+".npy"), mmap_mode="r")
+            shared[name] = array if array.ndim > 0 else array[()]
+        return getattr(overlap, kernel)(shared, *task)
+    
+    @staticmethod
+    def joined(results, counted=False):
+        """
+        A technique to join the indexes found over several blocks.
+        
+        Attributes:
+        results: list
+            The XY and XZ indexes found in each block, followed by the number of candidate pairs 
+            if counted is True.
+        counted: bool
+            The decision to also return the total number of candidate pairs compared.
+            
+        Return:
+            The joined XY and XZ indexes as integer arrays, followed by the total number of 
+            candidate pairs if counted is True.
+        """
+        if len(results) == 0:
+            joined = (numpy.zeros(0, dtype=numpy.int64), numpy.zeros(0, dtype=numpy.int64))
+        else:
+            joined = (numpy.concatenate([r[0] for r in results]).astype(numpy.int64), 
+                      numpy.concatenate([r[1] for r in results]).astype(numpy.int64))
+        if counted:
+            return joined+(int(sum(r[2] for r in results)),)
+        return joined
+    
+    def reference(self, z_range, xy_range):
+        """
+        A technique to determine the overlapping indexes by comparing the uncertainty intervals
+        of every XZ localization with the whole XY dataframe, one localization at a time.
+        
+        This is the original method, kept as a reference for the sweep method. It is much slower 
+        for large dataframes, but appends the "X Range", "Y Range" and "Z Range" interval columns 
+        to the prepared dataframes.
+        
+        Attributes:
+        z_range: int
+            The radius of the Z uncertainty for the XY data, as used by the indexes method.
+        xy_range: int
+            The radius of the Y uncertainty for the XZ data, as used by the indexes method.
             
         Return:
             None. Will modify the data established in place.
@@ -121,6 +498,7 @@ class overlap(object):
                         all_indexes_XZ.append(value)
         self.XY_indexes = sum(all_indexes_XY, []) 
         self.XZ_indexes = sum(all_indexes_XZ, [])
+        self.candidates = len(self.data.dfxy)*len(self.data.dfxz)
         return self
     
     def values(self):
@@ -128,51 +506,50 @@ class overlap(object):
         A technique to determine the positional information using the indexes of overlap
         determined within the method.
         
+        The overlapped pairs are kept as a compact store of the indexes of each localization in 
+        the prepared data (Localizations.py), saved as localizations, and shared with the 
+        Filtering.py class, so that the values are only gathered for the columns and pairs which 
+        are used. The df, dfxy and dfxz dataframes, and the pairs structured array, with one float 
+        field for each column of both orientations, are built from the store when first used.
+        
         Attributes:
             None.
         Return:
             None. Will modify the data established in place. 
         """
-        df = pandas.DataFrame(columns=["X_XY", "Y_XY", "Z_XY", 
-                                   "U_XY", "I_XY", "O_XY", "B_XY", "S_XY", 
-                                   "X_XZ", "Y_XZ", "Z_XZ", 
-                                   "U_X", "U_Z", "I_XZ", "O_XZ", "B_XZ", "S_X", "S_Z"])
-        for i in range(0, len(self.XY_indexes)):
-            X_XY = self.data.dfxy["X_XY"][self.XY_indexes[i]]
-            Y_XY = self.data.dfxy["Y_XY"][self.XY_indexes[i]]
-            Z_XY = self.data.dfxy["Z_XY"][self.XY_indexes[i]]
-            U_XY = self.data.dfxy["U_XY"][self.XY_indexes[i]]
-            I_XY = self.data.dfxy["I_XY"][self.XY_indexes[i]]
-            O_XY = self.data.dfxy["O_XY"][self.XY_indexes[i]]
-            B_XY = self.data.dfxy["B_XY"][self.XY_indexes[i]]
-            S_XY = self.data.dfxy["S_XY"][self.XY_indexes[i]]
-            X_XZ = self.data.dfxz["X_XZ"][self.XZ_indexes[i]]
-            Y_XZ = self.data.dfxz["Y_XZ"][self.XZ_indexes[i]]
-            Z_XZ = self.data.dfxz["Z_XZ"][self.XZ_indexes[i]]
-            U_X = self.data.dfxz["U_X"][self.XZ_indexes[i]]
-            U_Z = self.data.dfxz["U_Z"][self.XZ_indexes[i]]
-            I_XZ = self.data.dfxz["I_XZ"][self.XZ_indexes[i]]
-            O_XZ = self.data.dfxz["O_XZ"][self.XZ_indexes[i]]
-            B_XZ = self.data.dfxz["B_XZ"][self.XZ_indexes[i]]
-            S_X = self.data.dfxz["S_X"][self.XZ_indexes[i]]
-            S_Z = self.data.dfxz["S_Z"][self.XZ_indexes[i]]
-            df.loc[i] = [X_XY]+[Y_XY]+[Z_XY]+[U_XY]+[I_XY]+[O_XY]+[B_XY]+[S_XY]+[X_XZ]+[Y_XZ]+[Z_XZ]+[U_X]+[U_Z]+[I_XZ]+[O_XZ]+[B_XZ]+[S_X]+[S_Z]
-        self.df=df
-        self.dfxy = pandas.concat([df["X_XY"], df["Y_XY"], df["Z_XY"], df["U_XY"], df["I_XY"], df["O_XY"], df["B_XY"], df["S_XY"]], 
-                            keys=["X_XY", "Y_XY", "Z_XY", "U_XY", "I_XY", "O_XY", "B_XY", "S_XY"], axis=1)
-        self.dfxz = pandas.concat([df["X_XZ"], df["Y_XZ"], df["Z_XZ"], df["U_X"], df["U_Z"], df["I_XY"], df["O_XY"], df["B_XY"], df["S_X"], df["S_Z"]], 
-                            keys=["X_XZ", "Y_XZ", "Z_XZ", "U_X", "U_Z", "I_XZ", "O_XZ", "B_XZ", "S_X", "S_Z"], axis=1)
+        for name in ["df", "dfxy", "dfxz", "pairs"]:
+            self.__dict__.pop(name, None)
+        self.localizations = localizations(self.data, self.XY_indexes, self.XZ_indexes)
         return self
-
-    def download_dataframe(self, filename="Overlap_Dataframe"):
+    
+    def __getattr__(self, name):
+        """
+        A technique to build the df, dfxy and dfxz dataframes, and the pairs structured array, of 
+        the overlapped pairs from the store of the values method, only when they are first used.
+        """
+        if (name == "pairs") and ("localizations" in self.__dict__):
+            self.pairs = self.localizations.structured()
+            return self.pairs
+        if (name in ("df", "dfxy", "dfxz")) and ("localizations" in self.__dict__):
+            self.df = self.localizations.frame()
+            self.dfxy = self.df[preparation.columns("XY")]
+            self.dfxz = self.df[preparation.columns("XZ")]
+            return self.__dict__[name]
+        raise AttributeError("'overlap' object has no attribute '"+name+"'")
+    
+    def download_dataframe(self, filename="Overlap_Dataframe", file_format="csv"):
         """
         A technique to download the data prepared by the Overlap.py method as a CSV file named
         "Overlap_Dataframe.csv".
         
         Attributes:
-            None.
+        filename: str
+            The name of the file, without the extension.
+        file_format: str "csv", "npz"
+            The format of the file. If "npz" is specified, the columns will be saved as a 
+            compressed NumPy archive, which keeps the data type of every column.
         Return:
-            None. Will download the dataframe as a CSV file.
+            None. Will download the dataframe as a CSV or NPZ file.
         """
         download_df = pandas.concat([self.dfxy, self.dfxz], axis=1, sort=False)
         download_df = download_df.rename(columns={'X_XY': 'x_xy [nm]', 
@@ -193,5 +570,8 @@ class overlap(object):
                                                   'B_XZ': 'bkgstd_xz [photon]',
                                                   'S_X': 'sigma_x [nm]', 
                                                   'S_Z': 'sigma_z [nm]'})
+        if file_format == "npz":
+            numpy.savez_compressed(filename+".npz", **{c: download_df[c].to_numpy() for c in download_df.columns})
+            return self
         download_df.to_csv(filename+".csv", index=False, encoding='utf-8')
         return self
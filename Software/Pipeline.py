@@ -0,0 +1,263 @@
+class pipeline(object):
+    """
+    This file is part of the Multi-Orientation MAXWELL software
+    
+    File author(s): Sierra Dean <ccnd@live.com>
+    
+    Distributed under the GPLv3 Licence.
+    See accompanying file LICENSE.txt or copy at
+        http://www.gnu.org/licenses/gpl-3.0.html
+    
+    source: https://github.com/SierraD/Multi-Orientation-Maxwell
+    
+    Last Updated: Oct 17 2026
+    """
+    def __init__(self, manifest, output="Multi-Orientation-MAXWELL_Results"):
+        """
+        A technique to run every step of the method, from the ThunderSTORM results files to the
+        filtered localizations, the sphere fitting and the precision, for many acquisitions at once.
+        
+        The acquisitions are described by a manifest, either a list or a JSON file, in which each
+        acquisition gives the pair of XY and XZ results files and any parameter differing from the
+        defaults. The parameters shared by all acquisitions can be given once, as follows:
+            
+            {"defaults": {"pixelsize_xy": 230, "pixelsize_xz": 60, "selection_type": "uncertainty"},
+             "acquisitions": [{"name": "Sample_1", "file_xy": "XY_1.csv", "file_xz": "XZ_1.csv"},
+                              {"name": "Sample_2", "file_xy": "XY_2.csv", "file_xz": "XZ_2.csv",
+                               "limits": [["X", 15000, "less"], ["X", -15000, "more"]]}]}
+        
+        When "clustering" is given the parameters of the dbscan method of the Clustering.py class,
+        such as {"eps": 150, "min_samples": 5}, the localizations are separated into particles
+        and every particle is fitted by the batch_evaluation method of the Surface.py class.
+        
+        When "report" is given a list of the methods of the Plotting.py class, either as names or
+        as dicts of their parameters, such as ["tricolumn", {"plot": "three_dimensional",
+        "dimensions": 3, "max_points": 100000}], the figures are written without a display, in
+        the "report_format" format ("html", "png", "svg", etc.). The 2D figures show the
+        localizations of both orientations, and the 3D figures the filtered points. If
+        "fitted_precision" is listed, the figure of every precision column is also written, as a
+        PNG image unless "report_format" is "svg" or "pdf". As the acquisitions are processed by
+        separate workers, their reports are also made in parallel.
+        
+        When "bin_width" is given, the columns of "precision" are counted into the histograms of
+        the Histograms.py class in a single pass, and the precision is obtained from them.
+        
+        The files of a JSON manifest are found relative to the manifest. The steps are run without
+        any plot, and the results of each acquisition are written to its own folder, along with a
+        summary of the parameters, the number of localizations, the results of the sphere fitting
+        and of the precision, and the time taken by every step.
+        
+        The pipeline can also be run from the command line, with the other classes of the method
+        kept in the same folder:
+            
+            python Pipeline.py Manifest.json --output Results --workers 4
+        
+        Attributes:
+        manifest: str "Manifest.json", list or dict
+            The JSON file, or the list of acquisitions, or the dict of defaults and acquisitions.
+        output: str
+            The folder in which the results are written. It will be created if it does not exist.
+        
+        Return:
+            None. Will modify the data established in place.
+        """
+        import json
+        import os
+        self.output = output
+        self.defaults = {"magnification": 20, "pixelsize_xy": 230, "pixelsize_xz": 13, "TS_dims": 2,
+                         "chunksize": None, "cache": None, "center": True, "limits": [],
+                         "z_range": None, "xy_range": None, "engine": None, "n_workers": 1,
+                         "selection_type": "uncertainty", "clustering": None, "surface": True, "precision": [],
+                         "bin_width": None, "distribution": "norm", "file_format": "csv", "report": [], "report_format": "html"}
+        folder = ""
+        if isinstance(manifest, str):
+            folder = os.path.dirname(os.path.abspath(manifest))
+            with open(manifest) as f:
+                manifest = json.load(f)
+        if isinstance(manifest, dict):
+            self.defaults.update(manifest.get("defaults", {}))
+            manifest = manifest["acquisitions"]
+        self.acquisitions = []
+        for i, entry in enumerate(manifest):
+            if ("file_xy" not in entry) or ("file_xz" not in entry):
+                raise ValueError("Each acquisition should specify both 'file_xy' and 'file_xz'.")
+            parameters = dict(self.defaults)
+            parameters.update(entry)
+            parameters["file_xy"] = os.path.join(folder, entry["file_xy"])
+            parameters["file_xz"] = os.path.join(folder, entry["file_xz"])
+            parameters.setdefault("name", "Acquisition_"+str(i+1))
+            self.acquisitions.append(parameters)
+        names = [parameters["name"] for parameters in self.acquisitions]
+        if len(set(names)) != len(names):
+            raise ValueError("The name of each acquisition should be unique.")
+        return
+    
+    def run(self, n_workers=1):
+        """
+        A technique to process every acquisition of the manifest and write the results.
+        
+        As the acquisitions are independent, they can be processed at the same time by a pool of
+        processes. An acquisition which fails is reported in the summary with its error, without
+        stopping the others.
+        
+        Attributes:
+        n_workers: int
+            The number of acquisitions processed at the same time.
+        
+        Return:
+            None. Will write the results, and keep the summaries as the summary list and the
+            times taken by every step as the timings dataframe.
+        """
+        import json
+        import os
+        os.makedirs(self.output, exist_ok=True)
+        if (n_workers <= 1) or (len(self.acquisitions) <= 1):
+            self.summary = [pipeline.acquisition(parameters, self.output) for parameters in self.acquisitions]
+        else:
+            import concurrent.futures
+            import multiprocessing
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("fork" if "fork" in methods else None)
+            with concurrent.futures.ProcessPoolExecutor(max_workers=n_workers, mp_context=context) as pool:
+                futures = [pool.submit(pipeline.acquisition, parameters, self.output) for parameters in self.acquisitions]
+                self.summary = [f.result() for f in futures]
+        self.timings = pandas.DataFrame([{"Acquisition": s["name"], "Step": step, "Time [s]": seconds}
+                                         for s in self.summary for step, seconds in s["timings"].items()],
+                                        columns=["Acquisition", "Step", "Time [s]"])
+        self.timings.to_csv(os.path.join(self.output, "Pipeline_Timings.csv"), index=False, encoding='utf-8')
+        with open(os.path.join(self.output, "Pipeline_Summary.json"), "w") as f:
+            json.dump(self.summary, f, indent=4, default=str)
+        return self
+    
+    @staticmethod
+    def acquisition(parameters, output):
+        """
+        A technique to process a single acquisition, running every step of the method in turn.
+        
+        Attributes:
+        parameters: dict
+            The files and parameters of the acquisition, as described by the manifest.
+        output: str
+            The folder in which the folder of the acquisition is written.
+        
+        Return:
+            The summary of the acquisition as a dict.
+        """
+        import json
+        import os
+        import time
+        folder = os.path.join(output, parameters["name"])
+        os.makedirs(folder, exist_ok=True)
+        summary = {"name": parameters["name"], "parameters": parameters, "timings": {}}
+        timings = summary["timings"]
+        
+        def timed(step, function, *args, **kwargs):
+            start = time.perf_counter()
+            result = function(*args, **kwargs)
+            timings[step] = timings.get(step, 0)+time.perf_counter()-start
+            return result
+        
+        try:
+            store = None if parameters["cache"] is None else cache(parameters["cache"])
+            data = timed("setting", preparation().setting, parameters["file_xy"], parameters["file_xz"],
+                         magnification=parameters["magnification"], pixelsize_xy=parameters["pixelsize_xy"],
+                         pixelsize_xz=parameters["pixelsize_xz"], TS_dims=parameters["TS_dims"],
+                         chunksize=parameters["chunksize"], cache=store)
+            summary["localizations"] = {"XY": int(data.xy_len), "XZ": int(data.xz_len)}
+            if parameters["center"]:
+                data = timed("set_to_center", data.set_to_center)
+            for axis, limit, direction in parameters["limits"]:
+                data = timed("limiting", data.limiting, axis, limit, direction)
+            z_range = data.zpix if parameters["z_range"] is None else parameters["z_range"]
+            xy_range = data.xypix if parameters["xy_range"] is None else parameters["xy_range"]
+            if (parameters["engine"] == "grid") and (getattr(data, "grid_xy", None) is None):
+                data = timed("indexing", data.indexing)
+            matched = timed("indexes", overlap(data).indexes, z_range, xy_range,
+                            engine=parameters["engine"], n_workers=parameters["n_workers"])
+            matched = timed("values", matched.values)
+            summary["overlapped"] = int(len(matched.XY_indexes))
+            filtered = timed("merge", filtering(matched).merge)
+            filtered = timed("selection", filtered.selection, parameters["selection_type"])
+            filtered = timed("points", filtered.points)
+            summary["points"] = int(len(filtered.points))
+            timed("download_dataframe", filtered.download_dataframe, os.path.join(folder, "Filtering_Dataframe"),
+                  file_format=parameters["file_format"])
+            if parameters["clustering"] is not None:
+                clustered = timed("dbscan", clustering(filtered).dbscan, **parameters["clustering"])
+                summary["particles"] = clustered.n_particles
+                timed("download_dataframe", clustered.download_dataframe, os.path.join(folder, "Clustering_Dataframe"),
+                      file_format=parameters["file_format"])
+                if parameters["surface"]:
+                    fitted = timed("batch_evaluation", surface(clustered).batch_evaluation)
+                    fitted.fits.to_csv(os.path.join(folder, "Surface_Fits.csv"), index=False, encoding='utf-8')
+            elif parameters["surface"] and (len(filtered.points) >= 4):
+                fitted = timed("evaluation", surface(filtered).evaluation)
+                summary["surface"] = {"X_cent": float(numpy.squeeze(fitted.X_cent)),
+                                      "Y_cent": float(numpy.squeeze(fitted.Y_cent)),
+                                      "Z_cent": float(numpy.squeeze(fitted.Z_cent)),
+                                      "radius": float(numpy.squeeze(fitted.radius))}
+            summary["precision"] = {}
+            summary["report"] = []
+            reports = [{"plot": entry} if isinstance(entry, str) else dict(entry) for entry in parameters["report"]]
+            image_format = parameters["report_format"] if parameters["report_format"] in ["svg", "pdf"] else "png"
+            binned = filtered
+            if (parameters["bin_width"] is not None) and parameters["precision"]:
+                binned = timed("histograms", histograms(parameters["precision"], bin_width=parameters["bin_width"]).add,
+                               filtered)
+            for data_type in parameters["precision"]:
+                fitted = timed("get_precision", precision(binned, data_type=data_type).get_precision,
+                               distribution=parameters["distribution"], n_workers=parameters["n_workers"], plot=False, 
+                               verbose=False)
+                summary["precision"][data_type] = fitted.best_fit
+                if any(entry["plot"] == "fitted_precision" for entry in reports):
+                    filename = os.path.join(folder, "Precision_"+"_".join(data_type.replace("[nm]", "").split())+"."+image_format)
+                    timed("report", fitted.fitted_precision, filename=filename, show=False)
+                    summary["report"].append(filename)
+            for i, entry in enumerate(reports):
+                plot = entry.pop("plot")
+                if plot == "fitted_precision":
+                    continue
+                dimensions = entry.get("dimensions", 3 if plot == "three_dimensional_sigma" else 2)
+                filename = os.path.join(folder, "Report_"+str(i+1)+"_"+plot+"."+parameters["report_format"])
+                timed("report", getattr(plotting(data if dimensions == 2 else filtered), plot),
+                      filename=filename, show=False, **entry)
+                summary["report"].append(filename)
+        except Exception as error:
+            summary["error"] = type(error).__name__+": "+str(error)
+        with open(os.path.join(folder, "Summary.json"), "w") as f:
+            json.dump(summary, f, indent=4, default=str)
+        return summary
+
+
+if (__name__ == "__main__") and ("__file__" in globals()):
+    import argparse
+    import os
+    import matplotlib
+    matplotlib.use("Agg")
+    import numpy
+    import pandas
+    import plotly
+    from plotly import subplots
+    import fitter
+    import seaborn
+    import scipy
+    import scipy.sparse
+    import scipy.sparse.csgraph
+    import scipy.optimize
+    import scipy.stats
+    folder = os.path.dirname(os.path.abspath(__file__))
+    for name in sorted(os.listdir(folder)):
+        if name.endswith(".py") and (name not in ["Pipeline.py", "Benchmark.py"]):
+            with open(os.path.join(folder, name)) as f:
+                exec(f.read(), globals())
+    parser = argparse.ArgumentParser(description="Run the Multi-Orientation MAXWELL method on the acquisitions of a manifest.")
+    parser.add_argument("manifest", help="The JSON file describing the acquisitions.")
+    parser.add_argument("--output", default="Multi-Orientation-MAXWELL_Results", help="The folder in which the results are written.")
+    parser.add_argument("--workers", type=int, default=1, help="The number of acquisitions processed at the same time.")
+    arguments = parser.parse_args()
+    results = pipeline(arguments.manifest, output=arguments.output).run(n_workers=arguments.workers)
+    for s in results.summary:
+        print(s["name"], s.get("points", s.get("error")), round(sum(s["timings"].values()), 3))
+    if any("error" in s for s in results.summary):
+        import sys
+        sys.exit(1)
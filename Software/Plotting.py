@@ -10,13 +10,16 @@ class plotting(object):
         
     source: https://github.com/SierraD/Multi-Orientation-Maxwell
     
-    Last Updated: Sept 26 2024
+    Last Updated: Oct 17 2026
     """
     
     def __init__(self, data):
         """
         A technique to visualize the 2D and 3D results obtained from the method.
         
+        Every figure can be written to a file, and returned instead of displayed, so that the 
+        figures of many acquisitions can be made without a display.
+        
         Attributes:
         data: 
             The data previously developed and contained within the various classes.
@@ -27,7 +30,8 @@ class plotting(object):
         self.data = data
         return
     
-    def onecolumn(self, axis="XY", dimensions=2, scale_by_size=False, show_error=False):
+    def onecolumn(self, axis="XY", dimensions=2, scale_by_size=False, show_error=False, max_points=None,
+                  downsample=None, bins=256, filename=None, show=True):
         """
         A technique to visualize the 3D results as a single plot of two dimensional data 
         with the orientation specified, inlcuding the error bars for the localization.
@@ -39,73 +43,60 @@ class plotting(object):
             The dimensions to be used for the width and height of the figure.
         show_error: bool
             True or False for showing the error bars.
+        max_points: None or int
+            The largest number of localizations drawn as markers in each trace. Above it, the
+            localizations are drawn as described by the markers method.
+        downsample: None or str "random", "stratified"
+            The decision to draw a subset of max_points localizations as markers, instead of
+            their density.
+        bins: int
+            The number of bins along each axis of the density.
+        filename: None or str "Figure.html", "Figure.png", "Figure.svg", etc.
+            The file to which the figure is written, as described by the render method.
+        show: bool
+            The decision to display the figure. If False, the figure is returned instead.
  
         Return:
-            A plot displaying the localizations as a single plot of two-dimensional data.
+            A plot displaying the localizations as a single plot of two-dimensional data, or the 
+            figure if show is False.
         """
         fig = plotly.graph_objects.Figure()
         if type(scale_by_size) == list:
             fig.update_layout(autosize=False, width=scale_by_size[0], height=scale_by_size[1])
+        detail = dict(show_error=show_error, max_points=max_points, downsample=downsample, bins=bins)
         if axis == "XY":
             if dimensions == 2:
-                fig.add_trace(plotly.graph_objects.Scatter(x=self.data.dfxy["X_XY"], y=self.data.dfxy["Y_XY"], name="XY",
-                                         error_x=dict(type='data', array=self.data.dfxy["U_XY"], 
-                                                      visible=show_error, width=1, color="gray"), 
-                                         error_y=dict(type='data', array=self.data.dfxy["U_XY"], 
-                                                      visible=show_error, width=1, color="gray"),
-                                         marker=dict(color="Red", size=2), mode="markers"))
-                fig.add_trace(plotly.graph_objects.Scatter(x=self.data.dfxz["X_XZ"], y=self.data.dfxz["Y_XZ"], name="XZ",
-                                     error_x=dict(type='data', array=self.data.dfxz["U_X"], 
-                                                  visible=show_error, width=1, color="gray"), 
-                                         marker=dict(color="Blue", size=2), mode="markers"))
-
+                fig.add_trace(self.markers(["X_XY", "Y_XY"], ["U_XY", "U_XY"], name="XY", 
+                                           marker=dict(color="Red", size=2), **detail))
+                fig.add_trace(self.markers(["X_XZ", "Y_XZ"], ["U_X", None], name="XZ", 
+                                           marker=dict(color="Blue", size=2), **detail))
+            
             elif dimensions == 3:
-                fig.add_trace(plotly.graph_objects.Scatter(x=self.data.points["X [nm]"], y=self.data.points["Y [nm]"],
-                                     error_x=dict(type='data', array=self.data.points["Uncertainty XY [nm]"], 
-                                                  visible=show_error, width=1, color="gray"), 
-                                     error_y=dict(type='data', array=self.data.points["Uncertainty XY [nm]"], 
-                                                  visible=show_error, width=1, color="gray"),   
-                                     marker=dict(color="Black", size=2), mode="markers", showlegend=False))
+                fig.add_trace(self.markers(["X [nm]", "Y [nm]"], ["Uncertainty XY [nm]", "Uncertainty XY [nm]"], 
+                                           marker=dict(color="Black", size=2), showlegend=False, **detail))
         elif axis == "XZ":
             if dimensions == 2:
-                fig.add_trace(plotly.graph_objects.Scatter(x=self.data.dfxy["X_XY"], y=self.data.dfxy["Z_XY"], 
-                                         error_x=dict(type='data', array=self.data.dfxy["U_XY"], 
-                                                      visible=show_error, width=1, color="gray"), 
-                                         marker=dict(color="Red", size=2), mode="markers", showlegend=False))
-                fig.add_trace(plotly.graph_objects.Scatter(x=self.data.dfxz["X_XZ"], y=self.data.dfxz["Z_XZ"], 
-                                         error_x=dict(type='data', array=self.data.dfxz["U_X"], 
-                                                      visible=show_error, width=1, color="gray"), 
-                                         error_y=dict(type='data', array=self.data.dfxz["U_Z"], 
-                                                      visible=show_error, width=1, color="gray"),    
-                                         marker=dict(color="Blue", size=2), mode="markers", showlegend=False))
+                fig.add_trace(self.markers(["X_XY", "Z_XY"], ["U_XY", None], 
+                                           marker=dict(color="Red", size=2), showlegend=False, **detail))
+                fig.add_trace(self.markers(["X_XZ", "Z_XZ"], ["U_X", "U_Z"], 
+                                           marker=dict(color="Blue", size=2), showlegend=False, **detail))
             elif dimensions == 3:
-                fig.add_trace(plotly.graph_objects.Scatter(x=self.data.points["X [nm]"], y=self.data.points["Z [nm]"],
-                                     error_x=dict(type='data', array=self.data.points["Uncertainty XY [nm]"], 
-                                                  visible=show_error, width=1, color="gray"), 
-                                     error_y=dict(type='data', array=self.data.points["Uncertainty Z [nm]"], 
-                                                  visible=show_error, width=1, color="gray"),   
-                                     marker=dict(color="Black", size=2), mode="markers", showlegend=False))
+                fig.add_trace(self.markers(["X [nm]", "Z [nm]"], ["Uncertainty XY [nm]", "Uncertainty Z [nm]"], 
+                                           marker=dict(color="Black", size=2), showlegend=False, **detail))
         elif axis == "YZ":
             if dimensions == 2:
-                fig.add_trace(plotly.graph_objects.Scatter(x=self.data.dfxy["Y_XY"], y=self.data.dfxy["Z_XY"], 
-                                         error_x=dict(type='data', array=self.data.dfxy["U_XY"], 
-                                                      visible=show_error, width=1, color="gray"), 
-                                         marker=dict(color="Red", size=2), mode="markers", showlegend=False))
-                fig.add_trace(plotly.graph_objects.Scatter(x=self.data.dfxz["Y_XZ"], y=self.data.dfxz["Z_XZ"], 
-                                         error_y=dict(type='data', array=self.data.dfxz["U_Z"], 
-                                                      visible=show_error, width=1, color="gray"),    
-                                         marker=dict(color="Blue", size=2), mode="markers", showlegend=False))
+                fig.add_trace(self.markers(["Y_XY", "Z_XY"], ["U_XY", None], 
+                                           marker=dict(color="Red", size=2), showlegend=False, **detail))
+                fig.add_trace(self.markers(["Y_XZ", "Z_XZ"], [None, "U_Z"], 
+                                           marker=dict(color="Blue", size=2), showlegend=False, **detail))
             elif dimensions == 3:
-                fig.add_trace(plotly.graph_objects.Scatter(x=self.data.points["Y [nm]"], y=self.data.points["Z [nm]"],
-                                     error_x=dict(type='data', array=self.data.points["Uncertainty XY [nm]"], 
-                                                  visible=show_error, width=1, color="gray"), 
-                                     error_y=dict(type='data', array=self.data.points["Uncertainty Z [nm]"], 
-                                                  visible=show_error, width=1, color="gray"),   
-                                     marker=dict(color="Black", size=2), mode="markers", showlegend=False))
-        fig.show()
-        return
+                fig.add_trace(self.markers(["Y [nm]", "Z [nm]"], ["Uncertainty XY [nm]", "Uncertainty Z [nm]"], 
+                                           marker=dict(color="Black", size=2), showlegend=False, **detail))
+        self.render(fig, filename, show)
+        return None if show else fig
     
-    def tricolumn(self, dimensions=2, scale_by_size=False, show_error=False):
+    def tricolumn(self, dimensions=2, scale_by_size=False, show_error=False, max_points=None, downsample=None,
+                  bins=256, filename=None, show=True):
         """
         A technique to visualize the 3D results as three columns of two dimensional data, 
         inlcuding the error bars for the localization.
@@ -113,71 +104,58 @@ class plotting(object):
         Attributes:
         dimensions: int 2 or 3 
             The dimensions of the data, either 2D for the XY/XZ data or 3D for the finalized data.
+        max_points: None or int
+            The largest number of localizations drawn as markers in each trace. Above it, the
+            localizations are drawn as described by the markers method.
+        downsample: None or str "random", "stratified"
+            The decision to draw a subset of max_points localizations as markers, instead of
+            their density.
+        bins: int
+            The number of bins along each axis of the density.
+        filename: None or str "Figure.html", "Figure.png", "Figure.svg", etc.
+            The file to which the figure is written, as described by the render method.
+        show: bool
+            The decision to display the figure. If False, the figure is returned instead.
  
         Return:
-            A plot displaying the localizations as three columns of two-dimensioanl data.
+            A plot displaying the localizations as three columns of two-dimensioanl data, or the 
+            figure if show is False.
         """
         fig = plotly.subplots.make_subplots(rows=1, cols=3, subplot_titles=("XY Orientation", "XZ Orientation", "YZ Orientation"))
         if type(scale_by_size) == list:
             fig.update_layout(autosize=False, width=scale_by_size[0], height=scale_by_size[1])
+        detail = dict(show_error=show_error, max_points=max_points, downsample=downsample, bins=bins)
         if dimensions == 2:
-            fig.add_trace(plotly.graph_objects.Scatter(x=self.data.dfxy["X_XY"], y=self.data.dfxy["Y_XY"], name="XY",
-                                     error_x=dict(type='data', array=self.data.dfxy["U_XY"], 
-                                                  visible=show_error, width=1, color="gray"), 
-                                     error_y=dict(type='data', array=self.data.dfxy["U_XY"], 
-                                                  visible=show_error, width=1, color="gray"),   
-                                     marker=dict(color="Red", size=2), mode="markers"), row=1, col=1)
-            fig.add_trace(plotly.graph_objects.Scatter(x=self.data.dfxz["X_XZ"], y=self.data.dfxz["Y_XZ"], name="XZ",
-                                     error_x=dict(type='data', array=self.data.dfxz["U_X"], 
-                                                  visible=show_error, width=1, color="gray"), 
-                                 marker=dict(color="Blue", size=2), mode="markers"), row=1, col=1)
-            fig.add_trace(plotly.graph_objects.Scatter(x=self.data.dfxy["X_XY"], y=self.data.dfxy["Z_XY"], 
-                                     error_x=dict(type='data', array=self.data.dfxy["U_XY"], 
-                                                  visible=show_error, width=1, color="gray"), 
-                                     marker=dict(color="Red", size=2), mode="markers", showlegend=False), row=1, col=2)
-            fig.add_trace(plotly.graph_objects.Scatter(x=self.data.dfxz["X_XZ"], y=self.data.dfxz["Z_XZ"], 
-                                     error_x=dict(type='data', array=self.data.dfxz["U_X"], 
-                                                  visible=show_error, width=1, color="gray"), 
-                                     error_y=dict(type='data', array=self.data.dfxz["U_Z"], 
-                                                  visible=show_error, width=1, color="gray"),    
-                                     marker=dict(color="Blue", size=2), mode="markers", showlegend=False), row=1, col=2)
-            fig.add_trace(plotly.graph_objects.Scatter(x=self.data.dfxy["Y_XY"], y=self.data.dfxy["Z_XY"], 
-                                     error_x=dict(type='data', array=self.data.dfxy["U_XY"], 
-                                                  visible=show_error, width=1, color="gray"), 
-                                     marker=dict(color="Red", size=2), mode="markers", showlegend=False), row=1, col=3)
-            fig.add_trace(plotly.graph_objects.Scatter(x=self.data.dfxz["Y_XZ"], y=self.data.dfxz["Z_XZ"], 
-                                     error_y=dict(type='data', array=self.data.dfxz["U_Z"], 
-                                                  visible=show_error, width=1, color="gray"),    
-                                     marker=dict(color="Blue", size=2), mode="markers", showlegend=False), row=1, col=3)
+            fig.add_trace(self.markers(["X_XY", "Y_XY"], ["U_XY", "U_XY"], name="XY", 
+                                       marker=dict(color="Red", size=2), **detail), row=1, col=1)
+            fig.add_trace(self.markers(["X_XZ", "Y_XZ"], ["U_X", None], name="XZ", 
+                                       marker=dict(color="Blue", size=2), **detail), row=1, col=1)
+            fig.add_trace(self.markers(["X_XY", "Z_XY"], ["U_XY", None], 
+                                       marker=dict(color="Red", size=2), showlegend=False, **detail), row=1, col=2)
+            fig.add_trace(self.markers(["X_XZ", "Z_XZ"], ["U_X", "U_Z"], 
+                                       marker=dict(color="Blue", size=2), showlegend=False, **detail), row=1, col=2)
+            fig.add_trace(self.markers(["Y_XY", "Z_XY"], ["U_XY", None], 
+                                       marker=dict(color="Red", size=2), showlegend=False, **detail), row=1, col=3)
+            fig.add_trace(self.markers(["Y_XZ", "Z_XZ"], [None, "U_Z"], 
+                                       marker=dict(color="Blue", size=2), showlegend=False, **detail), row=1, col=3)
         elif dimensions == 3:
-            fig.add_trace(plotly.graph_objects.Scatter(x=self.data.points["X [nm]"], y=self.data.points["Y [nm]"],
-                                     error_x=dict(type='data', array=self.data.points["Uncertainty XY [nm]"], 
-                                                  visible=show_error, width=1, color="gray"), 
-                                     error_y=dict(type='data', array=self.data.points["Uncertainty XY [nm]"], 
-                                                  visible=show_error, width=1, color="gray"),   
-                                     marker=dict(color="Black", size=2), mode="markers", showlegend=False), row=1, col=1)
-            fig.add_trace(plotly.graph_objects.Scatter(x=self.data.points["X [nm]"], y=self.data.points["Z [nm]"],
-                                     error_x=dict(type='data', array=self.data.points["Uncertainty XY [nm]"], 
-                                                  visible=show_error, width=1, color="gray"), 
-                                     error_y=dict(type='data', array=self.data.points["Uncertainty Z [nm]"], 
-                                                  visible=show_error, width=1, color="gray"),   
-                                     marker=dict(color="Black", size=2), mode="markers", showlegend=False), row=1, col=2)
-            fig.add_trace(plotly.graph_objects.Scatter(x=self.data.points["Y [nm]"], y=self.data.points["Z [nm]"],
-                                     error_x=dict(type='data', array=self.data.points["Uncertainty XY [nm]"], 
-                                                  visible=show_error, width=1, color="gray"), 
-                                     error_y=dict(type='data', array=self.data.points["Uncertainty Z [nm]"], 
-                                                  visible=show_error, width=1, color="gray"),   
-                                     marker=dict(color="Black", size=2), mode="markers", showlegend=False), row=1, col=3)
+            fig.add_trace(self.markers(["X [nm]", "Y [nm]"], ["Uncertainty XY [nm]", "Uncertainty XY [nm]"], 
+                                       marker=dict(color="Black", size=2), showlegend=False, **detail), row=1, col=1)
+            fig.add_trace(self.markers(["X [nm]", "Z [nm]"], ["Uncertainty XY [nm]", "Uncertainty Z [nm]"], 
+                                       marker=dict(color="Black", size=2), showlegend=False, **detail), row=1, col=2)
+            fig.add_trace(self.markers(["Y [nm]", "Z [nm]"], ["Uncertainty XY [nm]", "Uncertainty Z [nm]"], 
+                                       marker=dict(color="Black", size=2), showlegend=False, **detail), row=1, col=3)
         fig.update_xaxes(title_text="X [nm]", row=1, col=1, title_standoff = 0)
         fig.update_yaxes(title_text="Y [nm]", row=1, col=1, title_standoff = 0)
         fig.update_xaxes(title_text="X [nm]", row=1, col=2, title_standoff = 0)
         fig.update_yaxes(title_text="Z [nm]", row=1, col=2, title_standoff = 0)
         fig.update_xaxes(title_text="Y [nm]", row=1, col=3, title_standoff = 0)
         fig.update_yaxes(title_text="Z [nm]", row=1, col=3, title_standoff = 0)
-        fig.show()
-        return self
+        self.render(fig, filename, show)
+        return self if show else fig
     
-    def tricolumn_sigma(self, dimensions=2, scale_by_size=False):
+    def tricolumn_sigma(self, dimensions=2, scale_by_size=False, batched=True, max_points=10000, filename=None, 
+                        show=True):
         """
         A technique to visualize the 3D results as three columns of two dimensional data, 
         with the size of the markers represented as the sigma value obtained from ThunderSTORM.
@@ -185,9 +163,24 @@ class plotting(object):
         Attributes:
         dimensions: int 2 or 3 
             The dimensions of the data, either 2D for the XY/XZ data or 3D for the finalized data.
+        batched: bool
+            The decision to draw all of the circles of each plot as a single trace, as built by 
+            the circles method, instead of one shape for each localization, so that the figure 
+            remains fast to build and to display for many localizations. If not specified, the 
+            circles will be batched.
+        max_points: None or int
+            The largest number of localizations drawn as circles in each plot. Above it, the 
+            localizations are drawn as markers whose size follows their sigma value, as built by 
+            the discs method, so that the size of the figure remains small. If None is specified, 
+            every localization is drawn as a circle.
+        filename: None or str "Figure.html", "Figure.png", "Figure.svg", etc.
+            The file to which the figure is written, as described by the render method.
+        show: bool
+            The decision to display the figure. If False, the figure is returned instead.
  
         Return:
-            A plot displaying the localizations as three columns of 2D data visualized as the ThunderSTORM sigma value.
+            A plot displaying the localizations as three columns of 2D data visualized as the ThunderSTORM sigma value,
+            or the figure if show is False.
         """
         if dimensions == 2:
             fig = plotly.subplots.make_subplots(rows=1, cols=2, subplot_titles=("XY Orientation", "XZ Orientation"))
@@ -201,12 +194,24 @@ class plotting(object):
             right_x_xz = self.data.dfxz["X_XZ"] + self.data.dfxz["S_X"]
             left_z = self.data.dfxz["Z_XZ"] - self.data.dfxz["S_Z"]
             right_z = self.data.dfxz["Z_XZ"] + self.data.dfxz["S_Z"]
-            for i in range(0, len(left_x_xy)): 
-                fig.add_shape(type="circle", x0=left_x_xy[i], x1=right_x_xy[i], y0=left_y[i], y1=right_y[i], 
-                              fillcolor="red", line_color="red", opacity=0.2, row=1, col=1)
-            for j in range(0, len(left_x_xz)): 
-                fig.add_shape(type="circle", x0=left_x_xz[j], x1=right_x_xz[j], y0=left_z[j], y1=right_z[j], 
-                              fillcolor="Blue", line_color="Blue", opacity=0.2, row=1, col=2)
+            if (max_points is not None) and (len(left_x_xy) > max_points):
+                fig.add_trace(self.discs(self.projection("X_XY"), self.projection("Y_XY"), self.projection("S_XY"), "red"), 
+                              row=1, col=1)
+            elif batched:
+                fig.add_trace(self.circles(left_x_xy, right_x_xy, left_y, right_y, "red"), row=1, col=1)
+            else:
+                for i in range(0, len(left_x_xy)): 
+                    fig.add_shape(type="circle", x0=left_x_xy[i], x1=right_x_xy[i], y0=left_y[i], y1=right_y[i], 
+                                  fillcolor="red", line_color="red", opacity=0.2, row=1, col=1)
+            if (max_points is not None) and (len(left_x_xz) > max_points):
+                fig.add_trace(self.discs(self.projection("X_XZ"), self.projection("Z_XZ"), 
+                                         (self.projection("S_X")+self.projection("S_Z"))/2, "Blue"), row=1, col=2)
+            elif batched:
+                fig.add_trace(self.circles(left_x_xz, right_x_xz, left_z, right_z, "Blue"), row=1, col=2)
+            else:
+                for j in range(0, len(left_x_xz)): 
+                    fig.add_shape(type="circle", x0=left_x_xz[j], x1=right_x_xz[j], y0=left_z[j], y1=right_z[j], 
+                                  fillcolor="Blue", line_color="Blue", opacity=0.2, row=1, col=2)
             fig.update_xaxes(range=[min(left_x_xy)+((min(right_x_xy)-max(left_x_xy))/4),
                                 max(right_x_xy)-((min(right_x_xy)-max(left_x_xy))/4)], row=1, col=1)
             fig.update_yaxes(range=[min(left_y)+((min(right_y)-max(left_y))/4),
@@ -215,7 +220,6 @@ class plotting(object):
                                 max(right_x_xz)-((min(right_x_xz)-max(left_x_xz))/4)], row=1, col=2)
             fig.update_yaxes(range=[min(left_z)+((min(right_z)-max(left_z))/4),
                                 max(right_z)-((min(right_z)-max(left_z))/4)], row=1, col=2)
-            fig.show()
         elif dimensions == 3:
             fig = plotly.subplots.make_subplots(rows=1, cols=3, subplot_titles=("XY Orientation", "XZ Orientation", "YZ Orientation"))
             if type(scale_by_size) == list:
@@ -226,13 +230,24 @@ class plotting(object):
             right_y = self.data.points["Y [nm]"] + self.data.points["Sigma XY [nm]"]
             left_z = self.data.points["Z [nm]"] - self.data.points["Sigma Z [nm]"]
             right_z = self.data.points["Z [nm]"] + self.data.points["Sigma Z [nm]"]
-            for i in range(0, len(left_x)): 
-                fig.add_shape(type="circle", x0=left_x[i], x1=right_x[i], y0=left_y[i], y1=right_y[i], 
-                              fillcolor="Green", line_color="Green", opacity=0.2, row=1, col=1)
-                fig.add_shape(type="circle", x0=left_x[i], x1=right_x[i], y0=left_z[i], y1=right_z[i], 
-                              fillcolor="Green", line_color="Green", opacity=0.2, row=1, col=2)
-                fig.add_shape(type="circle", x0=left_y[i], x1=right_y[i], y0=left_z[i], y1=right_z[i], 
-                              fillcolor="Green", line_color="Green", opacity=0.2, row=1, col=3)
+            if (max_points is not None) and (len(left_x) > max_points):
+                sigma_xy = self.projection("Sigma XY [nm]")
+                sigma = (sigma_xy+self.projection("Sigma Z [nm]"))/2
+                fig.add_trace(self.discs(self.projection("X [nm]"), self.projection("Y [nm]"), sigma_xy, "Green"), row=1, col=1)
+                fig.add_trace(self.discs(self.projection("X [nm]"), self.projection("Z [nm]"), sigma, "Green"), row=1, col=2)
+                fig.add_trace(self.discs(self.projection("Y [nm]"), self.projection("Z [nm]"), sigma, "Green"), row=1, col=3)
+            elif batched:
+                fig.add_trace(self.circles(left_x, right_x, left_y, right_y, "Green"), row=1, col=1)
+                fig.add_trace(self.circles(left_x, right_x, left_z, right_z, "Green"), row=1, col=2)
+                fig.add_trace(self.circles(left_y, right_y, left_z, right_z, "Green"), row=1, col=3)
+            else:
+                for i in range(0, len(left_x)): 
+                    fig.add_shape(type="circle", x0=left_x[i], x1=right_x[i], y0=left_y[i], y1=right_y[i], 
+                                  fillcolor="Green", line_color="Green", opacity=0.2, row=1, col=1)
+                    fig.add_shape(type="circle", x0=left_x[i], x1=right_x[i], y0=left_z[i], y1=right_z[i], 
+                                  fillcolor="Green", line_color="Green", opacity=0.2, row=1, col=2)
+                    fig.add_shape(type="circle", x0=left_y[i], x1=right_y[i], y0=left_z[i], y1=right_z[i], 
+                                  fillcolor="Green", line_color="Green", opacity=0.2, row=1, col=3)
             fig.update_xaxes(range=[min(left_x)+((min(right_x)-max(left_x))/4),
                                 max(right_x)-((min(right_x)-max(left_x))/4)], row=1, col=1)
             fig.update_yaxes(range=[min(left_y)+((min(right_y)-max(left_y))/4),
@@ -245,37 +260,47 @@ class plotting(object):
                                 max(right_y)-((min(right_y)-max(left_y))/4)], row=1, col=3)
             fig.update_yaxes(range=[min(left_z)+((min(right_z)-max(left_z))/4),
                                 max(right_z)-((min(right_z)-max(left_z))/4)], row=1, col=3)
-            fig.show()
-        return
+        self.render(fig, filename, show)
+        return None if show else fig
     
-    def three_dimensional(self, dimensions=2, scale_by_size=False):
+    def three_dimensional(self, dimensions=2, scale_by_size=False, max_points=None, downsample=None, bins=256,
+                          filename=None, show=True):
         """
         A technique to visualize the 3D results of the localizations.
         
         Attributes:
         dimensions: int 2 or 3 
             The dimensions of the data, either 2D for the XY/XZ data or 3D for the finalized data.
+        max_points: None or int
+            The largest number of localizations drawn as markers in each trace. Above it, the
+            localizations are drawn as described by the markers method.
+        downsample: None or str "random", "stratified"
+            The decision to draw a subset of max_points localizations as markers, instead of
+            their density.
+        bins: int
+            The number of bins along each axis of the density, as described by the voxels method.
+        filename: None or str "Figure.html", "Figure.png", "Figure.svg", etc.
+            The file to which the figure is written, as described by the render method.
+        show: bool
+            The decision to display the figure. If False, the figure is returned instead.
  
         Return:
-            A 3D visualization of the localizations.
+            A 3D visualization of the localizations, or the figure if show is False.
         """
         fig = plotly.graph_objects.Figure()
         if type(scale_by_size) == list:
             fig.update_layout(width=scale_by_size[0], height=scale_by_size[1])
+        detail = dict(max_points=max_points, downsample=downsample, bins=bins)
         if dimensions == 2:
-            fig.add_trace(plotly.graph_objects.Scatter3d(x=self.data.dfxy["X_XY"], y=self.data.dfxy["Y_XY"], z=self.data.dfxy["Z_XY"],
-                                       name = "XY",
-                                       marker=dict(color="#FF2D00", size=2), mode="markers"))
-            fig.add_trace(plotly.graph_objects.Scatter3d(x=self.data.dfxz["X_XZ"], y=self.data.dfxz["Y_XZ"], z=self.data.dfxz["Z_XZ"],
-                                       name = "XZ",
-                                       marker=dict(color="#001BFF", size=2), mode="markers"))
+            fig.add_trace(self.markers(["X_XY", "Y_XY", "Z_XY"], name = "XY", marker=dict(color="#FF2D00", size=2), **detail))
+            fig.add_trace(self.markers(["X_XZ", "Y_XZ", "Z_XZ"], name = "XZ", marker=dict(color="#001BFF", size=2), **detail))
         elif dimensions == 3:
-            fig.add_trace(plotly.graph_objects.Scatter3d(x=self.data.points["X [nm]"], y=self.data.points["Y [nm]"], z=self.data.points["Z [nm]"],
-                                       marker=dict(color="#000000", size=2), mode="markers"))
-        fig.show()
-        return
+            fig.add_trace(self.markers(["X [nm]", "Y [nm]", "Z [nm]"], marker=dict(color="#000000", size=2), **detail))
+        self.render(fig, filename, show)
+        return None if show else fig
     
-    def three_dimensional_sigma(self, dimensions=3, scale_by_size=False):
+    def three_dimensional_sigma(self, dimensions=3, scale_by_size=False, batched=True, max_points=10000, 
+                                filename=None, show=True):
         """
         A technique to visualize the 3D results of the localizations, 
         with the size represented as the sigma value obtained from ThunderSTORM.
@@ -283,10 +308,24 @@ class plotting(object):
         Attributes:
         dimensions: int 2
             The dimensions of the data, should be 3D for the finalized data.
+        batched: bool
+            The decision to draw all of the ellipsoids as a single mesh, as built by the 
+            ellipsoids method, instead of one surface for each localization, so that the figure 
+            remains fast to build and to display for many localizations. If not specified, the 
+            ellipsoids will be batched.
+        max_points: None or int
+            The largest number of localizations drawn as ellipsoids. Above it, the localizations 
+            are drawn as markers whose size follows their sigma value, as built by the spheres 
+            method, so that the size of the figure remains small. If None is specified, every 
+            localization is drawn as an ellipsoid.
+        filename: None or str "Figure.html", "Figure.png", "Figure.svg", etc.
+            The file to which the figure is written, as described by the render method.
+        show: bool
+            The decision to display the figure. If False, the figure is returned instead.
  
         Return:
             A 3D visualization of the localizations with the size represented as the 
-            sigma value obtained from ThunderSTORM.
+            sigma value obtained from ThunderSTORM, or the figure if show is False.
         """
         if dimensions != 3:
             raise ValueError("The PSF is only three dimensional after the data has been converted to three dimensions.")
@@ -294,12 +333,436 @@ class plotting(object):
         fig = plotly.subplots.make_subplots(rows=1, cols=1, specs=[[{'is_3d': True}]])
         if type(scale_by_size) == list:
             fig.update_layout(width=scale_by_size[0], height=scale_by_size[1])
-        for i in range(0,len(self.data.points["X [nm]"])):
-            x = self.data.points["Sigma XY [nm]"][i]*numpy.cos(u)*numpy.sin(v)+self.data.points["X [nm]"][i]
-            y = self.data.points["Sigma XY [nm]"][i]*numpy.sin(u)*numpy.sin(v)+self.data.points["Y [nm]"][i]
-            z = self.data.points["Sigma Z [nm]"][i]*numpy.cos(v)+self.data.points["Z [nm]"][i]
-            fig.add_trace(plotly.graph_objects.Surface(x=x, y=y, z=z, opacity=0.5), 1, 1)
-        fig.update_traces(showscale=False)
+        if (max_points is not None) and (len(self.data.points) > max_points):
+            fig.add_trace(self.spheres(self.data.points["X [nm]"], self.data.points["Y [nm]"], self.data.points["Z [nm]"], 
+                                       (self.data.points["Sigma XY [nm]"]+self.data.points["Sigma Z [nm]"])/2), 1, 1)
+        elif batched:
+            fig.add_trace(self.ellipsoids(self.data.points["X [nm]"], self.data.points["Y [nm]"], self.data.points["Z [nm]"], 
+                                          self.data.points["Sigma XY [nm]"], self.data.points["Sigma XY [nm]"], 
+                                          self.data.points["Sigma Z [nm]"]), 1, 1)
+        else:
+            for i in range(0,len(self.data.points["X [nm]"])):
+                x = self.data.points["Sigma XY [nm]"][i]*numpy.cos(u)*numpy.sin(v)+self.data.points["X [nm]"][i]
+                y = self.data.points["Sigma XY [nm]"][i]*numpy.sin(u)*numpy.sin(v)+self.data.points["Y [nm]"][i]
+                z = self.data.points["Sigma Z [nm]"][i]*numpy.cos(v)+self.data.points["Z [nm]"][i]
+                fig.add_trace(plotly.graph_objects.Surface(x=x, y=y, z=z, opacity=0.5), 1, 1)
+        fig.update_traces(showscale=False, selector=lambda trace: trace.type != "scatter3d")
         fig.update_layout(scene = dict(xaxis_title="X [nm]", yaxis_title="Y [nm]", zaxis_title="Z [nm]"))
-        fig.show()
-        return
+        self.render(fig, filename, show)
+        return None if show else fig
+    
+    @staticmethod
+    def circles(x0, x1, y0, y1, color, segments=16):
+        """
+        A technique to draw many circles or ellipses as a single trace, as a path of closed 
+        polygons separated by gaps.
+        
+        Attributes:
+        x0 & x1 & y0 & y1: array
+            The limits of the box containing each circle, as used by the add_shape method of Plotly.
+        color: str
+            The color of the circles.
+        segments: int
+            The number of straight segments drawn for each circle. The points of the path are 
+            kept as 32-bit floats, which Plotly writes compactly as binary arrays.
+            
+        Return:
+            The Scatter trace of the circles.
+        """
+        x0, x1, y0, y1 = [numpy.asarray(a, dtype=float) for a in (x0, x1, y0, y1)]
+        angle = numpy.linspace(0, 2*numpy.pi, segments+1)
+        x = numpy.full((len(x0), segments+2), numpy.nan)
+        y = numpy.full((len(x0), segments+2), numpy.nan)
+        x[:, :-1] = ((x0+x1)/2)[:, None]+((x1-x0)/2)[:, None]*numpy.cos(angle)
+        y[:, :-1] = ((y0+y1)/2)[:, None]+((y1-y0)/2)[:, None]*numpy.sin(angle)
+        return plotly.graph_objects.Scatter(x=x.ravel().astype(numpy.float32), y=y.ravel().astype(numpy.float32), mode="lines", fill="toself", fillcolor=color, 
+                                            line=dict(color=color, width=1), opacity=0.2, hoverinfo="skip", 
+                                            showlegend=False)
+    
+    @staticmethod
+    def ellipsoids(x, y, z, sigma_x, sigma_y, sigma_z, resolution=8):
+        """
+        A technique to draw many ellipsoids as a single mesh, by repeating the vertices and 
+        triangles of one sphere, scaled and moved to every localization.
+        
+        Attributes:
+        x & y & z: array
+            The center of each ellipsoid.
+        sigma_x & sigma_y & sigma_z: array
+            The radius of each ellipsoid along each axis.
+        resolution: int
+            The number of vertices around each ellipsoid. Half as many rings are drawn from pole to pole.
+            
+        Return:
+            The Mesh3d trace of the ellipsoids.
+        """
+        centers = numpy.column_stack([numpy.asarray(a, dtype=float) for a in (x, y, z)])
+        radii = numpy.column_stack([numpy.asarray(a, dtype=float) for a in (sigma_x, sigma_y, sigma_z)])
+        u = numpy.linspace(0, 2*numpy.pi, resolution, endpoint=False)
+        v = numpy.linspace(0, numpy.pi, resolution//2+1)[1:-1]
+        rings = len(v)
+        sphere = numpy.vstack([[0, 0, 1],
+                               numpy.column_stack([numpy.outer(numpy.sin(v), numpy.cos(u)).ravel(), 
+                                                   numpy.outer(numpy.sin(v), numpy.sin(u)).ravel(), 
+                                                   numpy.repeat(numpy.cos(v), resolution)]),
+                               [0, 0, -1]])
+        ring = numpy.arange(resolution)
+        after = (ring+1) % resolution
+        faces = [numpy.column_stack([numpy.zeros(resolution, dtype=int), 1+ring, 1+after])]
+        for r in range(0, rings-1):
+            top = 1+r*resolution
+            bottom = top+resolution
+            faces.append(numpy.column_stack([top+ring, bottom+ring, bottom+after]))
+            faces.append(numpy.column_stack([top+ring, bottom+after, top+after]))
+        faces.append(numpy.column_stack([1+(rings-1)*resolution+ring, numpy.full(resolution, len(sphere)-1), 
+                                         1+(rings-1)*resolution+after]))
+        faces = numpy.vstack(faces)
+        vertices = (centers[:, None, :]+radii[:, None, :]*sphere[None, :, :]).reshape(-1, 3).astype(numpy.float32)
+        faces = (faces[None, :, :]+(len(sphere)*numpy.arange(len(centers)))[:, None, None]).reshape(-1, 3).astype(numpy.int32)
+        return plotly.graph_objects.Mesh3d(x=vertices[:, 0], y=vertices[:, 1], z=vertices[:, 2], 
+                                           i=faces[:, 0], j=faces[:, 1], k=faces[:, 2], opacity=0.5, 
+                                           flatshading=False, hoverinfo="skip")
+    
+    @staticmethod
+    def spheres(x, y, z, sigma, color="#008000", largest=12):
+        """
+        A technique to draw many localizations as a single trace of markers, whose diameter on 
+        the screen is proportional to their sigma value.
+        
+        Attributes:
+        x & y & z: array
+            The center of each localization.
+        sigma: array
+            The sigma value of each localization.
+        color: str
+            The color of the markers.
+        largest: num
+            The diameter in pixels of the marker of the largest sigma value. The markers are at 
+            least 2 pixels wide.
+            
+        Return:
+            The Scatter3d trace of the markers.
+        """
+        size = plotting.sizes(sigma, largest)
+        return plotly.graph_objects.Scatter3d(x=numpy.asarray(x, dtype=numpy.float32), y=numpy.asarray(y, dtype=numpy.float32), 
+                                              z=numpy.asarray(z, dtype=numpy.float32), mode="markers", 
+                                              marker=dict(color=color, size=size.astype(numpy.float32), opacity=0.5, 
+                                                          line=dict(width=0)), 
+                                              hoverinfo="skip", showlegend=False)
+    
+    @staticmethod
+    def discs(x, y, sigma, color, largest=12):
+        """
+        A technique to draw many localizations of a two dimensional plot as a single trace of 
+        markers, whose diameter on the screen is proportional to their sigma value, as used by 
+        the tricolumn_sigma method for many localizations.
+        
+        Attributes:
+        x & y: array
+            The center of each localization.
+        sigma: array
+            The sigma value of each localization.
+        color: str
+            The color of the markers.
+        largest: num
+            The diameter in pixels of the marker of the largest sigma value, as used by the 
+            spheres method. The diameters are rounded to whole pixels, and kept as 8-bit integers 
+            so that the figure remains small.
+            
+        Return:
+            The Scattergl trace of the markers.
+        """
+        size = numpy.rint(plotting.sizes(sigma, largest)).astype(numpy.uint8)
+        return plotly.graph_objects.Scattergl(x=numpy.asarray(x, dtype=numpy.float32), y=numpy.asarray(y, dtype=numpy.float32), 
+                                              mode="markers", marker=dict(color=color, size=size, 
+                                                                          opacity=0.2, line=dict(width=0)), 
+                                              hoverinfo="skip", showlegend=False)
+    
+    @staticmethod
+    def sizes(sigma, largest=12):
+        """
+        A technique to convert the sigma value of every localization to a marker diameter in 
+        pixels, proportional to the sigma value and at least 2 pixels wide.
+        
+        Attributes:
+        sigma: array
+            The sigma value of each localization.
+        largest: num
+            The diameter in pixels of the marker of the largest sigma value.
+            
+        Return:
+            The diameter of every marker as an array.
+        """
+        sigma = numpy.nan_to_num(numpy.asarray(sigma, dtype=float))
+        return numpy.clip(largest*sigma/max(numpy.max(sigma, initial=0), 1e-12), 2, largest)
+    
+    def projection(self, column):
+        """
+        A technique to obtain a column of the localizations as an array, converted only once, so 
+        that the XY, XZ and YZ plots of every method share the same arrays.
+        
+        The column is found in the dfxy, dfxz or points dataframes of the data, and is kept as 
+        32-bit floats, which Plotly writes compactly as binary arrays. It is converted again 
+        when the dataframe holding it is replaced or changes length.
+        
+        Attributes:
+        column: str "X_XY", "Z_XZ", "X [nm]", etc.
+            The name of the column.
+            
+        Return:
+            The column as an array.
+        """
+        if "projected" not in self.__dict__:
+            self.projected = {}
+        for name in ["dfxy", "dfxz", "points"]:
+            frame = getattr(self.data, name, None)
+            if (frame is not None) and (column in frame.columns):
+                key = (id(frame), len(frame))
+                if (column not in self.projected) or (self.projected[column][0] != key):
+                    self.projected[column] = (key, frame[column].to_numpy(dtype=numpy.float32))
+                return self.projected[column][1]
+        raise ValueError("The column '"+column+"' was not found in the data.")
+    
+    def render(self, fig, filename=None, show=True):
+        """
+        A technique to write a figure to a file and to display it, so that the figures can also 
+        be made without a display, such as by the Pipeline.py class.
+        
+        Attributes:
+        fig:
+            The Plotly figure.
+        filename: None or str "Figure.html", "Figure.png", "Figure.svg", "Figure.pdf", etc.
+            The file to which the figure is written, with the format given by its extension. An 
+            HTML file can be opened in any browser, while the static images require the 
+            kaleido package to be installed.
+        show: bool
+            The decision to display the figure.
+            
+        Return:
+            The figure, also saved as figure.
+        """
+        import os
+        if filename is not None:
+            extension = os.path.splitext(filename)[1].lower()
+            if extension == ".html":
+                fig.write_html(filename)
+            elif extension in [".png", ".jpg", ".jpeg", ".webp", ".svg", ".pdf"]:
+                fig.write_image(filename)
+            else:
+                raise ValueError("The filename should end with .html, .png, .jpg, .jpeg, .webp, .svg or .pdf.")
+        self.figure = fig
+        if show:
+            fig.show()
+        return fig
+    
+    def markers(self, columns, errors=(None, None), show_error=False, max_points=None, downsample=None, bins=256, 
+                seed=0, **style):
+        """
+        A technique to build the trace of the localizations of one plot as markers, keeping the 
+        figures of many localizations fast to build and to display.
+        
+        When there are more than max_points localizations, their density, or a subset of them, 
+        is drawn instead, as decided from the arrays of the projection method before any trace 
+        is built, so that the markers of every localization are never given to Plotly. The 
+        density is binned with NumPy, as a Heatmap for the 2D plots, as built by the density 
+        method, and as the occupied voxels for the 3D plots, as built by the voxels method, so 
+        that the size of the figure only depends on the number of bins.
+        
+        Attributes:
+        columns: list ["X_XY", "Y_XY"] or ["X [nm]", "Y [nm]", "Z [nm]"], etc.
+            The columns of the coordinates of the localizations. A 3D plot is built when three 
+            columns are given.
+        errors: list [str or None, str or None]
+            The columns of the error bars along the X and Y axes of a 2D plot.
+        show_error: bool
+            True or False for showing the error bars.
+        max_points: None or int
+            The largest number of markers of the trace. If None is specified, every localization 
+            is drawn as a marker.
+        downsample: None or str "random", "stratified"
+            The decision to keep a subset of max_points localizations as markers, as chosen by 
+            the downsampled method, instead of drawing their density.
+        bins: int
+            The number of bins along each axis of the density.
+        seed: int
+            The seed of the random subset.
+        style:
+            The other attributes of the trace, such as the name and the marker.
+            
+        Return:
+            The Scatter or Scatter3d trace of the markers, or the Heatmap or Scatter3d trace of 
+            the density.
+        """
+        if (max_points is not None) and (downsample not in [None, "random", "stratified"]):
+            raise ValueError("The downsample should be either None, 'random' or 'stratified'.")
+        coordinates = [self.projection(c) for c in columns]
+        rows = slice(None)
+        if (max_points is not None) and (len(coordinates[0]) > max_points):
+            if downsample is None:
+                if len(coordinates) == 3:
+                    trace = self.voxels(*coordinates, style["marker"]["color"], bins=bins)
+                else:
+                    trace = self.density(*coordinates, style["marker"]["color"], bins=bins)
+                return trace.update(name=style.get("name"), showlegend=style.get("showlegend"))
+            rows = self.downsampled(coordinates, max_points, method=downsample, rng=numpy.random.default_rng(seed))
+        if len(coordinates) == 3:
+            return plotly.graph_objects.Scatter3d(x=coordinates[0][rows], y=coordinates[1][rows], z=coordinates[2][rows], 
+                                                  mode="markers", **style)
+        for axis, column in zip(["error_x", "error_y"], errors):
+            if column is not None:
+                style[axis] = dict(type='data', array=self.projection(column)[rows], visible=show_error, width=1, color="gray")
+        return plotly.graph_objects.Scatter(x=coordinates[0][rows], y=coordinates[1][rows], mode="markers", **style)
+    
+    @staticmethod
+    def downsampled(coordinates, max_points, method="random", rng=None):
+        """
+        A technique to choose a subset of at most max_points localizations to be drawn as markers.
+        
+        Attributes:
+        coordinates: list of array
+            The coordinates of the localizations along each axis.
+        max_points: int
+            The number of localizations kept.
+        method: str "random", "stratified"
+            The choice of the subset. If "random" is specified, the localizations are chosen 
+            uniformly. If "stratified" is specified, the localizations are binned in a coarse grid 
+            of about max_points/4 cells, and a share of every occupied cell is kept, with at 
+            least one localization, so that sparse regions remain visible. The localizations 
+            added by keeping one in the sparse cells are dropped from the largest cells. The 
+            localizations of each cell are chosen uniformly, by giving every localization a random 
+            key and keeping the smallest keys of each cell, so that only the few localizations 
+            whose key is small enough to be chosen are ever sorted.
+        rng: None or numpy.random.Generator
+            The random generator.
+            
+        Return:
+            The localizations kept, as an ordered integer array.
+        """
+        rng = numpy.random.default_rng() if rng is None else rng
+        n = len(coordinates[0])
+        if n <= max_points:
+            return numpy.arange(n)
+        if method == "random":
+            return numpy.sort(rng.choice(n, max_points, replace=False))
+        cells_per_axis = max(1, int((max_points/4)**(1/len(coordinates))))
+        cells = numpy.zeros(n, dtype=numpy.int64)
+        for c in coordinates:
+            c = numpy.nan_to_num(c)
+            low, high = c.min(), c.max()
+            step = (high-low)/cells_per_axis if high > low else 1
+            cells = cells*cells_per_axis+numpy.clip(((c-low)/step).astype(numpy.int64), 0, cells_per_axis-1)
+        counts = numpy.bincount(cells)
+        quota = numpy.where(counts > 0, numpy.maximum(1, numpy.floor(counts*max_points/n)), 0).astype(numpy.int64)
+        if quota.sum() > max_points:
+            ordered = numpy.sort(quota[quota > 0])
+            caps = numpy.arange(1, ordered[-1]+1)
+            below = numpy.searchsorted(ordered, caps, side="left")
+            total = numpy.concatenate([[0], numpy.cumsum(ordered)])[below]+caps*(len(ordered)-below)
+            cap = caps[numpy.searchsorted(total, max_points, side="right")-1]
+            extra = numpy.flatnonzero(quota > cap)
+            extra = extra[numpy.argsort(quota[extra], kind="stable")][:max_points-numpy.minimum(quota, cap).sum()]
+            quota = numpy.minimum(quota, cap)
+            quota[extra] += 1
+        key = rng.random(n)
+        share = numpy.minimum(1, (quota+3*numpy.sqrt(quota)+3)/numpy.maximum(counts, 1))
+        candidates = numpy.flatnonzero(key < share[cells])
+        short = numpy.bincount(cells[candidates], minlength=len(counts)) < quota
+        if short.any():
+            candidates = numpy.flatnonzero((key < share[cells]) | short[cells])
+        order = candidates[numpy.lexsort((key[candidates], cells[candidates]))]
+        found = numpy.bincount(cells[order], minlength=len(counts))
+        rank = numpy.arange(len(order))-numpy.repeat(numpy.cumsum(found)-found, found)
+        return numpy.sort(order[rank < quota[cells[order]]])
+    
+    @staticmethod
+    def histogram(coordinates, bins):
+        """
+        A technique to count the localizations in the bins of a regular grid spanning their 
+        positions, as the histogramdd function of NumPy with a number of bins, but with the bin of 
+        every localization computed directly from its position rather than searched for among 
+        the edges.
+        
+        As with NumPy, the last bin along each axis includes its upper edge, and an axis with a 
+        single position is given a range of one around it.
+        
+        Attributes:
+        coordinates: list of array
+            The finite coordinates of the localizations along each axis.
+        bins: int
+            The number of bins along each axis.
+            
+        Return:
+            The number of localizations of each bin as an array, and the list of the edges of 
+            the bins along each axis.
+        """
+        keys = numpy.zeros(len(coordinates[0]), dtype=numpy.int64)
+        all_edges = []
+        for c in coordinates:
+            low, high = (c.min(), c.max()) if len(c) else (0.0, 1.0)
+            if low == high:
+                low, high = low-0.5, high+0.5
+            edges = numpy.linspace(low, high, bins+1)
+            index = numpy.clip(((c-low)*(bins/(high-low))).astype(numpy.int64), 0, bins-1)
+            index[c < edges[index]] -= 1
+            index[(c >= edges[index+1]) & (index != bins-1)] += 1
+            keys = keys*bins+index
+            all_edges.append(edges)
+        counts = numpy.bincount(keys, minlength=bins**len(coordinates))
+        return counts.reshape((bins,)*len(coordinates)), all_edges
+    
+    @staticmethod
+    def density(x, y, color, bins=256):
+        """
+        A technique to draw the density of many localizations as an image, binned as described 
+        by the histogram method.
+        
+        Attributes:
+        x & y: array
+            The coordinates of the localizations.
+        color: str
+            The color of the densest bins. Empty bins are left transparent, so that the density 
+            of both orientations can be drawn on the same plot.
+        bins: int
+            The number of bins along each axis.
+            
+        Return:
+            The Heatmap trace of the density, with the logarithm of the number of localizations 
+            of each bin as the intensity.
+        """
+        x, y = numpy.asarray(x, dtype=float), numpy.asarray(y, dtype=float)
+        finite = numpy.isfinite(x) & numpy.isfinite(y)
+        counts, (x_edges, y_edges) = plotting.histogram([x[finite], y[finite]], bins)
+        z = numpy.where(counts > 0, numpy.log1p(counts), numpy.nan).T.astype(numpy.float32)
+        return plotly.graph_objects.Heatmap(z=z, x=((x_edges[:-1]+x_edges[1:])/2).astype(numpy.float32), 
+                                            y=((y_edges[:-1]+y_edges[1:])/2).astype(numpy.float32), 
+                                            colorscale=[[0, "rgba(255,255,255,0.2)"], [1, color]], 
+                                            showscale=False, opacity=0.7, hoverinfo="skip")
+    
+    @staticmethod
+    def voxels(x, y, z, color, bins=256):
+        """
+        A technique to draw the density of many 3D localizations as the occupied voxels of a 
+        grid, binned as described by the histogram method.
+        
+        Attributes:
+        x & y & z: array
+            The coordinates of the localizations.
+        color: str
+            The color of the densest voxels.
+        bins: int
+            The number of bins along each axis of a 2D density. The grid has bins**(2/3) voxels 
+            along each axis, so that it has as many voxels as a 2D density has bins.
+            
+        Return:
+            The Scatter3d trace of the centers of the occupied voxels, with the logarithm of the 
+            number of localizations of each voxel as the intensity.
+        """
+        coordinates = numpy.column_stack([numpy.asarray(a, dtype=float) for a in (x, y, z)])
+        coordinates = coordinates[numpy.isfinite(coordinates).all(axis=1)]
+        counts, edges = plotting.histogram(list(coordinates.T), max(1, int(round(bins**(2/3)))))
+        occupied = numpy.nonzero(counts)
+        centers = [((e[:-1]+e[1:])/2)[i].astype(numpy.float32) for e, i in zip(edges, occupied)]
+        return plotly.graph_objects.Scatter3d(x=centers[0], y=centers[1], z=centers[2], mode="markers", 
+                                              marker=dict(size=2, color=numpy.log1p(counts[occupied]).astype(numpy.float32), 
+                                                          colorscale=[[0, "rgba(255,255,255,0.2)"], [1, color]]), 
+                                              hoverinfo="skip")
@@ -10,9 +10,9 @@ class precision(object):
         
     source: https://github.com/SierraD/Multi-Orientation-Maxwell
     
-    Last Updated: Sept 26 2024
+    Last Updated: Oct 17 2026
     """
-    def __init__(self, data, data_type="Uncertainty XY [nm]",):
+    def __init__(self, data, data_type="Uncertainty XY [nm]", bin_width=None):
         """
         A technique to automatically obtain the precision of the method. 
         
@@ -25,28 +25,63 @@ class precision(object):
         (i.e. Normal, Chi2, Exponential, etc.), then the best fit is selected by minimizing 
         the Sum of the Square Error between the histogram and the PDF.
         
+        For very large datasets, the precision can also be obtained from the histograms of the 
+        Histograms.py class, which can be counted one chunk, file or tile at a time. Only the 
+        counts of the bins are then kept, and the distributions are fitted to the histogram.
+        
         
         Attributes:
         data: 
-            The data previously developed and contained within the filtering class.
+            The data previously developed and contained within the filtering class, or the 
+            histograms of the Histograms.py class.
+        data_type: str "Uncertainty XY [nm]", "Uncertainty Z [nm]", "Sigma XY [nm]", "Sigma Z [nm]", etc.
+            The data to be used for the histogram and the fitting.
+        bin_width: None or num
+            The width of the bins in nm. If specified, the data is counted into a histogram, 
+            as with the Histograms.py class, and only the histogram is kept.
  
         Return:
             None. Will modify the data established in place.
         """
         self.data = data
         self.data_type = data_type
-        self.points = self.data.points
-        self.height = data.points[data_type].values
+        if (bin_width is not None) and not isinstance(data, histograms):
+            data = histograms([data_type], bin_width=bin_width).add(data)
+        if isinstance(data, histograms):
+            self.points = None
+            self.height = None
+            self.lower, self.counts = data.histogram(data_type)
+            self.bin_width = data.bin_width
+            if self.counts.sum() == 0:
+                raise ValueError("The histogram of '"+data_type+"' should not be empty.")
+        else:
+            self.points = self.data.points
+            self.height = data.points[data_type].values
+            self.lower = None
+            self.counts = None
+            self.bin_width = None
         self.best_fit = "norm"
+        self.fitted_params = {}
         return
     
-    def get_precision(self, distribution=fitter.get_common_distributions()):
+    def get_precision(self, distribution=fitter.get_common_distributions(), n_workers=1, subsample=10000, 
+                      n_best=5, bins=100, seed=0, plot=True, verbose=True):
         """
         A technique to generate a histogram from specified data, and compare with PDF fittings from 
         known distributions. 
         
         A plot of the data is automatically generated, and up to five PDF distributions, selected 
         by minizming the Sum of the Square Error, are plotted in conjunction.
+        
+        As with the Fitter of the fitter package, every distribution is fitted to the data by the 
+        fit method of scipy.stats, and is compared with the density histogram of the data. When 
+        many distributions are compared on a large dataset, they are first fitted to a random 
+        subsample of the data, and only the n_best distributions are fitted to the full dataset. 
+        The fitted parameters are kept, so that the fitted_precision method does not fit them again.
+        
+        When the data is a histogram, every distribution is fitted to the counts of its bins, as 
+        described by the fit_histogram method, and is compared with the same density histogram, 
+        obtained by merging the bins.
                 
         Attributes:
         data: str "Uncertainty XY [nm]", "Uncertainty Z [nm]", "Sigma XY [nm]", "Sigma Z [nm]", etc.
@@ -54,18 +89,307 @@ class precision(object):
         distribution: str "norm", "lognorm", get_common_distributions(), get_distributions(), etc.
             The type of distribution to be used for the fitting.
             If none specified, all common distributions (10) will be compared.
+        n_workers: int
+            The number of distributions fitted at the same time, each in its own process.
+        subsample: None or int
+            The number of values used to select the n_best distributions before the full fitting. 
+            If None is specified, or the data is not larger, every distribution is fitted to the 
+            full dataset.
+        n_best: int
+            The number of distributions fitted to the full dataset after the selection.
+        bins: int
+            The number of bins of the histogram compared with each distribution.
+        seed: int
+            The seed of the random subsample.
+        plot: bool
+            The decision to plot the histogram and the five best PDF distributions.
+        verbose: bool
+            The decision to print the comparison of the five best distributions and the best fit.
             
         Return:
-            None. Will modify the data established in place.
+            None. Will modify the data established in place, with the comparison of the 
+            distributions saved as the fits dataframe, their parameters as fitted_params, and 
+            the position of the peak of the best fit, as found by the peak method, as sigma.
         """
-        fit = fitter.Fitter(self.height, distributions=distribution)
-        fit.fit()
-        print(fit.summary())
-        self.best_fit = list(fit.get_best().keys())[0]
-        print("\nBest Fit Selected: ", self.best_fit)
+        import warnings
+        candidates = [distribution] if isinstance(distribution, str) else list(distribution)
+        if self.counts is not None:
+            self.fits = self.fit_histogram(candidates, self.lower, self.counts, self.bin_width, bins=bins)
+        else:
+            height = numpy.asarray(self.height, dtype=float)
+            if (subsample is not None) and (len(height) > subsample) and (len(candidates) > n_best):
+                sample = numpy.random.default_rng(seed).choice(height, subsample, replace=False)
+                pruned = self.fit_distributions(candidates, sample, bins=bins, n_workers=n_workers)
+                candidates = list(pruned.index[:n_best])
+            self.fits = self.fit_distributions(candidates, height, bins=bins, n_workers=n_workers)
+        self.fitted_params.update({d: p for d, p in self.fits["params"].items() if p is not None})
+        self.best_fit = self.fits.index[0]
+        if verbose:
+            print(self.fits.drop(columns="params").head(5))
+            print("\nBest Fit Selected: ", self.best_fit)
+        if self.best_fit in self.fitted_params:
+            self.sigma = self.peak(self.best_fit)[0]
+        if plot:
+            edges, y = self.density(bins)
+            x = (edges[:-1]+edges[1:])/2
+            matplotlib.pyplot.stairs(y, edges, fill=True)
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                for d in self.fits.index[:5]:
+                    if self.fits["params"][d] is not None:
+                        matplotlib.pyplot.plot(x, getattr(scipy.stats, d).pdf(x, *self.fits["params"][d]), lw=2, label=d)
+            matplotlib.pyplot.legend()
         return self
     
-    def fitted_precision(self, kde=False, bins=30, distribution=False):
+    @staticmethod
+    def fit_distributions(distributions, height, bins=100, n_workers=1):
+        """
+        A technique to fit many distributions to the same data, either in this process or in a 
+        pool of processes.
+        
+        When processes are used, the data is written once to a memory-mapped file in a temporary 
+        folder, rather than being sent to every process, as in the parallel method of the 
+        Overlap.py class.
+        
+        Attributes:
+        distributions: list of str "norm", "lognorm", etc.
+            The distributions of scipy.stats to be fitted.
+        height: array
+            The data.
+        bins: int
+            The number of bins of the density histogram compared with each distribution.
+        n_workers: int
+            The number of processes.
+            
+        Return:
+            The dataframe of the fitted distributions, ordered by their Sum of the Square Error, 
+            with the fitted parameters as the params column.
+        """
+        y, edges = numpy.histogram(height, bins=bins, density=True)
+        x = (edges[:-1]+edges[1:])/2
+        if (n_workers <= 1) or (len(distributions) <= 1):
+            results = [precision.fit_distribution(d, height, x, y) for d in distributions]
+        else:
+            import concurrent.futures
+            import multiprocessing
+            import os
+            import tempfile
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("fork" if "fork" in methods else None)
+            with tempfile.TemporaryDirectory() as directory:
+                filename = os.path.join(directory, "height.npy")
+                numpy.save(filename, height)
+                with concurrent.futures.ProcessPoolExecutor(max_workers=n_workers, mp_context=context) as pool:
+                    futures = [pool.submit(precision.fit_distribution, d, filename, x, y) for d in distributions]
+                    results = [f.result() for f in futures]
+        fits = pandas.DataFrame(results, index=distributions, columns=["sumsquare_error", "aic", "bic", "kl_div",
+                                                                       "ks_statistic", "ks_pvalue", "params"])
+        return fits.sort_values("sumsquare_error", kind="stable")
+    
+    @staticmethod
+    def fit_distribution(distribution, height, x, y):
+        """
+        A technique to fit a single distribution to the data, and compare its PDF with the 
+        density histogram of the data, with the same criteria as the Fitter of the fitter package.
+        
+        Attributes:
+        distribution: str "norm", "lognorm", etc.
+            The distribution of scipy.stats to be fitted.
+        height: array or str
+            The data, or the file in which it was saved.
+        x & y: array
+            The centers and the densities of the bins of the histogram.
+            
+        Return:
+            The Sum of the Square Error, the AIC, the BIC, the Kullback-Leibler divergence, the 
+            Kolmogorov-Smirnov statistic and p-value, and the fitted parameters. A distribution 
+            which cannot be fitted has an infinite error and no parameters.
+        """
+        import warnings
+        if isinstance(height, str):
+            height = numpy.load(height, mmap_mode="r")
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            try:
+                dist = getattr(scipy.stats, distribution)
+                params = dist.fit(height)
+                pdf = dist.pdf(x, *params)
+                sse = numpy.sum((pdf-y)**2)
+                log_likelihood = numpy.sum(dist.logpdf(height, *params))
+                aic = 2*len(params)-2*log_likelihood
+                bic = len(params)*numpy.log(len(height))-2*log_likelihood
+                kl_div = scipy.stats.entropy(pdf+1e-10, y+1e-10)
+                ks_statistic, ks_pvalue = scipy.stats.kstest(height, distribution, args=params)
+            except Exception:
+                return [numpy.inf, numpy.inf, numpy.inf, numpy.inf, numpy.inf, 0.0, None]
+        if not numpy.isfinite(sse):
+            sse = numpy.inf
+        return [sse, aic, bic, kl_div, ks_statistic, ks_pvalue, tuple(float(p) for p in params)]
+    
+    @staticmethod
+    def fit_histogram(distributions, lower, counts, bin_width, bins=100):
+        """
+        A technique to fit many distributions to a histogram, with a cost which only depends on 
+        the number of bins which are not empty.
+        
+        Each distribution is first fitted by the fit method of scipy.stats to a sample of at most 
+        10000 values, placed at evenly spaced quantiles of the histogram, and its parameters are 
+        then refined by maximizing the likelihood of the counts of the bins. As with the 
+        fit_distribution method, it is compared with the density histogram of the data, obtained 
+        by merging the bins as described by the rebinned method.
+        
+        Attributes:
+        distributions: list of str "norm", "lognorm", etc.
+            The distributions of scipy.stats to be fitted.
+        lower: array
+            The lower edges of the bins which are not empty, in increasing order.
+        counts: array of int
+            The counts of these bins.
+        bin_width: num
+            The width of the bins.
+        bins: int
+            The number of bins of the density histogram compared with each distribution.
+            
+        Return:
+            The dataframe of the fitted distributions, ordered by their Sum of the Square Error, 
+            with the fitted parameters as the params column.
+        """
+        import warnings
+        filled = numpy.asarray(counts) > 0
+        lower, counts = numpy.asarray(lower, dtype=float)[filled], numpy.asarray(counts)[filled]
+        upper = lower+bin_width
+        total = counts.sum()
+        cumulative = numpy.cumsum(counts)
+        n_sample = int(min(total, 10000))
+        sample = (lower+bin_width/2)[numpy.searchsorted(cumulative, (numpy.arange(n_sample)+0.5)/n_sample*total)]
+        coarse, y = precision.rebinned(lower, counts, bin_width, bins)
+        x = (coarse[:-1]+coarse[1:])/2
+        results = []
+        for d in distributions:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                try:
+                    dist = getattr(scipy.stats, d)
+                    
+                    def negative_log_likelihood(params):
+                        probability = dist.cdf(upper, *params)-dist.cdf(lower, *params)
+                        if not numpy.all(numpy.isfinite(probability)):
+                            return numpy.inf
+                        return -numpy.sum(counts*numpy.log(numpy.maximum(probability, 1e-300)))
+                    
+                    start = numpy.asarray(dist.fit(sample), dtype=float)
+                    refined = scipy.optimize.minimize(negative_log_likelihood, start, method="Nelder-Mead",
+                                                      options={"maxiter": 200*len(start), "xatol": 1e-8, "fatol": 1e-8})
+                    params = refined.x if refined.fun < negative_log_likelihood(start) else start
+                    pdf = dist.pdf(x, *params)
+                    sse = numpy.sum((pdf-y)**2)
+                    log_likelihood = -negative_log_likelihood(params)-total*numpy.log(bin_width)
+                    aic = 2*len(params)-2*log_likelihood
+                    bic = len(params)*numpy.log(total)-2*log_likelihood
+                    kl_div = scipy.stats.entropy(pdf+1e-10, y+1e-10)
+                    ks_statistic = max(numpy.max(numpy.abs(dist.cdf(lower, *params)-(cumulative-counts)/total)),
+                                       numpy.max(numpy.abs(dist.cdf(upper, *params)-cumulative/total)))
+                    ks_pvalue = scipy.stats.kstwo.sf(ks_statistic, total)
+                except Exception:
+                    results.append([numpy.inf, numpy.inf, numpy.inf, numpy.inf, numpy.inf, 0.0, None])
+                    continue
+            if not numpy.isfinite(sse):
+                sse = numpy.inf
+            results.append([sse, aic, bic, kl_div, ks_statistic, ks_pvalue, tuple(float(p) for p in params)])
+        fits = pandas.DataFrame(results, index=distributions, columns=["sumsquare_error", "aic", "bic", "kl_div",
+                                                                       "ks_statistic", "ks_pvalue", "params"])
+        return fits.sort_values("sumsquare_error", kind="stable")
+    
+    @staticmethod
+    def rebinned(lower, counts, bin_width, bins=100):
+        """
+        A technique to merge the bins of a histogram into a density histogram of the given number 
+        of bins, spanning the bins which are not empty, as returned by numpy.histogram for the 
+        values themselves. Each bin is merged whole into the bin containing its center.
+        
+        Attributes:
+        lower: array
+            The lower edges of the bins which are not empty, in increasing order.
+        counts: array of int
+            The counts of these bins.
+        bin_width: num
+            The width of the bins.
+        bins: int
+            The number of merged bins.
+            
+        Return:
+            The edges and the densities of the merged bins.
+        """
+        merged = numpy.linspace(lower[0], lower[-1]+bin_width, bins+1)
+        which = numpy.clip(numpy.searchsorted(merged, lower+bin_width/2, side="right")-1, 0, bins-1)
+        density = numpy.bincount(which, weights=counts, minlength=bins)/(numpy.sum(counts)*numpy.diff(merged))
+        return merged, density
+    
+    def density(self, bins=100):
+        """
+        A technique to obtain the density histogram of the data, either from its values or by 
+        merging the bins of its histogram.
+        
+        Attributes:
+        bins: int
+            The number of bins.
+            
+        Return:
+            The edges and the densities of the bins.
+        """
+        if self.counts is not None:
+            return self.rebinned(self.lower, self.counts, self.bin_width, bins)
+        height = numpy.asarray(self.height, dtype=float)
+        density, edges = numpy.histogram(height[numpy.isfinite(height)], bins=bins, density=True)
+        return edges, density
+    
+    def limits(self):
+        """
+        A technique to obtain the range over which the PDF is drawn and its peak is found: the 
+        range of the data, with the margins of a Matplotlib plot.
+        
+        Attributes:
+            None.
+            
+        Return:
+            The lower and upper limits in nm.
+        """
+        if self.counts is not None:
+            low, high = self.lower[0], self.lower[-1]+self.bin_width
+        else:
+            low, high = numpy.nanmin(self.height), numpy.nanmax(self.height)
+        margin = 0.05*(high-low)
+        return low-margin, high+margin
+    
+    def peak(self, distribution):
+        """
+        A technique to find the position of the peak of a fitted PDF, which is reported as the 
+        precision (σ) of the method.
+        
+        The PDF is first evaluated at 1001 evenly spaced positions over the range given by the 
+        limits method, and the peak is then found by a bounded optimization between the 
+        neighbours of the highest position, so that its position does not depend on the 
+        spacing of the positions, nor on any plot.
+        
+        Attributes:
+        distribution: str "norm", "lognorm", etc.
+            A distribution fitted by the get_precision or fitted_precision methods.
+            
+        Return:
+            The position of the peak in nm, and the value of the PDF at the peak.
+        """
+        dist = getattr(scipy.stats, distribution)
+        params = self.fitted_params[distribution]
+        low, high = self.limits()
+        positions = numpy.linspace(low, high, 1001)
+        i = int(numpy.argmax(numpy.nan_to_num(dist.pdf(positions, *params), nan=-numpy.inf, posinf=numpy.inf)))
+        result = scipy.optimize.minimize_scalar(lambda v: -dist.pdf(v, *params), method="bounded",
+                                                bounds=(positions[max(i-1, 0)], positions[min(i+1, len(positions)-1)]),
+                                                options={"xatol": max(1e-9*(high-low), 1e-12)})
+        position = result.x if -result.fun >= dist.pdf(positions[i], *params) else positions[i]
+        return float(position), float(dist.pdf(position, *params))
+    
+    def fitted_precision(self, kde=False, bins=30, distribution=False, filename=None, show=True):
         """
         A technique to automatically obtain the precision of data using either the determined or 
         specified best fit from known distributions. 
@@ -73,46 +397,76 @@ class precision(object):
         A plot of the data is automatically generated, with the specified PDF plotted in 
         conjunction, in addition to displaying useful values related to method precision.
         
+        The parameters of a distribution already fitted by the get_precision method are reused. 
+        The PDF is drawn over the range given by the limits method, and its peak is found by the 
+        peak method.
+        
         Attributes:
         kde: bool 
-            The decision to also display the Kernel Density Estimation (KDE) of the histogram.
+            The decision to also display the Kernel Density Estimation (KDE) of the histogram. 
+            It is not available when the data is a histogram.
         bins: int
             The number of bins to be used for the final histogram.
         distribution: False or str "norm", "lognorm", etc.
             Eiter False, which will automatically use the best fit determined by the 
             'get_precision' method, or a string specifying the known distribution to 
             perform a PDF comparison with.
-
+        filename: None or str "Precision.png", "Precision.svg", "Precision.pdf", etc.
+            The file to which the figure is written, with the format given by its extension.
+        show: bool
+            The decision to display the figure. If False, the figure is made without the pyplot 
+            interface, so that no display is needed, and is returned.
+        
         Return:
-            A plot displaying the histogram and important variables.
+            A plot displaying the histogram and important variables, or the figure if show is False.
         """
         if distribution == False:
             distribution = self.best_fit
         else: 
             distribution = distribution
         
-        fit = fitter.Fitter(self.height, distributions=distribution)
-        fit.fit()
-        fit.summary()
-        xmin, xmax = matplotlib.pyplot.xlim()
-        self.Xaxis = numpy.linspace(xmin, xmax, 1000)
+        if distribution not in self.fitted_params:
+            if self.counts is not None:
+                fits = self.fit_histogram([distribution], self.lower, self.counts, self.bin_width)
+            else:
+                fits = self.fit_distributions([distribution], numpy.asarray(self.height, dtype=float))
+            if fits["params"][distribution] is None:
+                raise ValueError("The '"+distribution+"' distribution could not be fitted to the data.")
+            self.fitted_params[distribution] = fits["params"][distribution]
+        low, high = self.limits()
+        self.Xaxis = numpy.linspace(low, high, 1000)
         
-        params = list(fit.fitted_param[distribution]) 
+        params = list(self.fitted_params[distribution]) 
         best_fitted = eval("scipy.stats." + distribution)
         fitting = best_fitted.pdf(self.Xaxis, *params)
         
-        fig0, ax0 = matplotlib.pyplot.subplots(figsize=(10,5))
+        if show:
+            fig0, ax0 = matplotlib.pyplot.subplots(figsize=(10,5))
+        else:
+            fig0 = matplotlib.figure.Figure(figsize=(10,5))
+            ax0 = fig0.subplots()
         ax0.set_title("Precision Analysis")
         ax0.set_ylabel("Density")
         ax0.set_xlabel(self.data_type)
-        seaborn.histplot(x=self.points[self.data_type], ax=ax0, stat="density", kde=kde, bins=bins, linewidth=0.5, 
-                     label=("N="+str(len(self.points[self.data_type]))), 
-                     line_kws={'label': "Kernel Density Estimation (KDE) Fitting"})
+        if self.counts is not None:
+            edges, density = self.density(bins)
+            ax0.stairs(density, edges, fill=True, alpha=0.75, edgecolor="black", linewidth=0.5,
+                       label=("N="+str(int(self.counts.sum()))))
+        else:
+            seaborn.histplot(x=self.points[self.data_type], ax=ax0, stat="density", kde=kde, bins=bins, linewidth=0.5, 
+                         label=("N="+str(len(self.points[self.data_type]))), 
+                         line_kws={'label': "Kernel Density Estimation (KDE) Fitting"})
         ax0.plot(self.Xaxis, fitting, color="red", linestyle="dashed", 
                  label="Probability Density Function (PDF) Fitting")
-        a = round(self.Xaxis[numpy.where(fitting == fitting.max())][0], 4)
-        b = round(fitting[numpy.where(fitting == fitting.max())][0], 4)
+        self.sigma, peak = self.peak(distribution)
+        a = round(self.sigma, 4)
+        b = round(peak, 4)
         ax0.scatter(a, b, color="red", label=("σ = "+str(a)+" [nm]"))
         ax0.legend()
-        matplotlib.pyplot.show()
-        return self
+        self.figure = fig0
+        if filename is not None:
+            fig0.savefig(filename, bbox_inches="tight")
+        if show:
+            matplotlib.pyplot.show()
+            return self
+        return fig0
@@ -10,7 +10,7 @@ class preparation(object):
         
     source: https://github.com/SierraD/Multi-Orientation-Maxwell
     
-    Last Updated: Sept 26 2024
+    Last Updated: Oct 17 2026
     """
     def __init__(self):
         """
@@ -35,10 +35,17 @@ class preparation(object):
         
         return 
     
-    def setting(self, file_xy, file_xz, magnification=20, pixelsize_xy=230, pixelsize_xz=13, TS_dims = 2):
+    def setting(self, file_xy, file_xz, magnification=20, pixelsize_xy=230, pixelsize_xz=13, TS_dims = 2, 
+                chunksize=None, dtype=numpy.float64, limits=None, cache=None):
         """
         A technique to download two different orientation two-dimensional ThunderSTORM analysis files
         and correct the scale from pixel size to nanometers.
+        
+        For very large results tables, the files can be streamed in chunks, in which case only the 
+        columns used by the method are read, with an explicit data type, and the scaling and the 
+        limits are applied to each chunk as it is read. The raw ThunderSTORM tables are then not kept, 
+        and every chunk is written into arrays memory-mapped from temporary files, as described by 
+        the allocate method, so that the prepared data is never held in memory as a whole.
                 
         Attributes:
         file_xy & file_xz: str "XY_File.csv", "XZ_File.csv", etc.
@@ -58,63 +65,379 @@ class preparation(object):
             The number of positional dimensions specified in ThunderSTORM using the Z-stage Offset Menu. 
             If the third dimension was previously specified with correct Z step, no voxel adjustments will 
             be made.
+        chunksize: None or int
+            The number of rows read at once when streaming the files. If not specified, the files will 
+            be read whole, and the raw tables will be kept as df_xy and df_xz.
+        dtype: numpy.float64, numpy.float32, etc.
+            The data type of the columns read when streaming the files. The frame column is read as 
+            integers when TS_dims is 2.
+        limits: None or list [("X", 15000, "less"), ("X", -15000, "more"), etc.]
+            The limits applied to the scaled data as it is read, in the same form as the limiting 
+            method. As the data has not yet been centered, the limits are in the original positions.
+        cache: None or cache
+            A cache, as defined by the Cache.py class, in which the prepared dataframes are stored. 
+            If the same files have already been prepared with the same parameters, the dataframes 
+            will be memory-mapped from the cache instead of being read from the files, and the 
+            following steps which modify them will also write them into temporary files. The following 
+            steps of the method will also store their results in this cache.
             
         Return:
             None. Will modify the data established in place.
         """
+        import tempfile
         self.name_xy = file_xy
         self.name_xz = file_xz
         self.xypix = pixelsize_xy
         self.zpix = pixelsize_xz
         self.magnification = magnification
-        self.df_xy = pandas.read_csv(self.name_xy)
-        self.df_xz = pandas.read_csv(self.name_xz)
-        self.dfxy = pandas.concat([self.df_xy["x [nm]"]*self.xypix,
-                               self.df_xy["y [nm]"]*self.xypix,
-                               self.df_xy["uncertainty [nm]"]*self.xypix,
-                               self.df_xy["intensity [photon]"],
-                               self.df_xy["offset [photon]"],
-                               self.df_xy["bkgstd [photon]"],
-                               self.df_xy["sigma [nm]"]*self.xypix], 
-                               keys=["X_XY", "Y_XY", "U_XY", "I_XY", "O_XY", "B_XY", "S_XY"], axis=1)
-        self.dfxz = pandas.concat([self.df_xz["x [nm]"]*self.xypix, 
-                               self.df_xz["y [nm]"]*self.zpix,
-                               self.df_xz["uncertainty [nm]"]*self.xypix, 
-                               self.df_xz["uncertainty [nm]"]*self.zpix, 
-                               self.df_xz["intensity [photon]"],
-                               self.df_xz["offset [photon]"],
-                               self.df_xz["bkgstd [photon]"],
-                               self.df_xz["sigma [nm]"]*self.xypix, 
-                               self.df_xz["sigma [nm]"]*self.zpix], 
-                               keys=["X_XZ", "Z_XZ", "U_X", "U_Z","I_XZ", "O_XZ", "B_XZ", "S_X", "S_Z"], axis=1)
-        if TS_dims == 2:
-            self.dfxy.insert(2, "Z_XY", (self.df_xy["frame"]*self.zpix))
-            self.dfxz.insert(1, "Y_XZ", (self.df_xz["frame"]*self.xypix))
-        elif TS_dims == 3:
-            self.dfxy.insert(2, "Z_XY", self.df_xy["frame"])
-            self.dfxz.insert(1, "Y_XZ", self.df_xz["frame"])
+        self.cache = cache
+        self.scratch = None
+        if cache is not None:
+            self.cache_key = cache.key(self.name_xy, self.name_xz, pixelsize_xy=pixelsize_xy, 
+                                       pixelsize_xz=pixelsize_xz, TS_dims=TS_dims, limits=limits, 
+                                       dtype=(None if chunksize is None else numpy.dtype(dtype).name))
+            if cache.exists(self.cache_key, "preparation_xy") and cache.exists(self.cache_key, "preparation_xz"):
+                self.df_xy = None
+                self.df_xz = None
+                self.dfxy = cache.load(self.cache_key, "preparation_xy")
+                self.dfxz = cache.load(self.cache_key, "preparation_xz")
+                self.scratch = tempfile.TemporaryDirectory()
+                self.xy_len = len(self.dfxy)
+                self.xz_len = len(self.dfxz)
+                return self
+        if chunksize is None:
+            self.df_xy = pandas.read_csv(self.name_xy)
+            self.df_xz = pandas.read_csv(self.name_xz)
+            self.store(self.within(self.scaled(self.df_xy, "XY", TS_dims), "XY", limits), 
+                       self.within(self.scaled(self.df_xz, "XZ", TS_dims), "XZ", limits))
+        else:
+            self.df_xy = None
+            self.df_xz = None
+            columns = ["frame", "x [nm]", "y [nm]", "sigma [nm]", "intensity [photon]", 
+                       "offset [photon]", "bkgstd [photon]", "uncertainty [nm]"]
+            dtypes = {c: dtype for c in columns}
+            if TS_dims == 2:
+                dtypes["frame"] = numpy.int64
+            self.scratch = tempfile.TemporaryDirectory()
+            arrays = []
+            for orientation, name in [("XY", self.name_xy), ("XZ", self.name_xz)]:
+                values = self.allocate(orientation, self.lines(name), numpy.result_type(numpy.float16, dtype))
+                rows = 0
+                for chunk in pandas.read_csv(name, usecols=columns, dtype=dtypes, chunksize=chunksize):
+                    part = self.within(self.scaled(chunk, orientation, TS_dims), orientation, limits)
+                    values[:, rows:rows+part.shape[1]] = part
+                    rows += part.shape[1]
+                arrays.append(values[:, :rows])
+            self.store(*arrays)
+        if cache is not None:
+            cache.store(self.cache_key, "preparation_xy", self.dfxy)
+            cache.store(self.cache_key, "preparation_xz", self.dfxz)
         self.xy_len = len(self.dfxy)
         self.xz_len = len(self.dfxz)
         return self
     
+    @staticmethod
+    def lines(filename):
+        """
+        A technique to count the lines of a file in blocks, as an upper bound on the number of 
+        localizations of a ThunderSTORM results table, without parsing it.
+        
+        Attributes:
+        filename: str
+            The name of the file.
+            
+        Return:
+            The number of line breaks of the file as an int.
+        """
+        count = 0
+        with open(filename, "rb") as f:
+            for block in iter(lambda: f.read(2**24), b""):
+                count += block.count(b"\n")
+        return count
+    
+    def allocate(self, orientation, rows, dtype):
+        """
+        A technique to allocate the array of scaled values of one orientation. Once the files are 
+        streamed in chunks, or the prepared data is memory-mapped from a cache, the array is 
+        memory-mapped from a new temporary .npy file, so that filling it, centering it or keeping 
+        some of its localizations does not hold the data in memory. The temporary files are removed 
+        with the preparation.
+        
+        Attributes:
+        orientation: str "XY", "XZ"
+            The orientation of the values.
+        rows: int
+            The number of localizations.
+        dtype: numpy.float64, numpy.float32, etc.
+            The data type of the values.
+            
+        Return:
+            The array of shape (columns, localizations), which is not initialized.
+        """
+        import os
+        shape = (len(self.columns(orientation)), rows)
+        if getattr(self, "scratch", None) is None:
+            return numpy.empty(shape, dtype=dtype)
+        filename = os.path.join(self.scratch.name, orientation+"_"+str(len(os.listdir(self.scratch.name)))+".npy")
+        values = numpy.lib.format.open_memmap(filename, mode="w+", dtype=dtype, shape=(shape[0], max(rows, 1)))
+        return values[:, :rows]
+    
+    def scaled(self, df, orientation, TS_dims=2):
+        """
+        A technique to gather the columns of a ThunderSTORM results table into one contiguous float 
+        array, with one row for each column of the prepared dataframe, and correct their scale from 
+        pixel size to nanometers in a single operation.
+        
+        Attributes:
+        df: dataframe
+            The ThunderSTORM results table, or a chunk of it.
+        orientation: str "XY", "XZ"
+            The orientation of the table.
+        TS_dims: 2 or 3
+            The number of positional dimensions specified in ThunderSTORM, as used by the setting method.
+            
+        Return:
+            The scaled values as a float array of shape (columns, localizations).
+        """
+        if (TS_dims != 2) and (TS_dims != 3):
+            raise ValueError("The number of ThunderSTORM dimensions should be either 2 or 3.")
+        if orientation == "XY":
+            sources = ["x [nm]", "y [nm]", "frame", "uncertainty [nm]", "intensity [photon]", 
+                       "offset [photon]", "bkgstd [photon]", "sigma [nm]"]
+            scale = [self.xypix, self.xypix, self.zpix if TS_dims == 2 else 1, self.xypix, 1, 1, 1, self.xypix]
+        else:
+            sources = ["x [nm]", "frame", "y [nm]", "uncertainty [nm]", "uncertainty [nm]", "intensity [photon]", 
+                       "offset [photon]", "bkgstd [photon]", "sigma [nm]", "sigma [nm]"]
+            scale = [self.xypix, self.xypix if TS_dims == 2 else 1, self.zpix, self.xypix, self.zpix, 1, 1, 1, 
+                     self.xypix, self.zpix]
+        dtype = numpy.result_type(numpy.float16, *[df[c].dtype for c in sources if c != "frame"])
+        values = numpy.empty((len(sources), len(df)), dtype=dtype)
+        for i, c in enumerate(sources):
+            values[i] = df[c].to_numpy()
+        values *= numpy.asarray(scale, dtype=dtype)[:, None]
+        return values
+    
+    @staticmethod
+    def columns(orientation):
+        """
+        A technique to obtain the names of the columns of the prepared dataframe of one orientation.
+        
+        Attributes:
+        orientation: str "XY", "XZ"
+            The orientation of the dataframe.
+            
+        Return:
+            The names of the columns as a list of str.
+        """
+        if orientation == "XY":
+            return ["X_XY", "Y_XY", "Z_XY", "U_XY", "I_XY", "O_XY", "B_XY", "S_XY"]
+        return ["X_XZ", "Y_XZ", "Z_XZ", "U_X", "U_Z", "I_XZ", "O_XZ", "B_XZ", "S_X", "S_Z"]
+    
+    def frame(self, values, orientation):
+        """
+        A technique to view a contiguous array of scaled values as a prepared dataframe, without 
+        copying the values.
+        
+        Attributes:
+        values: array (columns, localizations)
+            The scaled values, as returned by the scaled method.
+        orientation: str "XY", "XZ"
+            The orientation of the values.
+            
+        Return:
+            The dataframe, whose columns share the memory of the array.
+        """
+        return pandas.DataFrame(values.T, columns=self.columns(orientation), copy=False)
+    
+    def store(self, values_xy, values_xz):
+        """
+        A technique to keep the scaled values of both orientations, and view them as the prepared 
+        dataframes dfxy and dfxz. The version of the prepared data is increased, so that the stores 
+        of pairs (Localizations.py) found before can tell that the data has changed.
+        
+        Attributes:
+        values_xy & values_xz: array (columns, localizations)
+            The scaled values of each orientation.
+            
+        Return:
+            None. Will modify the data established in place.
+        """
+        self.values_xy = values_xy
+        self.values_xz = values_xz
+        self.version = getattr(self, "version", 0)+1
+        self.dfxy = self.frame(values_xy, "XY")
+        self.dfxz = self.frame(values_xz, "XZ")
+        return self
+    
+    def within(self, values, orientation, limits):
+        """
+        A technique to remove the localizations of an array of scaled values which fall outside 
+        of a list of limits.
+        
+        Attributes:
+        values: array (columns, localizations)
+            The scaled values of one orientation.
+        orientation: str "XY", "XZ"
+            The orientation of the values.
+        limits: None or list [("X", 15000, "less"), etc.]
+            The axis, limit and direction of each limit, as used by the limiting method.
+            
+        Return:
+            The values of the localizations within the limits.
+        """
+        if not limits:
+            return values
+        return values[:, self.bounded(self.frame(values, orientation), orientation, limits)]
+    
+    def contiguous(self, keep_xy=None, keep_xz=None, block=2**20):
+        """
+        A technique to ensure that the prepared dataframes are views of one contiguous float array 
+        per orientation, which can then be modified in place, optionally keeping only some of the 
+        localizations.
+        
+        The arrays are only gathered again from the dataframes when they no longer match, such as 
+        when the dataframes have been memory-mapped from a cache, or replaced by another class, or 
+        when some of the localizations are removed. They are then gathered in blocks into a new 
+        array, as returned by the allocate method, so that memory-mapped data is not copied into 
+        memory.
+        
+        Attributes:
+        keep_xy & keep_xz: None or array of bool
+            The localizations to be kept from each orientation. If not specified, all are kept.
+        block: int
+            The number of localizations copied at once.
+            
+        Return:
+            The arrays of scaled values of both orientations.
+        """
+        arrays = []
+        for orientation, df, values, keep in [("XY", self.dfxy, getattr(self, "values_xy", None), keep_xy), 
+                                              ("XZ", self.dfxz, getattr(self, "values_xz", None), keep_xz)]:
+            names = self.columns(orientation)
+            backed = ((values is not None) and (list(df.columns) == names) and 
+                      (values.shape == (len(names), len(df))) and values.flags.writeable and 
+                      numpy.may_share_memory(values[0], df[names[0]].to_numpy()) and 
+                      numpy.may_share_memory(values[-1], df[names[-1]].to_numpy()))
+            if backed and (keep is None):
+                arrays.append(values)
+                continue
+            sources = list(values) if backed else [df[c].to_numpy() for c in names]
+            dtype = numpy.result_type(numpy.float16, *[c.dtype for c in sources])
+            rows = len(df) if keep is None else int(numpy.count_nonzero(keep))
+            gathered = self.allocate(orientation, rows, dtype)
+            start = 0
+            for first in range(0, len(df), block):
+                part = slice(first, first+block)
+                kept = slice(None) if keep is None else keep[part]
+                for i, source in enumerate(sources):
+                    column = source[part][kept]
+                    gathered[i, start:start+len(column)] = column
+                start += len(column)
+            arrays.append(gathered)
+        self.store(*arrays)
+        return self.values_xy, self.values_xz
+    
+    @staticmethod
+    def bounded(df, orientation, limits, index=None):
+        """
+        A technique to find the localizations of one orientation which fall within a list of limits.
+        
+        When a spatial index is given, the localizations are found with a single box query on the 
+        index, rather than by comparing every position, and only the localizations kept aside by 
+        the index, such as those missing a position, are compared directly.
+        
+        Attributes:
+        df: dataframe
+            The scaled dataframe of one orientation.
+        orientation: str "XY", "XZ"
+            The orientation of the dataframe.
+        limits: list [("X", 15000, "less"), etc.]
+            The axis, limit and direction of each limit, as used by the limiting method.
+        index: None or grid
+            The spatial index of the dataframe, as built by the indexing method.
+            
+        Return:
+            A boolean array, True for the localizations to be kept.
+        """
+        lower = numpy.full(3, -numpy.inf)
+        upper = numpy.full(3, numpy.inf)
+        keep = numpy.ones(len(df) if index is None else len(index.loose), dtype=bool)
+        for axis, limit, direction in limits:
+            a = "XYZ".index(axis)
+            if index is None:
+                values = df[axis+"_"+orientation].to_numpy()
+            else:
+                values = index.centers[index.loose, a]
+                limit = float(numpy.asarray(limit).astype(df[axis+"_"+orientation].dtype))
+            if direction.lower() in ("less", "lesser"):
+                keep &= ~(values >= limit)
+                upper[a] = min(upper[a], limit)
+            elif direction.lower() in ("more", "greater"):
+                keep &= ~(values <= limit)
+                lower[a] = max(lower[a], limit)
+            else:
+                raise ValueError("The direction should be either 'less' or 'more'.")
+        if index is None:
+            return keep
+        found = numpy.zeros(len(df), dtype=bool)
+        found[index.query_box(lower, upper)] = True
+        found[index.loose] = keep
+        return found
+    
     def set_to_center(self):
         """
         A technique to center the data to a zero center position.
         
+        The X and Y positions are centered on the middle of the XY positions, and the Z positions 
+        on the middle of the XZ positions, with each extremum computed once, and the positions of 
+        both orientations modified in place.
+        
         Attributes:
             None.
         
         Return:
             None. Will modify the data established in place.
         """
-        self.dfxz["X_XZ"] = self.dfxz["X_XZ"]-(max(self.dfxy["X_XY"])+min(self.dfxy["X_XY"]))/2
-        self.dfxy["X_XY"] = self.dfxy["X_XY"]-(max(self.dfxy["X_XY"])+min(self.dfxy["X_XY"]))/2
-        self.dfxz["Y_XZ"] = self.dfxz["Y_XZ"]-(max(self.dfxy["Y_XY"])+min(self.dfxy["Y_XY"]))/2
-        self.dfxy["Y_XY"] = self.dfxy["Y_XY"]-(max(self.dfxy["Y_XY"])+min(self.dfxy["Y_XY"]))/2
-        self.dfxy["Z_XY"] = self.dfxy["Z_XY"]-max(self.dfxz["Z_XZ"])/2
-        self.dfxz["Z_XZ"] = self.dfxz["Z_XZ"]-max(self.dfxz["Z_XZ"])/2
+        values_xy, values_xz = self.contiguous()
+        center = numpy.array([(numpy.nanmax(values_xy[0])+numpy.nanmin(values_xy[0]))/2, 
+                              (numpy.nanmax(values_xy[1])+numpy.nanmin(values_xy[1]))/2, 
+                              numpy.nanmax(values_xz[2])/2], dtype=values_xy.dtype)
+        values_xy[:3] -= center[:, None]
+        values_xz[:3] -= center.astype(values_xz.dtype)[:, None]
+        self.version += 1
+        self.rekey(step="set_to_center")
+        if hasattr(self, "grid_xy"):
+            self.indexing(self.cell_size)
         return self
     
+    def indexing(self, cell_size=None):
+        """
+        A technique to build a spatial index over the localizations of both orientations, which 
+        can then be used to answer box, radius and nearest neighbour queries, such as the overlap 
+        search performed by the Overlap.py class, without scanning the whole dataframes.
+        
+        The index only depends on the positions and the positional uncertainties, so the overlap 
+        search can be repeated with different z_range and xy_range values without rebuilding it. 
+        Once built, the index is used by the limiting and region methods to select the 
+        localizations, and is kept up to date by them and by the set_to_center method.
+        
+        Attributes:
+        cell_size: None, num or list [X, Y, Z]
+            The size of the grid cells in nm. If not specified, a size will be chosen from the 
+            number of localizations and their positional uncertainty.
+            
+        Return:
+            None. Will modify the data established in place, with the indexes saved as grid_xy 
+            and grid_xz.
+        """
+        self.cell_size = cell_size
+        zeros_xy = numpy.zeros(len(self.dfxy))
+        zeros_xz = numpy.zeros(len(self.dfxz))
+        self.grid_xy = grid(self.dfxy[["X_XY", "Y_XY", "Z_XY"]].to_numpy(dtype=float),
+                            numpy.column_stack([self.dfxy["U_XY"], self.dfxy["U_XY"], zeros_xy]), cell_size)
+        self.grid_xz = grid(self.dfxz[["X_XZ", "Y_XZ", "Z_XZ"]].to_numpy(dtype=float),
+                            numpy.column_stack([self.dfxz["U_X"], zeros_xz, self.dfxz["U_Z"]]), cell_size)
+        return self
     
     def limiting(self, axis, limit, direction):
         """
@@ -127,50 +450,206 @@ class preparation(object):
             The number value which is the limiting factor for the data.
         direction: str "Less", "Lesser", "More", "Greater", etc.
             The direction in which the data will be limited. If "lesser" is specified, all values above the 
-            limit will be removed, and vice versa if "greater" is specified.
+            limit will be removed, and vice versa if "greater" is specified. The case is ignored.
+            To limit the data along several axes at once, the region method can be used instead.
+            
+        Return:
+            None. Will modify the data established in place.
+        """
+        self.rekey(step="limiting", axis=axis, limit=limit, direction=direction)
+        limits = [(axis, limit, direction)]
+        return self.keep(self.bounded(self.dfxy, "XY", limits, getattr(self, "grid_xy", None)), 
+                         self.bounded(self.dfxz, "XZ", limits, getattr(self, "grid_xz", None)))
+    
+    def region(self, boxes=None, polygon=None, plane="XY", sphere=None, invert=False):
+        """
+        A technique to limit the data to a region of interest made of boxes, a polygon, or spheres, 
+        in a single pass over both orientations.
+        
+        The localizations found within at least one of the specified shapes are kept, so that a 
+        3D box replaces six uses of the limiting method, and several regions can be kept at once. 
+        The boundaries of the shapes are excluded, as with the limiting method.
+        
+        Attributes:
+        boxes: None or list [X_min, X_max, Y_min, Y_max, Z_min, Z_max], or a list of such lists
+            The limits of each box in nm. The values may be infinite to leave an axis unbounded.
+        polygon: None or list [[X, Y], [X, Y], etc.]
+            The vertices of a polygon in nm, within the plane specified, which is extended along 
+            the third axis.
+        plane: str "XY", "XZ", "YZ"
+            The plane of the polygon.
+        sphere: None or list [X, Y, Z, radius], or a list of such lists
+            The center and the radius of each sphere in nm.
+        invert: bool
+            The decision to remove the localizations within the region, rather than keep them.
+            
+        Return:
+            None. Will modify the data established in place.
+        """
+        self.rekey(step="region", boxes=boxes, polygon=polygon, plane=plane, sphere=sphere, invert=invert)
+        keep_xy = self.inside(self.dfxy, "XY", boxes, polygon, plane, sphere, getattr(self, "grid_xy", None))
+        keep_xz = self.inside(self.dfxz, "XZ", boxes, polygon, plane, sphere, getattr(self, "grid_xz", None))
+        if invert:
+            keep_xy, keep_xz = ~keep_xy, ~keep_xz
+        return self.keep(keep_xy, keep_xz)
+    
+    @staticmethod
+    def inside(df, orientation, boxes=None, polygon=None, plane="XY", sphere=None, index=None):
+        """
+        A technique to find the localizations of one orientation which fall within a region of 
+        interest, as used by the region method.
+        
+        When a spatial index is given, only the localizations found by a box query on the index 
+        around each shape are compared with the shape, rather than every localization.
+        
+        Attributes:
+        df: dataframe
+            The scaled dataframe of one orientation.
+        orientation: str "XY", "XZ"
+            The orientation of the dataframe.
+        boxes, polygon, plane & sphere:
+            The shapes of the region, as used by the region method.
+        index: None or grid
+            The spatial index of the dataframe, as built by the indexing method.
+            
+        Return:
+            A boolean array, True for the localizations within at least one of the shapes.
+        """
+        positions = [df[axis+"_"+orientation].to_numpy() for axis in ["X", "Y", "Z"]]
+        found = numpy.zeros(len(df), dtype=bool)
+        if boxes is not None:
+            for box in numpy.asarray(boxes, dtype=float).reshape(-1, 6):
+                rows = preparation.nearby(index, box[0::2], box[1::2])
+                local = [p[rows] for p in positions]
+                within = numpy.ones(len(local[0]), dtype=bool)
+                for a in range(0, 3):
+                    within &= (box[2*a] < local[a]) & (local[a] < box[2*a+1])
+                found[rows] |= within
+        if polygon is not None:
+            if plane not in ("XY", "XZ", "YZ"):
+                raise ValueError("The plane should be either 'XY', 'XZ' or 'YZ'.")
+            vertices = numpy.asarray(polygon, dtype=float).reshape(-1, 2)
+            lower = numpy.full(3, -numpy.inf)
+            upper = numpy.full(3, numpy.inf)
+            for i, axis in enumerate(plane):
+                lower["XYZ".index(axis)] = vertices[:, i].min()
+                upper["XYZ".index(axis)] = vertices[:, i].max()
+            rows = preparation.nearby(index, numpy.nextafter(lower, -numpy.inf), numpy.nextafter(upper, numpy.inf))
+            u = positions["XYZ".index(plane[0])][rows]
+            v = positions["XYZ".index(plane[1])][rows]
+            within = numpy.zeros(len(u), dtype=bool)
+            for (u1, v1), (u2, v2) in zip(vertices, numpy.roll(vertices, -1, axis=0)):
+                if v1 == v2:
+                    continue
+                crossing = ((v1 > v) != (v2 > v)) & (u < (u2-u1)*(v-v1)/(v2-v1)+u1)
+                within ^= crossing
+            found[rows] |= within
+        if sphere is not None:
+            for x, y, z, radius in numpy.asarray(sphere, dtype=float).reshape(-1, 4):
+                reach = radius*(1+1e-9)
+                rows = preparation.nearby(index, [x-reach, y-reach, z-reach], [x+reach, y+reach, z+reach])
+                local = [p[rows] for p in positions]
+                found[rows] |= (local[0]-x)**2+(local[1]-y)**2+(local[2]-z)**2 < radius**2
+        return found
+    
+    @staticmethod
+    def nearby(index, lower, upper):
+        """
+        A technique to select the localizations which may fall within a box, using a spatial index 
+        when one is given, as used by the inside method.
+        
+        Attributes:
+        index: None or grid
+            The spatial index of the localizations, as built by the indexing method.
+        lower & upper: list [X, Y, Z]
+            The limits of the box, which may be infinite to leave an axis unbounded.
+            
+        Return:
+            The indexes of the localizations strictly inside the box, or every localization (as a 
+            slice) when no spatial index is given.
+        """
+        if index is None:
+            return slice(None)
+        return index.query_box(lower, upper)
+    
+    def keep(self, keep_xy, keep_xz):
+        """
+        A technique to keep some of the localizations of both orientations, renumbered in order, 
+        and keep the spatial index up to date.
+        
+        Attributes:
+        keep_xy & keep_xz: array of bool or array of int
+            The localizations to be kept from each orientation.
             
         Return:
             None. Will modify the data established in place.
         """
-        if direction == ("less" or "Less" or "lesser" or "Lesser"):
-            indexes_xy = [idy for idy, valuey in enumerate(self.dfxy[axis+"_XY"]) if valuey >= limit]
-            indexes_xz = [idz for idz, valuez in enumerate(self.dfxz[axis+"_XZ"]) if valuez >= limit]
-            self.dfxy = self.dfxy.drop(indexes_xy).reset_index(drop=True)
-            self.dfxz = self.dfxz.drop(indexes_xz).reset_index(drop=True)
-        elif direction == ("more" or "More" or "greater" or "Greater"):
-            indexes_xy = [idy for idy, valuey in enumerate(self.dfxy[axis+"_XY"]) if valuey <= limit]
-            indexes_xz = [idz for idz, valuez in enumerate(self.dfxz[axis+"_XZ"]) if valuez <= limit]
-            self.dfxy = self.dfxy.drop(indexes_xy).reset_index(drop=True)
-            self.dfxz = self.dfxz.drop(indexes_xz).reset_index(drop=True)
+        keep_xy = numpy.asarray(keep_xy)
+        keep_xz = numpy.asarray(keep_xz)
+        if keep_xy.dtype != bool:
+            keep_xy = numpy.isin(numpy.arange(len(self.dfxy)), keep_xy)
+        if keep_xz.dtype != bool:
+            keep_xz = numpy.isin(numpy.arange(len(self.dfxz)), keep_xz)
+        self.contiguous(keep_xy, keep_xz)
+        if hasattr(self, "grid_xy"):
+            self.grid_xy.subset(keep_xy)
+            self.grid_xz.subset(keep_xz)
         return self
     
-    def download_dataframe(self, filename="Preparation_Dataframe"):
+    def rekey(self, **step):
+        """
+        A technique to update the cache key after a step which modifies the prepared data, so that 
+        the results of the following steps are stored separately.
+        
+        Attributes:
+        step:
+            The name and parameters of the step.
+            
+        Return:
+            None. Will modify the data established in place.
+        """
+        if getattr(self, "cache", None) is not None:
+            self.cache_key = self.cache.key(parent=self.cache_key, **step)
+        return self
+    
+    def download_dataframe(self, filename="Preparation_Dataframe", file_format="csv"):
         """
         A technique to download the data prepared by the preparation.py method as a CSV file.
         
         Attributes:
-            None.
+        filename: str
+            The name of the file, without the extension.
+        file_format: str "csv", "npz"
+            The format of the file. If "npz" is specified, the columns will be saved as a 
+            compressed NumPy archive, which keeps the data type of every column and does not 
+            pad the shorter orientation.
         Return:
-            None. Will download the dataframe as a CSV file.
+            None. Will download the dataframe as a CSV or NPZ file.
         """
+        names = {'X_XY': 'x_xy [nm]', 
+                 'Y_XY': 'y_xy [nm]', 
+                 'Z_XY': 'z_xy [nm]', 
+                 'U_XY': 'uncertainty_xy [nm]', 
+                 'I_XY': 'intensity_xy [photon]',
+                 'O_XY': 'offset_xy [photon]',
+                 'B_XY': 'bkgstd_xy [photon]',
+                 'S_XY': 'sigma_xy [nm]', 
+                 'X_XZ': 'x_xz [nm]', 
+                 'Y_XZ': 'y_xz [nm]', 
+                 'Z_XZ': 'z_xz [nm]', 
+                 'U_X': 'uncertainty_x [nm]',
+                 'U_Z': 'uncertainty_z [nm]',
+                 'I_XZ': 'intensity_xz [photon]',
+                 'O_XZ': 'offset_xz [photon]',
+                 'B_XZ': 'bkgstd_xz [photon]',
+                 'S_X': 'sigma_x [nm]', 
+                 'S_Z': 'sigma_z [nm]'}
+        if file_format == "npz":
+            columns = {names.get(c, c): self.dfxy[c].to_numpy() for c in self.dfxy.columns}
+            columns.update({names.get(c, c): self.dfxz[c].to_numpy() for c in self.dfxz.columns})
+            numpy.savez_compressed(filename+".npz", **columns)
+            return self
         download_df = pandas.concat([self.dfxy,self.dfxz],axis=1,sort=False)
-        download_df = download_df.rename(columns={'X_XY': 'x_xy [nm]', 
-                                                  'Y_XY': 'y_xy [nm]', 
-                                                  'Z_XY': 'z_xy [nm]', 
-                                                  'U_XY': 'uncertainty_xy [nm]', 
-                                                  'I_XY': 'intensity_xy [photon]',
-                                                  'O_XY': 'offset_xy [photon]',
-                                                  'B_XY': 'bkgstd_xy [photon]',
-                                                  'S_XY': 'sigma_xy [nm]', 
-                                                  'X_XZ': 'x_xz [nm]', 
-                                                  'Y_XZ': 'y_xz [nm]', 
-                                                  'Z_XZ': 'z_xz [nm]', 
-                                                  'U_X': 'uncertainty_x [nm]',
-                                                  'U_Z': 'uncertainty_z [nm]',
-                                                  'I_XZ': 'intensity_xz [photon]',
-                                                  'O_XZ': 'offset_xz [photon]',
-                                                  'B_XZ': 'bkgstd_xz [photon]',
-                                                  'S_X': 'sigma_x [nm]', 
-                                                  'S_Z': 'sigma_z [nm]'})
+        download_df = download_df.rename(columns=names)
         download_df.to_csv(filename+".csv", index=False, encoding='utf-8')
         return self
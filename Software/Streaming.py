@@ -0,0 +1,359 @@
+class streaming(object):
+    """
+    This file is part of the Multi-Orientation MAXWELL software
+    
+    File author(s): Sierra Dean <ccnd@live.com>
+    
+    Distributed under the GPLv3 Licence.
+    See accompanying file LICENSE.txt or copy at
+        http://www.gnu.org/licenses/gpl-3.0.html
+    
+    source: https://github.com/SierraD/Multi-Orientation-Maxwell
+    
+    Last Updated: Oct 17 2026
+    """
+    def __init__(self, z_range, xy_range, magnification=20, pixelsize_xy=230, pixelsize_xz=13, TS_dims=2,
+                 limits=None, selection_type="uncertainty", cell_size=None):
+        """
+        A technique to obtain the 3D localizations while the acquisition is still running, by
+        ingesting the ThunderSTORM localizations of both orientations as they are written, one
+        range of frames at a time.
+        
+        The localizations of every range are scaled as by the setting method of the Preparation.py
+        class and added to the prepared data. Only the new localizations are then compared: the
+        new XZ localizations with every XY localization, and the new XY localizations with the
+        earlier XZ localizations. The localizations of each orientation are held in a few spatial
+        indexes (Grid.py) of doubling size, so that a new range is indexed on its own and merged
+        with the earlier indexes only as often as their size doubles. The groups of duplicate
+        points of the Filtering.py class are kept by a union-find over the localizations, so that
+        only the groups reached by the new overlapped points are merged and selected again.
+        
+        Once every range has been ingested, the overlapped points and the 3D localizations are the
+        same as those of the indexes, merge, selection and points methods run on the whole
+        acquisition, without the set_to_center method, whose center is only known at the end.
+        
+        Attributes:
+        z_range & xy_range: int
+            The radius of the Z uncertainty for the XY data, and of the Y uncertainty for the XZ
+            data, as used by the indexes method of the Overlap.py class.
+        magnification, pixelsize_xy, pixelsize_xz & TS_dims:
+            The parameters of the setting method of the Preparation.py class.
+        limits: None or list [("X", 15000, "less"), ("X", -15000, "more"), etc.]
+            The limits applied to the scaled data as it is ingested, as used by the setting method.
+        selection_type: str "uncertainty", "Uncertainty", "intensity", "Intensity"
+            The method of filtering, as used by the selection method of the Filtering.py class.
+        cell_size: None, num or list [X, Y, Z]
+            The size of the cells of the spatial indexes in nm. If not specified, a size will be
+            chosen for every index from its localizations.
+        
+        Return:
+            None. Will modify the data established in place.
+        """
+        if filtering.scores({"U_XY": 0, "U_Z": 0, "U_X": 0, "I_XY": 0, "I_XZ": 0}, selection_type) is None:
+            raise ValueError("The selection type should be either 'uncertainty' or 'intensity'.")
+        self.data = preparation()
+        self.data.xypix = pixelsize_xy
+        self.data.zpix = pixelsize_xz
+        self.data.magnification = magnification
+        self.z_range = z_range
+        self.xy_range = xy_range
+        self.TS_dims = TS_dims
+        self.limits = limits
+        self.selection_type = selection_type.lower()
+        self.cell_size = cell_size
+        self.buffers = {"XY": None, "XZ": None}
+        self.lengths = {"XY": 0, "XZ": 0}
+        self.levels = {"XY": [], "XZ": []}
+        self.labels = {"XY": numpy.zeros(0, dtype=numpy.int64), "XZ": numpy.zeros(0, dtype=numpy.int64)}
+        self.XY_indexes = numpy.zeros(0, dtype=numpy.int64)
+        self.XZ_indexes = numpy.zeros(0, dtype=numpy.int64)
+        self.groups = numpy.zeros(0, dtype=numpy.int64)
+        self.score = numpy.zeros(0)
+        self.selected = numpy.zeros(0, dtype=numpy.int64)
+        self.files = {}
+        return
+    
+    def ingest(self, df_xy=None, df_xz=None):
+        """
+        A technique to add the localizations of a new range of frames, and find the overlapped
+        points and the 3D localizations they add or change.
+        
+        Attributes:
+        df_xy & df_xz: None or dataframe
+            The new rows of the XY and XZ ThunderSTORM results tables.
+        
+        Return:
+            None. Will modify the data established in place, with the new overlapped points saved
+            as new_XY_indexes and new_XZ_indexes, the 3D localizations of the groups which were
+            created or changed saved as new_points, indexed by their group, and the groups which
+            were merged into another group saved as retired_groups.
+        """
+        start_xy = self.lengths["XY"]
+        start_xz = self.lengths["XZ"]
+        self.append("XY", df_xy)
+        self.append("XZ", df_xz)
+        self.data.store(self.buffers["XY"][:, :self.lengths["XY"]], self.buffers["XZ"][:, :self.lengths["XZ"]])
+        self.data.xy_len = self.lengths["XY"]
+        self.data.xz_len = self.lengths["XZ"]
+        rows_xy = numpy.arange(start_xy, self.lengths["XY"])
+        rows_xz = numpy.arange(start_xz, self.lengths["XZ"])
+        self.insert("XY", start_xy)
+        self.insert("XZ", start_xz)
+        
+        lower_xz, upper_xz = overlap.limits_xz(self.data.dfxz, self.xy_range, rows_xz)
+        XY_new, XZ_new = self.query("XY", lower_xz, upper_xz, [0, 0, self.z_range])
+        lower_xy, upper_xy = overlap.limits_xy(self.data.dfxy, self.z_range, rows_xy)
+        XZ_old, XY_old = self.query("XZ", lower_xy, upper_xy, [0, self.xy_range, 0])
+        earlier = XZ_old < start_xz
+        XY_new = numpy.concatenate([XY_new, XY_old[earlier]+start_xy])
+        XZ_new = numpy.concatenate([XZ_new+start_xz, XZ_old[earlier]])
+        order = numpy.lexsort((XY_new, XZ_new))
+        self.new_XY_indexes = XY_new[order]
+        self.new_XZ_indexes = XZ_new[order]
+        self.merge(self.new_XY_indexes, self.new_XZ_indexes)
+        for name in ["points", "localizations"]:
+            self.__dict__.pop(name, None)
+        return self
+    
+    def update(self, file_xy, file_xz):
+        """
+        A technique to ingest the rows written to the XY and XZ ThunderSTORM results files since
+        they were last read.
+        
+        Attributes:
+        file_xy & file_xz: str "XY_File.csv", "XZ_File.csv", etc.
+            The name of the ThunderSTORM results tables being written.
+        
+        Return:
+            None. Will modify the data established in place, as with the ingest method.
+        """
+        return self.ingest(self.read(file_xy), self.read(file_xz))
+    
+    def read(self, filename):
+        """
+        A technique to read the complete rows written to a results file since it was last read.
+        
+        Attributes:
+        filename: str
+            The name of the file.
+        
+        Return:
+            The new rows as a dataframe, or None if no complete row was written.
+        """
+        import io
+        offset, header = self.files.get(filename, (0, b""))
+        with open(filename, "rb") as f:
+            f.seek(offset)
+            text = f.read()
+        end = text.rfind(b"\n")+1
+        if end == 0:
+            return None
+        text = text[:end]
+        if offset == 0:
+            first = text.find(b"\n")+1
+            header, text = text[:first], text[first:]
+        self.files[filename] = (offset+end, header)
+        if len(text.strip()) == 0:
+            return None
+        return pandas.read_csv(io.BytesIO(header+text))
+    
+    def append(self, orientation, df):
+        """
+        A technique to scale the new rows of one orientation and add them to the prepared data.
+        
+        The scaled values are kept in an array whose capacity doubles when it is full, so that
+        adding a range does not copy the earlier localizations.
+        
+        Attributes:
+        orientation: str "XY", "XZ"
+            The orientation of the rows.
+        df: None or dataframe
+            The new rows of the ThunderSTORM results table.
+        
+        Return:
+            None. Will modify the data established in place.
+        """
+        if (df is None) or (len(df) == 0):
+            if self.buffers[orientation] is None:
+                self.buffers[orientation] = numpy.zeros((len(preparation.columns(orientation)), 0))
+            return self
+        values = self.data.within(self.data.scaled(df, orientation, self.TS_dims), orientation, self.limits)
+        buffer = self.buffers[orientation]
+        length = self.lengths[orientation]
+        if (buffer is None) or (length+values.shape[1] > buffer.shape[1]) or (buffer.dtype != numpy.result_type(buffer, values)):
+            capacity = max(2*(0 if buffer is None else buffer.shape[1]), length+values.shape[1])
+            grown = numpy.empty((values.shape[0], capacity), dtype=values.dtype if buffer is None else numpy.result_type(buffer, values))
+            if buffer is not None:
+                grown[:, :length] = buffer[:, :length]
+            self.buffers[orientation] = buffer = grown
+        buffer[:, length:length+values.shape[1]] = values
+        self.lengths[orientation] = length+values.shape[1]
+        self.labels[orientation] = numpy.concatenate([self.labels[orientation],
+                                                      numpy.full(values.shape[1], -1, dtype=numpy.int64)])
+        return self
+    
+    def insert(self, orientation, start):
+        """
+        A technique to index the new localizations of one orientation, merging the most recent
+        indexes while the earlier index is not larger than the later one.
+        
+        Attributes:
+        orientation: str "XY", "XZ"
+            The orientation of the localizations.
+        start: int
+            The first new localization.
+        
+        Return:
+            None. Will modify the data established in place, with the indexes of each orientation
+            saved as levels, each with its first localization and the localization after its last.
+        """
+        stop = self.lengths[orientation]
+        levels = self.levels[orientation]
+        if stop == start:
+            return self
+        levels.append((start, stop, None))
+        while (len(levels) >= 2) and (levels[-2][1]-levels[-2][0] <= levels[-1][1]-levels[-1][0]):
+            levels[-2:] = [(levels[-2][0], levels[-1][1], None)]
+        if levels[-1][2] is None:
+            levels[-1] = (levels[-1][0], levels[-1][1], self.index(orientation, levels[-1][0], levels[-1][1]))
+        return self
+    
+    def index(self, orientation, start, stop):
+        """
+        A technique to build the spatial index of consecutive localizations of one orientation,
+        with the same uncertainty boxes as the indexing method of the Preparation.py class.
+        
+        Attributes:
+        orientation: str "XY", "XZ"
+            The orientation of the localizations.
+        start & stop: int
+            The first localization and the localization after the last.
+        
+        Return:
+            The spatial index as a grid.
+        """
+        if orientation == "XY":
+            df = self.data.dfxy.iloc[start:stop]
+            centers = df[["X_XY", "Y_XY", "Z_XY"]].to_numpy(dtype=float)
+            half_widths = numpy.column_stack([df["U_XY"], df["U_XY"], numpy.zeros(len(df))])
+        else:
+            df = self.data.dfxz.iloc[start:stop]
+            centers = df[["X_XZ", "Y_XZ", "Z_XZ"]].to_numpy(dtype=float)
+            half_widths = numpy.column_stack([df["U_X"], numpy.zeros(len(df)), df["U_Z"]])
+        return grid(centers, half_widths, self.cell_size)
+    
+    def query(self, orientation, lower, upper, expand):
+        """
+        A technique to find the localizations of one orientation whose boxes overlap the query boxes.
+        
+        Attributes:
+        orientation: str "XY", "XZ"
+            The orientation of the indexed localizations.
+        lower & upper: array (Q, 3)
+            The limits of the query boxes.
+        expand: list [X, Y, Z]
+            The half-width added to the stored boxes, as used by the search method of the
+            Overlap.py class.
+        
+        Return:
+            The indexed localizations and the query boxes which overlap, as integer arrays.
+        """
+        all_items = []
+        all_queries = []
+        for start, stop, index in self.levels[orientation]:
+            items, queries = index.query_boxes(lower, upper, expand=expand)
+            all_items.append(items+start)
+            all_queries.append(queries)
+        return overlap.joined(list(zip(all_items, all_queries)))
+    
+    def merge(self, XY_new, XZ_new):
+        """
+        A technique to add the new overlapped points to the groups of duplicate points, and
+        select again the point of every group which was created or changed.
+        
+        Every localization is labelled with its group, so that the groups joined by the new
+        points are found directly, and merged into the earliest of them. The union is done for
+        all new points at once, with the connected components of the sparse graph linking the
+        new points, their localizations and the groups of those localizations.
+        
+        Attributes:
+        XY_new & XZ_new: array of int
+            The XY and XZ localization of every new overlapped point.
+        
+        Return:
+            None. Will modify the data established in place.
+        """
+        n_groups = len(self.selected)
+        k = len(XY_new)
+        label_xy = self.labels["XY"]
+        label_xz = self.labels["XZ"]
+        self.retired_groups = numpy.zeros(0, dtype=numpy.int64)
+        if k == 0:
+            self.new_points = filtering.table(localizations(self.data, XY_new, XZ_new))
+            self.new_points.index.name = "group"
+            return self
+        XY_nodes, XY_inverse = numpy.unique(XY_new, return_inverse=True)
+        XZ_nodes, XZ_inverse = numpy.unique(XZ_new, return_inverse=True)
+        old = numpy.concatenate([label_xy[XY_nodes], label_xz[XZ_nodes]])
+        touched, old_inverse = numpy.unique(old[old >= 0], return_inverse=True)
+        
+        n_touched = len(touched)
+        nodes = numpy.concatenate([n_touched+k+XY_inverse.reshape(-1), n_touched+k+len(XY_nodes)+XZ_inverse.reshape(-1),
+                                   n_touched+k+numpy.flatnonzero(old >= 0)])
+        links = numpy.concatenate([n_touched+numpy.arange(k), n_touched+numpy.arange(k), old_inverse.reshape(-1)])
+        n_nodes = n_touched+k+len(XY_nodes)+len(XZ_nodes)
+        graph = scipy.sparse.coo_matrix((numpy.ones(len(nodes)), (nodes, links)), shape=(n_nodes, n_nodes))
+        components = scipy.sparse.csgraph.connected_components(graph, directed=False)[1]
+        
+        target = numpy.full(n_nodes, -1, dtype=numpy.int64)
+        first = numpy.unique(components[:n_touched], return_index=True)[1]
+        target[components[:n_touched][first]] = touched[first]
+        pair_components = components[n_touched:n_touched+k]
+        unassigned = pair_components[target[pair_components] < 0]
+        fresh = unassigned[numpy.sort(numpy.unique(unassigned, return_index=True)[1])]
+        target[fresh] = n_groups+numpy.arange(len(fresh))
+        
+        remap = numpy.arange(n_groups+len(fresh))
+        remap[touched] = target[components[:n_touched]]
+        self.retired_groups = touched[remap[touched] != touched]
+        self.groups = remap[self.groups]
+        for label in [label_xy, label_xz]:
+            labelled = label >= 0
+            label[labelled] = remap[label[labelled]]
+        new_groups = target[pair_components]
+        label_xy[XY_new] = new_groups
+        label_xz[XZ_new] = new_groups
+        
+        n_pairs = len(self.XY_indexes)
+        self.XY_indexes = numpy.concatenate([self.XY_indexes, XY_new])
+        self.XZ_indexes = numpy.concatenate([self.XZ_indexes, XZ_new])
+        self.groups = numpy.concatenate([self.groups, new_groups])
+        self.score = numpy.concatenate([self.score, filtering.scores(localizations(self.data, XY_new, XZ_new),
+                                                                     self.selection_type)])
+        self.selected = numpy.concatenate([self.selected, numpy.full(len(fresh), -1, dtype=numpy.int64)])
+        self.selected[self.retired_groups] = -1
+        
+        changed = numpy.unique(new_groups)
+        rows = numpy.flatnonzero(numpy.isin(self.groups, changed))
+        order = numpy.lexsort((self.XY_indexes[rows], self.XZ_indexes[rows], self.score[rows], self.groups[rows]))
+        rows = rows[order]
+        lowest = numpy.ones(len(rows), dtype=bool)
+        lowest[1:] = self.groups[rows][1:] != self.groups[rows][:-1]
+        self.selected[self.groups[rows[lowest]]] = rows[lowest]
+        self.new_points = filtering.table(localizations(self.data, self.XY_indexes[rows[lowest]],
+                                                        self.XZ_indexes[rows[lowest]]))
+        self.new_points.index = pandas.Index(self.groups[rows[lowest]], name="group")
+        return self
+    
+    def __getattr__(self, name):
+        """
+        A technique to build the store of the selected overlapped points, and the dataframe of
+        3D localizations, from the groups of all ingested ranges, only when they are first used.
+        """
+        if name in ("points", "localizations"):
+            rows = self.selected[self.selected >= 0]
+            rows = rows[numpy.lexsort((self.XY_indexes[rows], self.XZ_indexes[rows]))]
+            self.localizations = localizations(self.data, self.XY_indexes[rows], self.XZ_indexes[rows])
+            self.points = filtering.table(self.localizations)
+            return self.__dict__[name]
+        raise AttributeError("'streaming' object has no attribute '"+name+"'")
@@ -10,7 +10,7 @@ class surface(object):
         
     source: https://github.com/SierraD/Multi-Orientation-Maxwell
     
-    Last Updated: Sept 26 2024
+    Last Updated: Oct 17 2026
     """
     def __init__(self, data):
         """
@@ -43,39 +43,456 @@ class surface(object):
             
         Return: 
             None. Will modify the data established in place. 
-        """   
-        N = len(self.data.points["X [nm]"])
-        
-        u_i = self.data.points["X [nm]"] - sum(self.data.points["X [nm]"])/N
-        v_i = self.data.points["Y [nm]"] - sum(self.data.points["Y [nm]"])/N
-        w_i = self.data.points["Z [nm]"] - sum(self.data.points["Z [nm]"])/N
-        
-        s_uu = sum(u_i * u_i)
-        s_uv = sum(u_i * v_i)
-        s_uw = sum(u_i * w_i)
-        s_vv = sum(v_i * v_i)
-        s_vw = sum(v_i * w_i)
-        s_ww = sum(w_i * w_i)
-        
-        s_uuu = sum(u_i * u_i * u_i)
-        s_uvv = sum(u_i * v_i * v_i)
-        s_uww = sum(u_i * w_i * w_i)
-        s_uuv = sum(u_i * u_i * v_i)
-        s_vvv = sum(v_i * v_i * v_i)
-        s_vww = sum(v_i * w_i * w_i)
-        s_uuw = sum(u_i * u_i * w_i)
-        s_vvw = sum(v_i * v_i * w_i)
-        s_www = sum(w_i * w_i * w_i)
-        
-        A = [[s_uu, s_uv, s_uw], [s_uv, s_vv, s_vw], [s_uw, s_vw, s_ww]]
-        B = [[s_uuu+s_uvv+s_uww], [s_uuv+s_vvv+s_vww], [s_uuw+s_vvw+s_www]]
-        x = 0.5*numpy.matmul(numpy.linalg.inv(A), B)
-        
-        self.X_cent = [x[0] + sum(self.data.points["X [nm]"])/N][0][0]
-        self.Y_cent = [x[1] + sum(self.data.points["Y [nm]"])/N][0][0]
-        self.Z_cent = [x[2] + sum(self.data.points["Z [nm]"])/N][0][0]
-        
-        self.radius = numpy.sqrt(x[0]**2 + x[1]**2 + x[2]**2 + ((s_uu+s_vv+s_ww)/N))
-        self.radius_i = numpy.sqrt((self.data.points["X [nm]"] - self.X_cent)**2 + (self.data.points["Y [nm]"] - self.Y_cent)**2 + (self.data.points["Z [nm]"] - self.Z_cent)**2)
+        """
+        positions = self.positions(self.data.points)
+        centers, radius = surface.fit(positions)
+        
+        self.X_cent = centers[0, 0]
+        self.Y_cent = centers[0, 1]
+        self.Z_cent = centers[0, 2]
+        
+        self.radius = radius
+        self.radius_i = pandas.Series(numpy.linalg.norm(positions-centers[0], axis=1),
+                                      index=self.data.points.index)
         self.error_i = self.radius_i - self.radius
         return self
+    
+    def batch_evaluation(self, labels="Particle"):
+        """
+        A technique to determine the radius and center position of many particles at once,
+        using a Summation Least-Squares sphere fitting for the localizations of each particle.
+        
+        The moments of every particle are summed together in a single pass over the
+        localizations, and the linear systems of every particle are solved together, so that
+        thousands of particles are fitted without a surface class for each of them.
+        
+        Attributes:
+        labels: str "Particle" or array of int
+            Either the name of the column of the points holding the particle of each localization,
+            or the particle of each localization. Localizations with a negative label, such as
+            noise, are not fitted.
+            
+        Return:
+            None. Will modify the data established in place, with the center, radius and number
+            of localizations of every particle saved as the fits dataframe, and the distance of
+            every localization to the center of its particle saved as radius_i and error_i (NaN
+            for the localizations which are not fitted).
+        """
+        points = self.data.points
+        positions = self.positions(points)
+        fitted, particles, inverse = surface.labelled(points, labels)
+        centers, radius = surface.fit(positions[fitted], inverse, len(particles))
+        
+        self.fits = pandas.DataFrame({"Particle": particles,
+                                      "Localizations": numpy.bincount(inverse, minlength=len(particles)),
+                                      "X Center [nm]": centers[:, 0],
+                                      "Y Center [nm]": centers[:, 1],
+                                      "Z Center [nm]": centers[:, 2],
+                                      "Radius [nm]": radius})
+        self.distances(positions, fitted, inverse, centers, radius)
+        return self
+    
+    def robust_evaluation(self, method="irls", labels=None, weighted=True, threshold=None, max_iterations=100,
+                          tolerance=1e-4, probability=0.99, confidence=0.95, seed=None):
+        """
+        A technique to determine the radius and center position of one or many particles with a
+        Summation Least-Squares sphere fitting which is not drawn by outlying localizations.
+        
+        With "irls", the sphere is fitted again and again, with the weight of each localization
+        given by the Tukey biweight of its distance to the fitted surface, so that localizations
+        far from the surface are given no weight. With "ransac", spheres are fitted through four
+        localizations drawn at random, the sphere with the most localizations within the
+        threshold of its surface is kept, and the sphere is then fitted again to those
+        localizations. In both cases, the localizations can also be weighted by their
+        uncertainty, and the fitting of each particle stops as soon as it has converged (IRLS)
+        or as soon as enough spheres have been drawn to find the inliers with the given
+        probability (RANSAC). Every particle is fitted at the same time, as with batch_evaluation.
+        
+        Attributes:
+        method: str "irls", "ransac"
+            The robust fitting method.
+        labels: None, str "Particle" or array of int
+            The particle of each localization, as used by batch_evaluation. If not specified, the
+            points are fitted as a single particle, and the center and radius are also saved as
+            X_cent, Y_cent, Z_cent and radius, as with evaluation.
+        weighted: bool
+            The decision to weight each localization by the inverse of its variance, from the
+            Uncertainty XY [nm] and Uncertainty Z [nm] columns.
+        threshold: None or num
+            The largest distance in nm from the surface of an inlier. If not specified, the
+            threshold is 4.685 times the robust standard deviation of the distances of each
+            particle with "irls", and 3 times the uncertainty of each localization with "ransac".
+        max_iterations: int
+            The largest number of fits (IRLS) or of random spheres (RANSAC) for each particle.
+        tolerance: num
+            The change of the center and radius, relative to the radius, below which the IRLS
+            fitting of a particle has converged.
+        probability: num
+            The probability with which the RANSAC fitting draws at least one sphere through four
+            inliers, used to stop the drawing.
+        confidence: num
+            The confidence level of the intervals of the center and radius.
+        seed: None or int
+            The seed of the random number generator of the RANSAC fitting.
+            
+        Return:
+            None. Will modify the data established in place, with the center, radius, number of
+            localizations and inliers, number of iterations and half-width of the confidence
+            intervals of every particle saved as the fits dataframe, the inlier mask saved as
+            inliers, and the distances saved as radius_i and error_i.
+        """
+        if method not in ["irls", "ransac"]:
+            raise ValueError("The method should be either 'irls' or 'ransac'.")
+        points = self.data.points
+        positions = self.positions(points)
+        fitted, particles, inverse = surface.labelled(points, labels)
+        n_labels = len(particles)
+        P = positions[fitted]
+        N = numpy.bincount(inverse, minlength=n_labels)
+        sigma = None
+        if weighted or ((method == "ransac") and (threshold is None)):
+            sigma = surface.uncertainties(points)[fitted]
+        base = 1/sigma**2 if weighted else numpy.ones(len(P))
+        iterations = numpy.zeros(n_labels, dtype=numpy.int64)
+        
+        if method == "irls":
+            weights = base.copy()
+            cut = numpy.full(len(P), numpy.inf if threshold is None else float(threshold))
+            centers, radius = surface.fit(P, inverse, n_labels, weights)
+            active = numpy.isfinite(radius)
+            for iteration in range(0, max_iterations):
+                if not numpy.any(active):
+                    break
+                step = active[inverse]
+                P_step, labels_step = P[step], inverse[step]
+                errors = numpy.linalg.norm(P_step-centers[labels_step], axis=1)-radius[labels_step]
+                if threshold is None:
+                    scale = 4.685*1.4826*surface.medians(numpy.abs(errors), labels_step, n_labels)
+                    cut[step] = numpy.maximum(scale, numpy.finfo(float).eps*numpy.abs(radius))[labels_step]
+                with numpy.errstate(invalid="ignore"):
+                    weights[step] = base[step]*numpy.clip(1-(errors/cut[step])**2, 0, None)**2
+                new_centers, new_radius = surface.fit(P_step, labels_step, n_labels, weights[step])
+                change = numpy.maximum(numpy.abs(new_centers-centers).max(axis=1), numpy.abs(new_radius-radius))
+                update = active & numpy.isfinite(new_radius)
+                centers[update] = new_centers[update]
+                radius[update] = new_radius[update]
+                iterations[active] += 1
+                with numpy.errstate(invalid="ignore"):
+                    active = update & ~(change <= tolerance*numpy.abs(new_radius))
+            errors = numpy.linalg.norm(P-centers[inverse], axis=1)-radius[inverse]
+            with numpy.errstate(invalid="ignore"):
+                inliers = numpy.abs(errors) <= cut
+        else:
+            if threshold is None:
+                cut = 3*sigma
+            else:
+                cut = numpy.full(len(P), float(threshold))
+            rng = numpy.random.default_rng(seed)
+            order = numpy.argsort(inverse, kind="stable")
+            starts = numpy.concatenate([[0], numpy.cumsum(N)[:-1]]).astype(numpy.int64)
+            centers = numpy.full((n_labels, 3), numpy.nan)
+            radius = numpy.full(n_labels, numpy.nan)
+            best = numpy.zeros(n_labels)
+            required = numpy.full(n_labels, max_iterations)
+            for iteration in range(0, max_iterations):
+                drawn = numpy.flatnonzero((N >= 4) & (iteration < required))
+                if len(drawn) == 0:
+                    break
+                local = numpy.full(n_labels, -1)
+                local[drawn] = numpy.arange(0, len(drawn))
+                samples = order[starts[drawn][:, None]+(rng.random((len(drawn), 4))*N[drawn][:, None]).astype(numpy.int64)]
+                sample_centers, sample_radius = surface.fit(P[samples.ravel()], numpy.repeat(numpy.arange(0, len(drawn)), 4), len(drawn))
+                scored = local[inverse] >= 0
+                j = local[inverse[scored]]
+                errors = numpy.linalg.norm(P[scored]-sample_centers[j], axis=1)-sample_radius[j]
+                with numpy.errstate(invalid="ignore"):
+                    score = numpy.bincount(inverse[scored], numpy.abs(errors) <= cut[scored], n_labels)
+                better = (score > best) & (local >= 0)
+                better[better] = numpy.isfinite(sample_radius[local[better]])
+                best[better] = score[better]
+                centers[better] = sample_centers[local[better]]
+                radius[better] = sample_radius[local[better]]
+                iterations[drawn] += 1
+                with numpy.errstate(divide="ignore", invalid="ignore"):
+                    fraction = numpy.clip(best/N, 0, 1)
+                    needed = numpy.log(1-probability)/numpy.log(1-fraction**4)
+                needed = numpy.nan_to_num(needed, nan=max_iterations, posinf=max_iterations, neginf=max_iterations)
+                required = numpy.where(fraction >= 1, 0, numpy.minimum(numpy.ceil(needed), max_iterations))
+            with numpy.errstate(invalid="ignore"):
+                inliers = numpy.abs(numpy.linalg.norm(P-centers[inverse], axis=1)-radius[inverse]) <= cut
+            centers, radius = surface.fit(P[inliers], inverse[inliers], n_labels, base[inliers])
+            errors = numpy.linalg.norm(P-centers[inverse], axis=1)-radius[inverse]
+            with numpy.errstate(invalid="ignore"):
+                inliers = numpy.abs(errors) <= cut
+            weights = base*inliers
+        
+        intervals = surface.intervals(P, inverse, n_labels, centers, radius, weights, confidence)
+        self.fits = pandas.DataFrame({"Particle": particles,
+                                      "Localizations": N,
+                                      "Inliers": numpy.bincount(inverse, inliers, n_labels).astype(numpy.int64),
+                                      "Iterations": iterations,
+                                      "X Center [nm]": centers[:, 0],
+                                      "Y Center [nm]": centers[:, 1],
+                                      "Z Center [nm]": centers[:, 2],
+                                      "Radius [nm]": radius,
+                                      "X Center CI [nm]": intervals[:, 0],
+                                      "Y Center CI [nm]": intervals[:, 1],
+                                      "Z Center CI [nm]": intervals[:, 2],
+                                      "Radius CI [nm]": intervals[:, 3]})
+        self.inliers = pandas.Series(False, index=points.index)
+        self.inliers[fitted] = inliers
+        self.distances(positions, fitted, inverse, centers, radius)
+        if labels is None:
+            self.X_cent = centers[0, 0]
+            self.Y_cent = centers[0, 1]
+            self.Z_cent = centers[0, 2]
+            self.radius = radius
+        return self
+    
+    def distances(self, positions, fitted, inverse, centers, radius):
+        """
+        A technique to determine the distance of every localization to the center and to the
+        surface of the sphere of its particle.
+        
+        Attributes:
+        positions: float array of shape (N, 3)
+            The positions of the points.
+        fitted: array of bool
+            The points which are fitted.
+        inverse: array of int
+            The particle of each fitted point, as returned by labelled.
+        centers & radius: float arrays
+            The center and radius of every particle.
+            
+        Return:
+            None. Will modify the data established in place, with the distances saved as radius_i
+            and error_i (NaN for the points which are not fitted).
+        """
+        distances = numpy.full(len(positions), numpy.nan)
+        distances[fitted] = numpy.linalg.norm(positions[fitted]-centers[inverse], axis=1)
+        errors = distances.copy()
+        errors[fitted] -= radius[inverse]
+        self.radius_i = pandas.Series(distances, index=self.data.points.index)
+        self.error_i = pandas.Series(errors, index=self.data.points.index)
+        return self
+    
+    @staticmethod
+    def labelled(points, labels=None):
+        """
+        A technique to number the particles of the points from 0.
+        
+        Attributes:
+        points: dataframe
+            The points.
+        labels: None, str "Particle" or array of int
+            Either the name of the column holding the particle of each point, or the particle of
+            each point. Points with a negative label are not fitted. If not specified, all points
+            belong to a single particle.
+            
+        Return:
+            The points which are fitted as an array of bool, the label of every particle, and
+            the particle of each fitted point numbered from 0.
+        """
+        if labels is None:
+            labels = numpy.zeros(len(points), dtype=numpy.int64)
+        elif isinstance(labels, str):
+            if labels not in points.columns:
+                raise ValueError("The points should have a '"+labels+"' column, or the labels should be given.")
+            labels = points[labels].to_numpy()
+        labels = numpy.asarray(labels)
+        if len(labels) != len(points):
+            raise ValueError("There should be a single label for each point.")
+        fitted = labels >= 0
+        particles, inverse = numpy.unique(labels[fitted], return_inverse=True)
+        return fitted, particles, inverse.reshape(-1)
+    
+    @staticmethod
+    def uncertainties(points):
+        """
+        A technique to combine the XY and Z uncertainties of the points into a single
+        three-dimensional uncertainty.
+        
+        Attributes:
+        points: dataframe
+            The points, with the Uncertainty XY [nm] and Uncertainty Z [nm] columns.
+            
+        Return:
+            The root mean square of the uncertainties along X, Y and Z, as a float array.
+        """
+        if ("Uncertainty XY [nm]" not in points.columns) or ("Uncertainty Z [nm]" not in points.columns):
+            raise ValueError("The points should have the 'Uncertainty XY [nm]' and 'Uncertainty Z [nm]' columns to be weighted.")
+        u_xy = points["Uncertainty XY [nm]"].to_numpy(dtype=float)
+        u_z = points["Uncertainty Z [nm]"].to_numpy(dtype=float)
+        return numpy.sqrt((2*u_xy**2+u_z**2)/3)
+    
+    @staticmethod
+    def medians(values, labels, n_labels):
+        """
+        A technique to determine the median of the values of each label.
+        
+        Attributes:
+        values: float array
+            The values.
+        labels: array of int
+            The label of each value, from 0 to n_labels-1.
+        n_labels: int
+            The number of labels.
+            
+        Return:
+            The medians as a float array of shape (n_labels,), NaN for a label without values.
+        """
+        order = numpy.argsort(values)
+        order = order[numpy.argsort(labels[order], kind="stable")]
+        counts = numpy.bincount(labels, minlength=n_labels)
+        starts = numpy.concatenate([[0], numpy.cumsum(counts)[:-1]]).astype(numpy.int64)
+        medians = numpy.full(n_labels, numpy.nan)
+        present = counts > 0
+        lower = order[starts[present]+(counts[present]-1)//2]
+        upper = order[starts[present]+counts[present]//2]
+        medians[present] = 0.5*(values[lower]+values[upper])
+        return medians
+    
+    @staticmethod
+    def intervals(positions, labels, n_labels, centers, radius, weights, confidence=0.95):
+        """
+        A technique to determine the confidence intervals of the center and radius of each label.
+        
+        The covariance of the center and radius is estimated from the weighted distances of the
+        positions to the surface, linearised around the fitted sphere, and scaled by the
+        weighted variance of the distances, with a Student's t quantile for the interval.
+        
+        Attributes:
+        positions: float array of shape (N, 3)
+            The positions.
+        labels: array of int
+            The label of each position, from 0 to n_labels-1.
+        n_labels: int
+            The number of labels.
+        centers & radius: float arrays
+            The center and radius of every label.
+        weights: float array
+            The weight of each position. Positions with no weight are not used.
+        confidence: num
+            The confidence level of the intervals.
+            
+        Return:
+            The half-widths of the intervals of X, Y, Z and the radius, as a float array of
+            shape (n_labels, 4), NaN for a label with fewer than five weighted positions.
+        """
+        used = weights > 0
+        P, labels, weights = positions[used], labels[used], weights[used]
+        offsets = P-centers[labels]
+        with numpy.errstate(invalid="ignore", divide="ignore"):
+            distances = numpy.linalg.norm(offsets, axis=1)
+            J = numpy.column_stack([-offsets/distances[:, None], -numpy.ones(len(P))])
+        errors = distances-radius[labels]
+        rows, cols = numpy.triu_indices(4)
+        sums = numpy.column_stack([numpy.bincount(labels, weights*J[:, r]*J[:, c], n_labels) for r, c in zip(rows, cols)])
+        normal = numpy.empty((n_labels, 4, 4))
+        normal[:, rows, cols] = sums
+        normal[:, cols, rows] = sums
+        dof = numpy.bincount(labels, minlength=n_labels)-4
+        
+        inverse = surface.solve(normal, numpy.broadcast_to(numpy.eye(4), normal.shape))
+        with numpy.errstate(invalid="ignore", divide="ignore"):
+            variance = numpy.bincount(labels, weights*errors**2, n_labels)/dof
+            t = scipy.stats.t.ppf((1+confidence)/2, numpy.where(dof > 0, dof, numpy.nan))
+            return t[:, None]*numpy.sqrt(numpy.diagonal(inverse, axis1=1, axis2=2)*variance[:, None])
+    
+    @staticmethod
+    def positions(points):
+        """
+        A technique to gather the three-dimensional positions of the points.
+        
+        Attributes:
+        points: dataframe
+            The points, with the X [nm], Y [nm] and Z [nm] columns.
+            
+        Return:
+            The positions as a float array of shape (N, 3).
+        """
+        return numpy.column_stack([points["X [nm]"].to_numpy(dtype=float),
+                                   points["Y [nm]"].to_numpy(dtype=float),
+                                   points["Z [nm]"].to_numpy(dtype=float)])
+    
+    @staticmethod
+    def fit(positions, labels=None, n_labels=1, weights=None):
+        """
+        A technique to fit a sphere to the positions of each label with the Summation
+        Least-Squares equations.
+        
+        The positions are shifted by the mean of their label, (x, y, z)->(u, v, w), and the
+        sums S_uu, S_uv, ..., S_uuu, S_uvv, ... are accumulated for every label at once. The
+        3x3 systems of every label are then solved together. A label with fewer than four
+        positions, or with all of its positions on a plane, has no single sphere and is
+        returned as NaN. Each position can be given a weight, such as the inverse of its
+        variance, in which case the means and sums are weighted.
+        
+        Attributes:
+        positions: float array of shape (N, 3)
+            The positions.
+        labels: None or array of int
+            The label of each position, from 0 to n_labels-1. If not specified, all positions
+            are fitted as a single sphere.
+        n_labels: int
+            The number of labels.
+        weights: None or float array
+            The weight of each position. If not specified, every position has the same weight.
+            
+        Return:
+            The centers as a float array of shape (n_labels, 3) and the radii as a float array
+            of shape (n_labels,).
+        """
+        if labels is None:
+            labels = numpy.zeros(len(positions), dtype=numpy.int64)
+        if weights is None:
+            weights = numpy.ones(len(positions))
+        N = numpy.bincount(labels, weights, n_labels)
+        with numpy.errstate(invalid="ignore", divide="ignore"):
+            means = numpy.column_stack([numpy.bincount(labels, weights*positions[:, i], n_labels) for i in range(0, 3)])/N[:, None]
+        uvw = positions-means[labels]
+        squares = numpy.einsum("ij,ij->i", uvw, uvw)
+        
+        rows, cols = numpy.triu_indices(3)
+        products = numpy.column_stack([uvw[:, rows]*uvw[:, cols], uvw*squares[:, None]])*weights[:, None]
+        sums = numpy.column_stack([numpy.bincount(labels, products[:, j], n_labels) for j in range(0, products.shape[1])])
+        A = numpy.empty((n_labels, 3, 3))
+        A[:, rows, cols] = sums[:, :6]
+        A[:, cols, rows] = sums[:, :6]
+        B = 0.5*sums[:, 6:]
+        
+        A[numpy.bincount(labels[weights > 0], minlength=n_labels) < 4] = numpy.nan
+        x = surface.solve(A, B[:, :, None])[:, :, 0]
+        
+        with numpy.errstate(invalid="ignore", divide="ignore"):
+            radius = numpy.sqrt(numpy.einsum("ij,ij->i", x, x) + (sums[:, 0]+sums[:, 3]+sums[:, 5])/N)
+        return means+x, radius
+    
+    @staticmethod
+    def solve(A, B):
+        """
+        A technique to solve many linear systems at once.
+        
+        Attributes:
+        A: float array of shape (K, M, M)
+            The matrices of the systems.
+        B: float array of shape (K, M, L)
+            The right-hand sides of the systems.
+            
+        Return:
+            The solutions as a float array of shape (K, M, L), NaN for a system which is not
+            finite or has no single solution.
+        """
+        x = numpy.full(B.shape, numpy.nan)
+        valid = numpy.isfinite(A).all(axis=(1, 2)) & numpy.isfinite(B).all(axis=(1, 2))
+        if numpy.any(valid):
+            valid[valid] = numpy.linalg.cond(A[valid]) < 1/numpy.finfo(float).eps
+        try:
+            x[valid] = numpy.linalg.solve(A[valid], B[valid])
+        except numpy.linalg.LinAlgError:
+            for k in numpy.flatnonzero(valid):
+                try:
+                    x[k] = numpy.linalg.solve(A[k], B[k])
+                except numpy.linalg.LinAlgError:
+                    pass
+        return x
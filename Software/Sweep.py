@@ -0,0 +1,211 @@
+class sweep(object):
+    """
+    This file is part of the Multi-Orientation MAXWELL software
+    
+    File author(s): Sierra Dean <ccnd@live.com>
+    
+    Distributed under the GPLv3 Licence.
+    See accompanying file LICENSE.txt or copy at
+        http://www.gnu.org/licenses/gpl-3.0.html
+    
+    source: https://github.com/SierraD/Multi-Orientation-Maxwell
+    
+    Last Updated: Oct 17 2026
+    """
+    def __init__(self, data, z_ranges, xy_ranges, selection_types=["uncertainty"], engine=None, fit=True,
+                 max_cached=32):
+        """
+        A technique to compare the results of the method for many z_range, xy_range and
+        selection_type values, without repeating the overlap search for every combination.
+        
+        The overlapped pairs are found once, at the largest z_range and xy_range. As the
+        uncertainty boxes only grow with the ranges, the pairs of any smaller ranges are among
+        these candidates, and are found by comparing the Y and Z limits of the candidates again,
+        with the same comparisons as the indexes method of the Overlap.py class. The groups of
+        duplicate points of the merge method of the Filtering.py class are kept for the most
+        recently used ranges, so that every selection type reuses them.
+        
+        Attributes:
+        data:
+            The data previously developed and contained within the Preparation.py class.
+        z_ranges & xy_ranges: list of int
+            The z_range and xy_range values of the indexes method of the Overlap.py class.
+        selection_types: list of str "uncertainty", "intensity"
+            The selection_type values of the selection method of the Filtering.py class.
+        engine: None or str "grid", "sweep"
+            The method used to find the candidate pairs, as used by the indexes method.
+        fit: bool
+            The decision to fit a sphere to the points of every combination, as with the
+            evaluation method of the Surface.py class.
+        max_cached: int
+            The largest number of ranges whose groups are kept.
+        
+        Return:
+            None. Will modify the data established in place.
+        """
+        import collections
+        if (len(z_ranges) == 0) or (len(xy_ranges) == 0) or (len(selection_types) == 0):
+            raise ValueError("At least one z_range, xy_range and selection_type should be given.")
+        for selection_type in selection_types:
+            if filtering.scores({"U_XY": 0, "U_Z": 0, "U_X": 0, "I_XY": 0, "I_XZ": 0}, selection_type) is None:
+                raise ValueError("The selection type should be either 'uncertainty' or 'intensity'.")
+        self.data = data
+        self.z_ranges = list(z_ranges)
+        self.xy_ranges = list(xy_ranges)
+        self.selection_types = [selection_type.lower() for selection_type in selection_types]
+        self.engine = engine
+        self.fit = fit
+        self.max_cached = max_cached
+        self.cached = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        return
+    
+    def candidates(self):
+        """
+        A technique to find the candidate pairs once, at the largest z_range and xy_range, and
+        gather the values compared for the smaller ranges.
+        
+        Attributes:
+            None.
+        
+        Return:
+            None. Will modify the data established in place, with the candidate pairs saved as
+            localizations, and the time taken saved as search_time.
+        """
+        import time
+        start = time.perf_counter()
+        matched = overlap(self.data).indexes(max(self.z_ranges), max(self.xy_ranges), engine=self.engine)
+        self.localizations = localizations(self.data, matched.XY_indexes, matched.XZ_indexes)
+        self.values = {c: numpy.asarray(self.localizations[c], dtype=float) for c in
+                       ["X_XY", "Y_XY", "Z_XY", "U_XY", "Y_XZ", "Z_XZ", "U_Z"]}
+        self.scores = {selection_type: filtering.scores(self.localizations, selection_type)
+                       for selection_type in self.selection_types}
+        self.search_time = time.perf_counter()-start
+        return self
+    
+    def within(self, z_range, xy_range):
+        """
+        A technique to find the candidate pairs which overlap for a z_range and an xy_range no
+        larger than those of the candidates.
+        
+        Attributes:
+        z_range & xy_range: int
+            The ranges, as used by the indexes method of the Overlap.py class.
+        
+        Return:
+            The candidate pairs which overlap, as an array of bool.
+        """
+        v = self.values
+        return (((v["Y_XY"]-v["U_XY"]) < (v["Y_XZ"]+xy_range)) & ((v["Y_XZ"]-xy_range) < (v["Y_XY"]+v["U_XY"])) &
+                ((v["Z_XY"]-z_range) < (v["Z_XZ"]+v["U_Z"])) & ((v["Z_XZ"]-v["U_Z"]) < (v["Z_XY"]+z_range)))
+    
+    def groups(self, z_range, xy_range):
+        """
+        A technique to obtain the overlapped pairs and their groups of duplicate points for a
+        z_range and an xy_range, from the most recently used ranges when possible.
+        
+        Attributes:
+        z_range & xy_range: int
+            The ranges, as used by the indexes method of the Overlap.py class.
+        
+        Return:
+            The candidate pairs which overlap as an integer array, and the group of each of them,
+            as labelled by the merge method of the Filtering.py class.
+        """
+        key = (z_range, xy_range)
+        if key in self.cached:
+            self.hits += 1
+            self.cached.move_to_end(key)
+            return self.cached[key]
+        self.misses += 1
+        if (z_range > max(self.z_ranges)) or (xy_range > max(self.xy_ranges)):
+            raise ValueError("The ranges should not be larger than the largest ranges of the sweep.")
+        rows = numpy.flatnonzero(self.within(z_range, xy_range))
+        labels = filtering.components(self.localizations.XY_indexes[rows], self.localizations.XZ_indexes[rows])
+        self.cached[key] = (rows, labels)
+        while len(self.cached) > self.max_cached:
+            self.cached.popitem(last=False)
+        return rows, labels
+    
+    def selected(self, z_range, xy_range, selection_type="uncertainty"):
+        """
+        A technique to find the selected pair of every group of duplicate points for one
+        combination of the parameters.
+        
+        Attributes:
+        z_range & xy_range: int
+            The ranges, as used by the indexes method of the Overlap.py class.
+        selection_type: str "uncertainty", "intensity"
+            The method of filtering, as used by the selection method of the Filtering.py class.
+        
+        Return:
+            The candidate pairs selected as the points, as an ordered integer array.
+        """
+        if not hasattr(self, "localizations"):
+            self.candidates()
+        rows, labels = self.groups(z_range, xy_range)
+        return numpy.sort(rows[filtering.lowest(labels, self.scores[selection_type.lower()][rows])])
+    
+    def points(self, z_range, xy_range, selection_type="uncertainty"):
+        """
+        A technique to obtain the dataframe of 3D localizations for one combination of the
+        parameters, as returned by the points method of the Filtering.py class.
+        
+        Attributes:
+        z_range & xy_range: int
+            The ranges, as used by the indexes method of the Overlap.py class.
+        selection_type: str "uncertainty", "intensity"
+            The method of filtering, as used by the selection method of the Filtering.py class.
+        
+        Return:
+            The dataframe of 3D localizations.
+        """
+        selected = self.selected(z_range, xy_range, selection_type)
+        return filtering.table(self.localizations.subset(selected))
+    
+    def run(self):
+        """
+        A technique to obtain the results of the method for every combination of the parameters.
+        
+        Attributes:
+            None.
+        
+        Return:
+            None. Will modify the data established in place, with the number of overlapped pairs,
+            groups and points, and the results of the sphere fitting, of every combination saved
+            as the results dataframe.
+        """
+        if not hasattr(self, "localizations"):
+            self.candidates()
+        records = []
+        for z_range in self.z_ranges:
+            for xy_range in self.xy_ranges:
+                rows, labels = self.groups(z_range, xy_range)
+                for selection_type in self.selection_types:
+                    points = self.selected(z_range, xy_range, selection_type)
+                    record = {"Z Range [nm]": z_range, "XY Range [nm]": xy_range, "Selection": selection_type,
+                              "Overlapped": len(rows), "Points": len(points)}
+                    if self.fit:
+                        positions = numpy.column_stack([self.values["X_XY"][points], self.values["Y_XY"][points],
+                                                        self.values["Z_XZ"][points]])
+                        centers, radius = surface.fit(positions)
+                        record.update({"X Center [nm]": centers[0, 0], "Y Center [nm]": centers[0, 1],
+                                       "Z Center [nm]": centers[0, 2], "Radius [nm]": radius[0]})
+                    records.append(record)
+        self.results = pandas.DataFrame(records)
+        return self
+    
+    def download_dataframe(self, filename="Sweep_Results"):
+        """
+        A technique to download the results of the sweep as a CSV file named "Sweep_Results.csv".
+        
+        Attributes:
+        filename: str
+            The name of the file, without the extension.
+        
+        Return:
+            None. Will download the dataframe as a CSV file.
+        """
+        self.results.to_csv(filename+".csv", index=False, encoding='utf-8')
+        return self
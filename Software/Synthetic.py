@@ -0,0 +1,188 @@
+class synthetic(object):
+    """
+    This file is part of the Multi-Orientation MAXWELL software
+    
+    File author(s): Sierra Dean <ccnd@live.com>
+    
+    Distributed under the GPLv3 Licence.
+    See accompanying file LICENSE.txt or copy at
+        http://www.gnu.org/licenses/gpl-3.0.html
+    
+    source: https://github.com/SierraD/Multi-Orientation-Maxwell
+    
+    Last Updated: Oct 17 2026
+    """
+    def __init__(self, magnification=20, pixelsize_xy=230, pixelsize_xz=13, seed=None):
+        """
+        A technique to generate simulated pairs of XY and XZ ThunderSTORM results tables, with the
+        columns read by the Preparation.py class, for testing and benchmarking the method without
+        experimental data.
+        
+        The localizations are placed at random within a cube, or on the surface of a sphere, and a
+        chosen fraction of them is localized in both orientations, so that the number of true
+        overlapped points is known. As with the tables written by ThunderSTORM for the method, the
+        positions, the uncertainties and the sigma values are given in pixels, and the frame is the
+        image number along the scanned axis (Z for the XY orientation, Y for the XZ orientation).
+        
+        Attributes:
+        magnification: int
+            The magnification of the lens, as used by the Preparation.py class.
+        pixelsize_xy: int
+            The pixel size of the XY data in nm, as used by the Preparation.py class.
+        pixelsize_xz: int
+            The Z step size in nm, as used by the Preparation.py class.
+        seed: None or int
+            The seed of the random number generator, for repeatable tables.
+        
+        Return:
+            None. Will modify the data established in place.
+        """
+        self.magnification = magnification
+        self.xypix = pixelsize_xy
+        self.zpix = pixelsize_xz
+        self.rng = numpy.random.default_rng(seed)
+        return
+    
+    def generate(self, n_localizations=10000, density=10, uncertainty="gamma", uncertainty_xy=20,
+                 overlap_fraction=0.5, shape="volume"):
+        """
+        A technique to generate the XY and XZ ThunderSTORM results tables.
+        
+        Attributes:
+        n_localizations: int
+            The number of localizations in each orientation.
+        density: num
+            The number of XY localizations per cubic micrometer, which sets the size of the cube
+            and therefore the number of overlaps found by chance.
+        uncertainty: str "gamma", "lognormal", "uniform", "constant"
+            The distribution of the positional uncertainty of the localizations.
+        uncertainty_xy: num
+            The mean positional uncertainty in nm of the XY localizations. The uncertainty of the
+            XZ localizations has the same mean in pixels, as the XZ pixels are scaled along Z by
+            the Preparation.py class. The measured positions are spread around the true positions
+            by half of their uncertainty, while the scanned axis is only limited by the frame.
+        overlap_fraction: num
+            The fraction of the XY localizations which are also localized in the XZ orientation.
+            The other XZ localizations are placed at random.
+        shape: str "volume", "sphere"
+            Either "volume", which places the localizations anywhere within the cube, or "sphere",
+            which places them on the surface of the sphere inscribed in the cube.
+        
+        Return:
+            None. Will modify the data established in place, with the tables saved as df_xy and
+            df_xz, the true positions as positions_xy and positions_xz in nm, and the XY
+            localization matching each XZ localization as matched (-1 if there is none).
+        """
+        if (overlap_fraction < 0) or (overlap_fraction > 1):
+            raise ValueError("The overlap fraction should be between 0 and 1.")
+        self.side = 1000*(n_localizations/density)**(1/3)
+        n_matched = int(round(overlap_fraction*n_localizations))
+        self.positions_xy = self.positions(n_localizations, shape)
+        self.matched = numpy.full(n_localizations, -1, dtype=numpy.int64)
+        self.matched[:n_matched] = self.rng.choice(n_localizations, n_matched, replace=False)
+        self.positions_xz = self.positions(n_localizations, shape)
+        self.positions_xz[:n_matched] = self.positions_xy[self.matched[:n_matched]]
+        order = self.rng.permutation(n_localizations)
+        self.positions_xz = self.positions_xz[order]
+        self.matched = self.matched[order]
+        u_xy = self.uncertainties(n_localizations, uncertainty, uncertainty_xy/self.xypix)
+        u_xz = self.uncertainties(n_localizations, uncertainty, uncertainty_xy/self.xypix)
+        scale_xy = numpy.column_stack([u_xy*self.xypix, u_xy*self.xypix, numpy.zeros(n_localizations)])/2
+        scale_xz = numpy.column_stack([u_xz*self.xypix, numpy.zeros(n_localizations), u_xz*self.zpix])/2
+        measured_xy = self.positions_xy+self.rng.normal(size=(n_localizations, 3))*scale_xy
+        measured_xz = self.positions_xz+self.rng.normal(size=(n_localizations, 3))*scale_xz
+        self.df_xy = self.table(numpy.round(measured_xy[:, 2]/self.zpix).astype(numpy.int64),
+                                measured_xy[:, 0]/self.xypix, measured_xy[:, 1]/self.xypix, u_xy)
+        self.df_xz = self.table(numpy.round(measured_xz[:, 1]/self.xypix).astype(numpy.int64),
+                                measured_xz[:, 0]/self.xypix, measured_xz[:, 2]/self.zpix, u_xz)
+        return self
+    
+    def positions(self, n, shape="volume"):
+        """
+        A technique to draw random positions within the cube or on the surface of the sphere.
+        
+        Attributes:
+        n: int
+            The number of positions.
+        shape: str "volume", "sphere"
+            The shape on which the positions are drawn, as used by the generate method.
+        
+        Return:
+            The positions in nm as a float array of shape (n, 3).
+        """
+        if shape == "volume":
+            return self.rng.uniform(0, self.side, size=(n, 3))
+        elif shape == "sphere":
+            directions = self.rng.normal(size=(n, 3))
+            directions /= numpy.linalg.norm(directions, axis=1)[:, None]
+            return self.side/2+directions*self.side/2
+        raise ValueError("The shape should be either 'volume' or 'sphere'.")
+    
+    def uncertainties(self, n, uncertainty="gamma", mean=1):
+        """
+        A technique to draw random positional uncertainty values.
+        
+        Attributes:
+        n: int
+            The number of values.
+        uncertainty: str "gamma", "lognormal", "uniform", "constant"
+            The distribution of the values.
+        mean: num
+            The mean of the values.
+        
+        Return:
+            The values as a float array of shape (n,).
+        """
+        if uncertainty == "gamma":
+            return self.rng.gamma(4, mean/4, n)
+        elif uncertainty == "lognormal":
+            return self.rng.lognormal(numpy.log(mean)-0.125, 0.5, n)
+        elif uncertainty == "uniform":
+            return self.rng.uniform(mean/2, 3*mean/2, n)
+        elif uncertainty == "constant":
+            return numpy.full(n, float(mean))
+        raise ValueError("The uncertainty should be either 'gamma', 'lognormal', 'uniform' or 'constant'.")
+    
+    def table(self, frame, x, y, u):
+        """
+        A technique to assemble a ThunderSTORM results table from the localizations.
+        
+        Attributes:
+        frame: array of int
+            The frame of each localization.
+        x & y: array
+            The positions of each localization in pixels.
+        u: array
+            The positional uncertainty of each localization in pixels.
+        
+        Return:
+            The results table as a dataframe.
+        """
+        n = len(frame)
+        return pandas.DataFrame({"id": numpy.arange(1, n+1),
+                                 "frame": frame,
+                                 "x [nm]": x,
+                                 "y [nm]": y,
+                                 "sigma [nm]": self.rng.uniform(1, 2, n),
+                                 "intensity [photon]": self.rng.gamma(4, 2500, n),
+                                 "offset [photon]": self.rng.uniform(90, 110, n),
+                                 "bkgstd [photon]": self.rng.uniform(5, 15, n),
+                                 "uncertainty [nm]": u})
+    
+    def download_dataframe(self, filename="Synthetic"):
+        """
+        A technique to download the generated tables as two CSV files, named "Synthetic_XY.csv"
+        and "Synthetic_XZ.csv", which can be read by the setting method of the Preparation.py class.
+        
+        Attributes:
+        filename: str
+            The beginning of the name of the files, without the orientation and the extension.
+        
+        Return:
+            None. Will download the tables, and keep their names as file_xy and file_xz.
+        """
+        self.file_xy = filename+"_XY.csv"
+        self.file_xz = filename+"_XZ.csv"
+        self.df_xy.to_csv(self.file_xy, index=False, encoding='utf-8')
+        self.df_xz.to_csv(self.file_xz, index=False, encoding='utf-8')
+        return self
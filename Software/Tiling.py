@@ -0,0 +1,216 @@
+class tiling(object):
+    """
+    This file is part of the Multi-Orientation MAXWELL software
+    
+    File author(s): Sierra Dean <ccnd@live.com>
+    
+    Distributed under the GPLv3 Licence.
+    See accompanying file LICENSE.txt or copy at
+        http://www.gnu.org/licenses/gpl-3.0.html
+    
+    source: https://github.com/SierraD/Multi-Orientation-Maxwell
+    
+    Last Updated: Oct 17 2026
+    """
+    def __init__(self, data, tiles=[4, 4, 1]):
+        """
+        A technique to perform the overlap and filtering of the method on volumes too large to be
+        held in memory at once, by splitting the volume into spatial tiles.
+        
+        Each XZ localization belongs to the tile containing its position, and each tile is compared
+        with the XY localizations inside the tile and a surrounding halo, sized from the largest
+        positional uncertainties and the z_range and xy_range values, so that every overlapped pair
+        is found exactly once. Only the columns needed by each step are read, one tile or one block
+        at a time, which allows the prepared data to be memory-mapped from a cache (Cache.py).
+        
+        The pairs from all tiles are then joined, and the duplicates are grouped over the whole
+        volume, so that groups crossing the tile boundaries are filtered as one. The results are
+        the same as those of the Overlap.py and Filtering.py classes.
+        
+        Attributes:
+        data:
+            The data previously developed and contained within the Preparations.py class.
+        tiles: list [X, Y, Z]
+            The number of tiles along each axis.
+        
+        Return:
+            None. Will modify the data established in place.
+        """
+        self.data = data
+        self.zpix = self.data.zpix
+        self.xypix = self.data.xypix
+        self.magnification = self.data.magnification
+        self.tiles = numpy.broadcast_to(numpy.asarray(tiles, dtype=numpy.int64), (3,)).copy()
+        if numpy.any(self.tiles < 1):
+            raise ValueError("There should be at least one tile along each axis.")
+        return
+    
+    def indexes(self, z_range, xy_range, block_size=2**20):
+        """
+        A technique to determine the indexes of the overlapping points from the two orientations,
+        one tile at a time.
+        
+        Attributes:
+        z_range: int
+            The radius of the Z uncertainty for the XY data, as used by the Overlap.py class.
+        xy_range: int
+            The radius of the Y uncertainty for the XZ data, as used by the Overlap.py class.
+        block_size: int
+            The number of localizations read at once when scanning the whole data.
+        
+        Return:
+            None. Will modify the data established in place.
+        """
+        positions_xz = ["X_XZ", "Y_XZ", "Z_XZ"]
+        positions_xy = ["X_XY", "Y_XY", "Z_XY"]
+        lowest = numpy.full(3, numpy.inf)
+        highest = numpy.full(3, -numpy.inf)
+        widest_xz = numpy.array([0.0, float(xy_range), 0.0])
+        widest_xy = numpy.array([0.0, 0.0, float(z_range)])
+        for rows in self.blocks(len(self.data.dfxz), block_size):
+            centers = self.gather(self.data.dfxz, positions_xz, rows)
+            finite = numpy.all(numpy.isfinite(centers), axis=1)
+            if finite.any():
+                lowest = numpy.minimum(lowest, centers[finite].min(axis=0))
+                highest = numpy.maximum(highest, centers[finite].max(axis=0))
+            widths = self.gather(self.data.dfxz, ["U_X", "U_Z"], rows)
+            widest_xz[[0, 2]] = numpy.fmax(widest_xz[[0, 2]], numpy.nanmax(widths, axis=0, initial=0))
+        for rows in self.blocks(len(self.data.dfxy), block_size):
+            widths = self.gather(self.data.dfxy, ["U_XY"], rows)
+            widest_xy[[0, 1]] = numpy.fmax(widest_xy[[0, 1]], numpy.nanmax(widths, initial=0))
+        self.halo = (widest_xz+widest_xy)*(1+1e-9)+1e-9
+        if not numpy.all(numpy.isfinite(lowest)):
+            self.XY_indexes = numpy.zeros(0, dtype=numpy.int64)
+            self.XZ_indexes = numpy.zeros(0, dtype=numpy.int64)
+            return self
+        self.edges = [numpy.linspace(lowest[a], highest[a], self.tiles[a]+1) for a in range(0, 3)]
+        owner = numpy.full(len(self.data.dfxz), -1, dtype=numpy.int64)
+        for rows in self.blocks(len(self.data.dfxz), block_size):
+            centers = self.gather(self.data.dfxz, positions_xz, rows)
+            cell = numpy.column_stack([numpy.clip(numpy.searchsorted(self.edges[a], centers[:, a], side="right")-1,
+                                                  0, self.tiles[a]-1) for a in range(0, 3)])
+            finite = numpy.all(numpy.isfinite(centers), axis=1)
+            owner[rows] = numpy.where(finite, numpy.ravel_multi_index(cell.T, self.tiles), -1)
+        all_indexes_XY = []
+        all_indexes_XZ = []
+        self.tile_counts = []
+        for tile in range(0, int(self.tiles.prod())):
+            rows_xz = numpy.flatnonzero(owner == tile)
+            if rows_xz.size == 0:
+                continue
+            cell = numpy.unravel_index(tile, self.tiles)
+            lower = numpy.array([self.edges[a][cell[a]] for a in range(0, 3)])-self.halo
+            upper = numpy.array([self.edges[a][cell[a]+1] for a in range(0, 3)])+self.halo
+            rows_xy = []
+            for rows in self.blocks(len(self.data.dfxy), block_size):
+                centers = self.gather(self.data.dfxy, positions_xy, rows)
+                rows_xy.append(rows[numpy.all((lower <= centers) & (centers <= upper), axis=1)])
+            rows_xy = numpy.concatenate(rows_xy)
+            if rows_xy.size == 0:
+                continue
+            lower_xy, upper_xy = overlap.limits_xy(self.data.dfxy, z_range, rows_xy)
+            lower_xz, upper_xz = overlap.limits_xz(self.data.dfxz, xy_range, rows_xz)
+            local_xy, local_xz = overlap.sweep(lower_xy, upper_xy, lower_xz, upper_xz)
+            all_indexes_XY.append(rows_xy[local_xy])
+            all_indexes_XZ.append(rows_xz[local_xz])
+            self.tile_counts.append((tile, len(rows_xy), len(rows_xz), len(local_xy)))
+        if len(all_indexes_XY) == 0:
+            self.XY_indexes = numpy.zeros(0, dtype=numpy.int64)
+            self.XZ_indexes = numpy.zeros(0, dtype=numpy.int64)
+            return self
+        XY_indexes = numpy.concatenate(all_indexes_XY)
+        XZ_indexes = numpy.concatenate(all_indexes_XZ)
+        ordered = numpy.lexsort((XY_indexes, XZ_indexes))
+        self.XY_indexes = XY_indexes[ordered]
+        self.XZ_indexes = XZ_indexes[ordered]
+        return self
+    
+    def selection(self, selection_type="uncertainty", block_size=2**20):
+        """
+        A technique to filter the overlapped points of all tiles to remove all non-unique
+        localizations, and obtain the dataframe of precise localizations in 3D space.
+        
+        The duplicates are grouped using only the indexes of the overlapped points, the scores are
+        then computed one block of points at a time, and the values are finally read only for the
+        selected points.
+        
+        Attributes:
+        selection_type: str "uncertainty", "Uncertainty", "intensity", "Intensity"
+            The method of filtering, as used by the Filtering.py class.
+        block_size: int
+            The number of overlapped points read at once.
+        
+        Return:
+            None. Will modify the data established in place.
+        """
+        if (selection_type=="uncertainty") or (selection_type=="Uncertainty"):
+            needed_xy, needed_xz = ["U_XY"], ["U_Z", "U_X"]
+        elif (selection_type=="intensity") or (selection_type=="Intensity"):
+            needed_xy, needed_xz = ["I_XY"], ["I_XZ"]
+        else:
+            raise ValueError("The selection type should be either 'uncertainty' or 'intensity'.")
+        self.selection_type = selection_type.lower()
+        self.labels = filtering.components(self.XY_indexes, self.XZ_indexes)
+        score = numpy.empty(len(self.XY_indexes))
+        for rows in self.blocks(len(self.XY_indexes), block_size):
+            values = self.values(self.XY_indexes[rows], self.XZ_indexes[rows], needed_xy, needed_xz)
+            score[rows] = filtering.scores(values, selection_type)
+        self.point_indexes = filtering.lowest(self.labels, score)
+        selected = numpy.sort(self.point_indexes)
+        self.points = filtering.table(self.values(self.XY_indexes[selected], self.XZ_indexes[selected],
+                                                  ["X_XY", "Y_XY", "U_XY", "I_XY", "O_XY", "B_XY", "S_XY"],
+                                                  ["Z_XZ", "U_Z", "I_XZ", "O_XZ", "B_XZ", "S_Z"]))
+        return self
+    
+    def values(self, XY_indexes, XZ_indexes, columns_xy, columns_xz):
+        """
+        A technique to read some of the columns of the prepared data for a set of overlapped points.
+        
+        Attributes:
+        XY_indexes & XZ_indexes: array of int
+            The XY and XZ localization of every overlapped point.
+        columns_xy & columns_xz: list of str
+            The columns to be read from each orientation.
+        
+        Return:
+            A dict of the columns as float arrays.
+        """
+        values = {c: numpy.asarray(self.data.dfxy[c].to_numpy()[XY_indexes], dtype=numpy.float64) for c in columns_xy}
+        values.update({c: numpy.asarray(self.data.dfxz[c].to_numpy()[XZ_indexes], dtype=numpy.float64) for c in columns_xz})
+        return values
+    
+    @staticmethod
+    def gather(df, columns, rows):
+        """
+        A technique to read some of the columns of a dataframe for a block of rows.
+        
+        Attributes:
+        df: dataframe
+            The dataframe to be read.
+        columns: list of str
+            The columns to be read.
+        rows: slice or array of int
+            The rows to be read.
+        
+        Return:
+            The values as a float array of shape (N, len(columns)).
+        """
+        return numpy.column_stack([numpy.asarray(df[c].to_numpy()[rows], dtype=float) for c in columns])
+    
+    @staticmethod
+    def blocks(length, block_size):
+        """
+        A technique to split a number of rows into consecutive blocks.
+        
+        Attributes:
+        length: int
+            The number of rows.
+        block_size: int
+            The number of rows in each block.
+        
+        Return:
+            A generator of the rows of each block as integer arrays.
+        """
+        for start in range(0, length, block_size):
+            yield numpy.arange(start, min(start+block_size, length))
+        return
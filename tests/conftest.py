@@ -0,0 +1,94 @@
+"""
+Shared fixtures of the tests of the Multi-Orientation MAXWELL software.
+
+The classes of the Software folder are written for a notebook, in which the libraries they use
+are already imported. As with the Pipeline.py script, the libraries are imported here and the
+classes are executed into a single module, registered as "maxwell" so that the methods run in a
+pool of processes can be found by the workers.
+"""
+import os
+import sys
+import types
+
+import matplotlib
+matplotlib.use("Agg")
+import numpy
+import pandas
+import plotly
+from plotly import subplots
+import fitter
+import seaborn
+import scipy
+import scipy.sparse
+import scipy.sparse.csgraph
+import scipy.optimize
+import scipy.stats
+import pytest
+
+SOFTWARE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Software")
+
+
+def load():
+    module = types.ModuleType("maxwell")
+    module.__dict__.update(numpy=numpy, pandas=pandas, plotly=plotly, fitter=fitter, matplotlib=matplotlib,
+                           seaborn=seaborn, scipy=scipy)
+    sys.modules["maxwell"] = module
+    for name in sorted(os.listdir(SOFTWARE)):
+        if name.endswith(".py"):
+            path = os.path.join(SOFTWARE, name)
+            with open(path) as f:
+                exec(compile(f.read(), path, "exec"), module.__dict__)
+    return module
+
+
+def tables(n_particles=100, per=20, seed=0):
+    """
+    ThunderSTORM-like XY and XZ tables of particles localized several times in both orientations,
+    in pixels for XY (230 nm) and in frames for the scanned axis (13 nm), so that groups of
+    duplicate overlaps are found.
+    """
+    rng = numpy.random.default_rng(seed)
+    centers = rng.uniform(0, 100, size=(n_particles, 3))
+    positions = numpy.repeat(centers, per, axis=0)+rng.normal(0, 0.3, size=(n_particles*per, 3))
+    
+    def table(x, y, frame):
+        n = len(x)
+        return pandas.DataFrame({"id": numpy.arange(n)+1, "frame": frame, "x [nm]": x, "y [nm]": y,
+                                 "sigma [nm]": rng.uniform(1, 3, n), "intensity [photon]": rng.uniform(1e4, 2e4, n),
+                                 "offset [photon]": rng.uniform(10, 20, n), "bkgstd [photon]": rng.uniform(1, 5, n),
+                                 "uncertainty [nm]": rng.gamma(2, 0.1, n)})
+    
+    df_xy = table(positions[:, 0], positions[:, 1], numpy.round(positions[:, 2]*230/13).astype(int))
+    kept = positions[rng.random(len(positions)) < 0.8]
+    df_xz = table(kept[:, 0], kept[:, 2]*230/13, numpy.round(kept[:, 1]).astype(int))
+    return (df_xy.sort_values("frame", kind="stable").reset_index(drop=True),
+            df_xz.sort_values("frame", kind="stable").reset_index(drop=True))
+
+
+def ordered(XY_indexes, XZ_indexes):
+    """The pairs of indexes as an array of (XZ, XY) rows, ordered by the XZ and then the XY index."""
+    pairs = numpy.column_stack([numpy.asarray(XZ_indexes, dtype=numpy.int64), numpy.asarray(XY_indexes, dtype=numpy.int64)])
+    return pairs[numpy.lexsort((pairs[:, 1], pairs[:, 0]))]
+
+
+@pytest.fixture(scope="session")
+def maxwell():
+    return load()
+
+
+@pytest.fixture(scope="session")
+def acquisition(tmp_path_factory):
+    """The names of the XY and XZ files of a simulated acquisition."""
+    folder = tmp_path_factory.mktemp("acquisition")
+    df_xy, df_xz = tables()
+    df_xy.to_csv(folder/"XY.csv", index=False)
+    df_xz.to_csv(folder/"XZ.csv", index=False)
+    return str(folder/"XY.csv"), str(folder/"XZ.csv")
+
+
+@pytest.fixture
+def prepared(maxwell, acquisition):
+    """A function returning newly prepared and centered data of the simulated acquisition."""
+    def prepare(**parameters):
+        return maxwell.preparation().setting(*acquisition, **parameters).set_to_center()
+    return prepare
@@ -0,0 +1,95 @@
+import shutil
+
+import numpy
+import pandas
+import pytest
+
+from conftest import ordered
+
+
+@pytest.fixture
+def store(maxwell, tmp_path):
+    store = maxwell.cache(str(tmp_path/"cache"))
+    store.loaded = []
+    load = store.load
+    
+    def counted(key, name, mmap=True):
+        store.loaded.append(name)
+        return load(key, name, mmap=mmap)
+    store.load = counted
+    return store
+
+
+def test_store_and_load_keep_columns(store):
+    df = pandas.DataFrame({"a": numpy.arange(5, dtype=numpy.int32), "b": numpy.linspace(0, 1, 5)})
+    key = store.key(a=1)
+    assert not store.exists(key, "table")
+    store.store(key, "table", df)
+    assert store.exists(key, "table")
+    mapped = store.load(key, "table")
+    assert list(mapped.columns) == ["a", "b"]
+    assert list(mapped.dtypes) == list(df.dtypes)
+    assert all(numpy.array_equal(mapped[c].to_numpy(), df[c].to_numpy()) for c in df.columns)
+    pandas.testing.assert_frame_equal(store.load(key, "table", mmap=False), df)
+
+
+def test_key_follows_files_and_parameters(store, acquisition, tmp_path):
+    key = store.key(*acquisition, pixelsize_xy=230)
+    assert store.key(*acquisition, pixelsize_xy=230) == key
+    assert store.key(*acquisition, pixelsize_xy=231) != key
+    copy = str(tmp_path/"XY.csv")
+    shutil.copy(acquisition[0], copy)
+    assert store.key(copy, acquisition[1], pixelsize_xy=230) == key
+    with open(copy, "a") as f:
+        f.write("1,1,1,1,1,1,1,1,1\n")
+    assert store.key(copy, acquisition[1], pixelsize_xy=230) != key
+
+
+def test_preparation_hits_and_misses(maxwell, store, acquisition):
+    first = maxwell.preparation().setting(*acquisition, cache=store)
+    assert first.df_xy is not None
+    assert store.loaded == []
+    second = maxwell.preparation().setting(*acquisition, cache=store)
+    assert second.df_xy is None
+    assert store.loaded == ["preparation_xy", "preparation_xz"]
+    for c in first.dfxy.columns:
+        assert numpy.array_equal(first.dfxy[c].to_numpy(), second.dfxy[c].to_numpy(), equal_nan=True)
+    other = maxwell.preparation().setting(*acquisition, pixelsize_xz=20, cache=store)
+    assert other.df_xy is not None
+    assert other.cache_key != second.cache_key
+
+
+def test_overlap_reuses_indexes(maxwell, store, acquisition):
+    data = maxwell.preparation().setting(*acquisition, cache=store).set_to_center()
+    found = maxwell.overlap(data).indexes(data.zpix, data.xypix)
+    store.loaded.clear()
+    again = maxwell.preparation().setting(*acquisition, cache=store).set_to_center()
+    reused = maxwell.overlap(again).indexes(again.zpix, again.xypix)
+    assert "overlap_indexes" in store.loaded
+    assert numpy.array_equal(ordered(reused.XY_indexes, reused.XZ_indexes), ordered(found.XY_indexes, found.XZ_indexes))
+    store.loaded.clear()
+    maxwell.overlap(again).indexes(again.zpix, 2*again.xypix)
+    assert "overlap_indexes" not in store.loaded
+
+
+def test_steps_change_the_key(maxwell, store, acquisition):
+    data = maxwell.preparation().setting(*acquisition, cache=store)
+    key = data.cache_key
+    data.set_to_center()
+    centered = data.cache_key
+    data.limiting("X", 0, "less")
+    assert len({key, centered, data.cache_key}) == 3
+
+
+def test_filtering_reuses_points(maxwell, store, acquisition):
+    data = maxwell.preparation().setting(*acquisition, cache=store).set_to_center()
+    found = maxwell.overlap(data).indexes(data.zpix, data.xypix).values()
+    first = maxwell.filtering(found).merge().selection("uncertainty").points()
+    store.loaded.clear()
+    second = maxwell.filtering(found).merge().selection("uncertainty").points()
+    assert store.loaded == ["filtering_points"]
+    pandas.testing.assert_frame_equal(second.points, first.points)
+    assert numpy.array_equal(second.df["X_XY"].to_numpy(), first.df["X_XY"].to_numpy())
+    store.loaded.clear()
+    maxwell.filtering(found).merge().selection("intensity").points()
+    assert store.loaded == []
@@ -0,0 +1,61 @@
+import types
+
+import numpy
+import pandas
+import pytest
+
+
+def blobs(seed=0):
+    """Points on separate spheres, followed by scattered noise."""
+    rng = numpy.random.default_rng(seed)
+    centers = numpy.array([[0, 0, 0], [5000, 0, 0], [0, 5000, 2000], [-4000, -3000, 1000]])
+    directions = rng.normal(size=(len(centers), 150, 3))
+    directions /= numpy.linalg.norm(directions, axis=2)[:, :, None]
+    positions = (centers[:, None]+300*directions).reshape(-1, 3)
+    noise = rng.uniform(-20000, 20000, size=(40, 3))
+    positions = numpy.vstack([positions, noise])
+    return pandas.DataFrame({"X [nm]": positions[:, 0], "Y [nm]": positions[:, 1], "Z [nm]": positions[:, 2]})
+
+
+def brute(positions, eps, min_samples):
+    """DBSCAN core localizations and their particles from the full distance matrix."""
+    distances = numpy.linalg.norm(positions[:, None]-positions[None, :], axis=2)
+    near = distances <= eps
+    core = near.sum(axis=1) >= min_samples
+    reach = near & core[:, None] & core[None, :]
+    while True:
+        grown = (reach.astype(int) @ reach.astype(int)) > 0
+        if numpy.array_equal(grown, reach):
+            return core, reach
+        reach = grown
+
+
+@pytest.mark.parametrize("block_size", [2**16, 37])
+def test_dbscan_matches_brute_force(maxwell, block_size):
+    points = blobs()
+    clustered = maxwell.clustering(types.SimpleNamespace(points=points)).dbscan(250, 5, block_size=block_size)
+    core, reach = brute(points.to_numpy(), 250, 5)
+    labels = clustered.labels
+    assert numpy.array_equal((labels[:, None] == labels[None, :])[core][:, core], reach[core][:, core])
+    assert clustered.n_particles == 4
+    assert labels[:600].tolist() == numpy.repeat(numpy.arange(4), 150).tolist()
+    assert (labels[600:] == -1).all()
+    assert clustered.points["Particle"].tolist() == labels.tolist()
+
+
+def test_border_points_join_a_particle(maxwell):
+    points = pandas.DataFrame({"X [nm]": [0, 10, 20, 30, 45, 200.0], "Y [nm]": 0.0, "Z [nm]": 0.0})
+    clustered = maxwell.clustering(types.SimpleNamespace(points=points)).dbscan(16, 3)
+    assert clustered.labels.tolist() == [0, 0, 0, 0, 0, -1]
+
+
+def test_particles_are_fitted_together(maxwell):
+    clustered = maxwell.clustering(types.SimpleNamespace(points=blobs())).dbscan(250, 5)
+    fitted = maxwell.surface(clustered).batch_evaluation()
+    assert numpy.allclose(fitted.fits["Radius [nm]"], 300)
+    assert fitted.radius_i[600:].isna().all()
+
+
+def test_eps_is_checked(maxwell):
+    with pytest.raises(ValueError):
+        maxwell.clustering(types.SimpleNamespace(points=blobs())).dbscan(0)
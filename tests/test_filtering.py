@@ -0,0 +1,94 @@
+import types
+
+import numpy
+import pandas
+import pytest
+
+
+def merged(maxwell, XY_sources, XZ_sources):
+    """The filtering of overlapped points given only by their XY and XZ localizations."""
+    data = types.SimpleNamespace(XY_indexes=numpy.asarray(XY_sources), XZ_indexes=numpy.asarray(XZ_sources),
+                                 df=pandas.DataFrame({"X_XY": numpy.asarray(XY_sources, dtype=float),
+                                                      "X_XZ": numpy.asarray(XZ_sources, dtype=float)}))
+    return maxwell.filtering(data).merge()
+
+
+def test_merge_groups_transitively(maxwell):
+    # 0-1 share XY 10, 1-2 share XZ 21, 2-3 share XY 12: one group through a chain of links.
+    filtered = merged(maxwell, [10, 10, 12, 12, 30, 40], [20, 21, 21, 23, 50, 50])
+    assert numpy.asarray(filtered.labels).tolist() == [0, 0, 0, 0, 1, 1]
+    assert filtered.merged_indexes == [[0, 1, 2, 3], [4, 5]]
+
+
+def test_merge_numbers_groups_by_first_point(maxwell):
+    filtered = merged(maxwell, [5, 1, 5, 2, 1], [7, 8, 9, 6, 3])
+    assert numpy.asarray(filtered.labels).tolist() == [0, 1, 0, 2, 1]
+
+
+def test_merge_matches_pairwise_closure(maxwell):
+    rng = numpy.random.default_rng(0)
+    XY_sources = rng.integers(0, 60, 200)
+    XZ_sources = rng.integers(0, 60, 200)
+    labels = numpy.asarray(merged(maxwell, XY_sources, XZ_sources).labels)
+    linked = (XY_sources[:, None] == XY_sources[None, :]) | (XZ_sources[:, None] == XZ_sources[None, :])
+    reach = linked.copy()
+    while True:
+        grown = (reach.astype(int) @ linked.astype(int)) > 0
+        if numpy.array_equal(grown, reach):
+            break
+        reach = grown
+    assert numpy.array_equal(labels[:, None] == labels[None, :], reach)
+
+
+def test_merge_of_no_points(maxwell):
+    filtered = merged(maxwell, numpy.zeros(0, dtype=int), numpy.zeros(0, dtype=int))
+    assert len(filtered.labels) == 0
+    assert filtered.merged_indexes == []
+
+
+def test_merge_of_prepared_data(maxwell, prepared):
+    data = prepared()
+    found = maxwell.overlap(data).indexes(data.zpix, data.xypix).values()
+    filtered = maxwell.filtering(found).merge()
+    assert sorted(sum(filtered.merged_indexes, [])) == list(range(len(found.XY_indexes)))
+    assert 1 < len(filtered.merged_indexes) < len(found.XY_indexes)
+
+
+def selected(df, merged_indexes, selection_type):
+    """The first point of the lowest score of every group, one group at a time."""
+    if selection_type == "uncertainty":
+        score = df["U_XY"].to_numpy()+df["U_Z"].to_numpy()+df["U_X"].to_numpy()
+    else:
+        score = df["I_XY"].to_numpy()+df["I_XZ"].to_numpy()
+    return [group[int(numpy.argmin(score[group]))] for group in merged_indexes]
+
+
+@pytest.mark.parametrize("selection_type", ["uncertainty", "intensity"])
+def test_selection_keeps_lowest_score_of_each_group(maxwell, prepared, selection_type):
+    data = prepared()
+    found = maxwell.overlap(data).indexes(data.zpix, data.xypix).values()
+    filtered = maxwell.filtering(found).merge().selection(selection_type).points()
+    expected = selected(found.df, filtered.merged_indexes, selection_type)
+    assert numpy.asarray(filtered.point_indexes).tolist() == expected
+    rows = found.df.iloc[numpy.sort(expected)].reset_index(drop=True)
+    points = filtered.points.reset_index(drop=True)
+    assert len(points) == len(filtered.merged_indexes)
+    for point, pair in [("X [nm]", "X_XY"), ("Y [nm]", "Y_XY"), ("Z [nm]", "Z_XZ"), ("Uncertainty XY [nm]", "U_XY"),
+                        ("Uncertainty Z [nm]", "U_Z"), ("Sigma Z [nm]", "S_Z"), ("Intensity XZ [Photons]", "I_XZ")]:
+        assert numpy.array_equal(points[point].to_numpy(), rows[pair].to_numpy())
+
+
+def test_selection_keeps_first_of_tied_points(maxwell):
+    filtered = merged(maxwell, [1, 1, 1, 2], [5, 6, 7, 8])
+    filtered.data.df = pandas.DataFrame({"U_XY": [2.0, 1.0, 1.0, 3.0], "U_Z": 0.0, "U_X": 0.0})
+    filtered.selection("uncertainty")
+    assert numpy.asarray(filtered.point_indexes).tolist() == [1, 3]
+
+
+def test_components_match_merge(maxwell):
+    rng = numpy.random.default_rng(1)
+    XY_sources = rng.integers(0, 60, 200)
+    XZ_sources = rng.integers(0, 60, 200)
+    labels = maxwell.filtering.components(XY_sources, XZ_sources)
+    assert numpy.array_equal(labels, numpy.asarray(merged(maxwell, XY_sources, XZ_sources).labels))
+    assert len(maxwell.filtering.components(numpy.zeros(0, dtype=int), numpy.zeros(0, dtype=int))) == 0
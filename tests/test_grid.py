@@ -0,0 +1,64 @@
+import numpy
+import pytest
+
+
+@pytest.fixture(scope="module")
+def centers():
+    rng = numpy.random.default_rng(1)
+    centers = rng.uniform(0, 1000, size=(3000, 3))
+    centers[::500] = numpy.nan
+    return centers
+
+
+@pytest.fixture(scope="module")
+def half_widths(centers):
+    half_widths = numpy.random.default_rng(2).uniform(0, 10, size=centers.shape)
+    half_widths[7] = 900
+    return half_widths
+
+
+@pytest.mark.parametrize("cell_size", [None, 25, [40, 60, 100]])
+def test_query_box(maxwell, centers, half_widths, cell_size):
+    index = maxwell.grid(centers, half_widths, cell_size)
+    lower, upper = [100, 200, -numpy.inf], [400, 250, 700]
+    inside = numpy.flatnonzero(numpy.all((lower < centers) & (centers < upper), axis=1))
+    assert numpy.array_equal(index.query_box(lower, upper), inside)
+
+
+@pytest.mark.parametrize("cell_size", [None, 25])
+def test_query_radius(maxwell, centers, half_widths, cell_size):
+    index = maxwell.grid(centers, half_widths, cell_size)
+    points = numpy.random.default_rng(3).uniform(0, 1000, size=(50, 3))
+    items, queries = index.query_radius(points, 60)
+    distance = numpy.sqrt(((points[:, None, :]-centers[None, :, :])**2).sum(axis=2))
+    expected_queries, expected_items = numpy.nonzero(distance <= 60)
+    assert numpy.array_equal(queries, expected_queries)
+    assert numpy.array_equal(items, expected_items)
+
+
+@pytest.mark.parametrize("k", [1, 4])
+def test_nearest(maxwell, centers, half_widths, k):
+    index = maxwell.grid(centers, half_widths, 25)
+    points = numpy.random.default_rng(4).uniform(-100, 1100, size=(40, 3))
+    distances, neighbours = index.nearest(points, k=k)
+    distance = numpy.sqrt(((points[:, None, :]-centers[None, :, :])**2).sum(axis=2))
+    distance = numpy.where(numpy.isnan(distance), numpy.inf, distance)
+    assert numpy.allclose(distances, numpy.sort(distance, axis=1)[:, :k])
+    assert numpy.allclose(distance[numpy.arange(len(points))[:, None], neighbours], distances)
+
+
+
+def test_nearest_fills_missing_neighbours(maxwell):
+    index = maxwell.grid([[0, 0, 0], [10, 0, 0], [numpy.nan, 0, 0]], cell_size=5)
+    distances, neighbours = index.nearest([[1, 0, 0], [numpy.nan, 0, 0], [40, 0, 0]], k=3)
+    assert numpy.allclose(distances[0], [1, 9, numpy.inf]) and neighbours[0].tolist() == [0, 1, -1]
+    assert numpy.all(numpy.isinf(distances[1])) and neighbours[1].tolist() == [-1, -1, -1]
+    assert numpy.allclose(distances[2], [30, 40, numpy.inf]) and neighbours[2].tolist() == [1, 0, -1]
+
+def test_subset_matches_rebuilt_grid(maxwell, centers, half_widths):
+    keep = numpy.random.default_rng(5).random(len(centers)) < 0.6
+    index = maxwell.grid(centers, half_widths, 25).subset(keep)
+    rebuilt = maxwell.grid(centers[keep], half_widths[keep], 25)
+    assert index.size == keep.sum()
+    lower, upper = [0, 0, 0], [500, 500, 500]
+    assert numpy.array_equal(index.query_box(lower, upper), rebuilt.query_box(lower, upper))
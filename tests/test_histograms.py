@@ -0,0 +1,67 @@
+import numpy
+import pandas
+import pytest
+
+COLUMNS = ["Uncertainty XY [nm]", "Sigma Z [nm]"]
+
+
+@pytest.fixture
+def points():
+    rng = numpy.random.default_rng(2)
+    points = pandas.DataFrame({COLUMNS[0]: rng.gamma(4, 5, 20000), COLUMNS[1]: rng.normal(60, 8, 20000)})
+    points.iloc[::997, 1] = numpy.nan
+    return points
+
+
+def test_merge_matches_single_pass(maxwell, points):
+    whole = maxwell.histograms(COLUMNS, bin_width=0.5).add(points)
+    merged = maxwell.histograms(COLUMNS, bin_width=0.5)
+    for rows in numpy.array_split(numpy.random.default_rng(0).permutation(len(points)), 6):
+        merged.merge(maxwell.histograms(COLUMNS, bin_width=0.5).add(points.iloc[rows]))
+    for c in COLUMNS:
+        assert numpy.array_equal(whole.histogram(c)[0], merged.histogram(c)[0])
+        assert numpy.array_equal(whole.histogram(c)[1], merged.histogram(c)[1])
+    assert whole.histogram(COLUMNS[1])[1].sum() == numpy.isfinite(points[COLUMNS[1]]).sum()
+
+
+def test_histogram_matches_numpy(maxwell, points):
+    lower, counts = maxwell.histograms(COLUMNS, bin_width=0.5).add(points).histogram(COLUMNS[0])
+    values = points[COLUMNS[0]].to_numpy()
+    edges = numpy.arange(numpy.floor(values.min()/0.5), numpy.floor(values.max()/0.5)+2)*0.5
+    expected = numpy.histogram(values, bins=edges)[0]
+    assert numpy.array_equal(counts, expected[expected > 0])
+    assert numpy.allclose(lower, edges[:-1][expected > 0])
+
+
+def test_edge_values_are_in_upper_bin(maxwell):
+    counted = maxwell.histograms(["Sigma Z [nm]"], bin_width=0.1).add(pandas.DataFrame({"Sigma Z [nm]": [0.3, 0.7]}))
+    lower, counts = counted.histogram("Sigma Z [nm]")
+    assert numpy.allclose(lower, [0.3, 0.7])
+    assert counts.tolist() == [1, 1]
+
+
+def test_outliers_keep_histogram_sparse(maxwell):
+    values = pandas.DataFrame({"Sigma Z [nm]": numpy.append(numpy.linspace(0, 10, 1000), 1e7)})
+    counted = maxwell.histograms(["Sigma Z [nm]"], bin_width=0.01).add(values)
+    assert len(counted.counts["Sigma Z [nm]"]) <= 1001
+    assert counted.histogram("Sigma Z [nm]")[0][-1] == 1e7
+
+
+def test_merge_requires_same_bin_width(maxwell):
+    with pytest.raises(ValueError):
+        maxwell.histograms(COLUMNS, bin_width=0.5).merge(maxwell.histograms(COLUMNS, bin_width=0.25))
+    with pytest.raises(ValueError):
+        maxwell.histograms(COLUMNS, bin_width=0)
+
+
+@pytest.mark.parametrize("extension", ["csv", "npz"])
+def test_read_matches_add(maxwell, points, tmp_path, extension):
+    filename = str(tmp_path/("Points."+extension))
+    if extension == "csv":
+        points.to_csv(filename, index=False)
+    else:
+        numpy.savez_compressed(filename, **{c: points[c].to_numpy() for c in COLUMNS})
+    added = maxwell.histograms(COLUMNS, bin_width=0.5).add(points)
+    read = maxwell.histograms(COLUMNS, bin_width=0.5).read(filename, chunksize=3000)
+    for c in COLUMNS:
+        assert numpy.array_equal(added.histogram(c)[1], read.histogram(c)[1])
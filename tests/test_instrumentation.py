@@ -0,0 +1,106 @@
+import json
+
+import numpy
+import pytest
+
+
+@pytest.fixture
+def instrument(maxwell):
+    instrument = maxwell.instrumentation([maxwell.preparation, maxwell.overlap, maxwell.filtering])
+    yield instrument
+    instrument.detach()
+
+
+def test_calls_are_recorded(maxwell, acquisition, instrument):
+    records = []
+    instrument.add_callback(records.append).attach()
+    data = maxwell.preparation().setting(*acquisition).set_to_center()
+    found = maxwell.overlap(data).indexes(data.zpix, data.xypix)
+    instrument.detach()
+    called = [(r["class"], r["method"]) for r in instrument.calls]
+    assert ("preparation", "setting") in called
+    assert ("overlap", "indexes") in called
+    assert records == instrument.calls
+    indexes = instrument.calls[called.index(("overlap", "indexes"))]
+    assert indexes["rows_out"] == len(found.XY_indexes)
+    assert indexes["candidates"] == found.candidates >= len(found.XY_indexes)
+    assert indexes["rows_in"] == len(data.dfxy)+len(data.dfxz)
+    assert all(r["time"] >= 0 for r in instrument.calls)
+    assert all(r["peak_memory_mb"] is None for r in instrument.calls)
+
+
+def test_nested_calls_have_depth(maxwell, acquisition, instrument):
+    instrument.attach()
+    data = maxwell.preparation().setting(*acquisition).set_to_center()
+    maxwell.overlap(data).indexes(data.zpix, data.xypix).values()
+    depths = {(r["class"], r["method"]): r["depth"] for r in instrument.calls}
+    assert depths[("overlap", "indexes")] == 0
+    assert max(depths.values()) >= 1
+
+
+def test_memory_is_recorded(maxwell, acquisition):
+    instrument = maxwell.instrumentation([maxwell.preparation], memory=True).attach()
+    try:
+        maxwell.preparation().setting(*acquisition)
+    finally:
+        instrument.detach()
+    setting = [r for r in instrument.calls if r["method"] == "setting"][0]
+    assert setting["peak_memory_mb"] > 0
+
+
+def test_errors_are_recorded(maxwell, instrument):
+    instrument.attach()
+    with pytest.raises(Exception):
+        maxwell.preparation().setting("Missing_XY.csv", "Missing_XZ.csv")
+    assert instrument.calls[-1]["error"] is not None
+
+
+def test_detach_restores_methods(maxwell, acquisition, instrument):
+    setting = maxwell.preparation.setting
+    instrument.attach()
+    assert maxwell.preparation.setting is not setting
+    instrument.detach()
+    assert maxwell.preparation.setting is setting
+    maxwell.preparation().setting(*acquisition)
+    assert instrument.calls == []
+
+
+def test_report_summarizes_calls(maxwell, acquisition, instrument, tmp_path):
+    instrument.attach()
+    for i in range(0, 2):
+        maxwell.preparation().setting(*acquisition)
+    report = instrument.report()
+    assert report["summary"]["preparation.setting"]["calls"] == 2
+    instrument.download_report(str(tmp_path/"Report"))
+    with open(tmp_path/"Report.json") as f:
+        assert json.load(f)["summary"]["preparation.setting"]["calls"] == 2
+    assert instrument.reset().calls == []
+
+
+def test_external_tracing_is_left_alone(maxwell, acquisition):
+    import tracemalloc
+    tracemalloc.start()
+    try:
+        held = numpy.ones(2**20)
+        peak = tracemalloc.get_traced_memory()[1]
+        instrument = maxwell.instrumentation([maxwell.preparation], memory=True).attach()
+        try:
+            maxwell.preparation().setting(*acquisition)
+        finally:
+            instrument.detach()
+        assert tracemalloc.is_tracing()
+        assert tracemalloc.get_traced_memory()[1] >= peak
+        assert all(r["peak_memory_mb"] > 0 for r in instrument.calls)
+        del held
+    finally:
+        tracemalloc.stop()
+
+
+def test_own_tracing_is_stopped(maxwell, acquisition):
+    import tracemalloc
+    instrument = maxwell.instrumentation([maxwell.preparation], memory=True).attach()
+    try:
+        maxwell.preparation().setting(*acquisition)
+    finally:
+        instrument.detach()
+    assert not tracemalloc.is_tracing()
@@ -0,0 +1,54 @@
+import numpy
+import pandas
+import pytest
+
+
+@pytest.fixture(scope="module")
+def found(maxwell, acquisition):
+    data = maxwell.preparation().setting(*acquisition).set_to_center()
+    return maxwell.overlap(data).indexes(data.zpix, data.xypix).values()
+
+
+def test_columns_are_gathered_on_request(found):
+    store = found.localizations
+    assert len(store) == len(found.XY_indexes)
+    assert numpy.array_equal(store["U_XY"], found.data.dfxy["U_XY"].to_numpy()[found.XY_indexes])
+    assert numpy.array_equal(store["U_Z"], found.data.dfxz["U_Z"].to_numpy()[found.XZ_indexes])
+    with pytest.raises(KeyError):
+        store["Missing"]
+
+
+def test_subset_keeps_the_rows(found):
+    rows = numpy.arange(0, len(found.localizations), 3)
+    kept = found.localizations.subset(rows)
+    again = kept.subset(numpy.arange(len(kept)) % 2 == 0)
+    assert numpy.array_equal(kept["X_XZ"], found.localizations["X_XZ"][rows])
+    assert numpy.array_equal(again.index, rows[::2])
+    pandas.testing.assert_frame_equal(again.frame(), found.df.iloc[rows[::2]])
+
+
+def test_frame_of_some_columns(found):
+    frame = found.localizations.frame(["X_XY", "Z_XZ"])
+    assert list(frame.columns) == ["X_XY", "Z_XZ"]
+    assert numpy.array_equal(frame["Z_XZ"].to_numpy(), found.dfxz["Z_XZ"].to_numpy())
+
+
+def test_filtering_keeps_a_store(maxwell, found):
+    filtered = maxwell.filtering(found).merge().selection("uncertainty").points()
+    assert len(filtered.localizations) == len(filtered.points)
+    assert numpy.array_equal(filtered.df.index, numpy.sort(filtered.point_indexes))
+    assert numpy.array_equal(filtered.df["X_XY"].to_numpy(), filtered.points["X [nm]"].to_numpy())
+
+
+@pytest.mark.parametrize("step", ["set_to_center", "limiting"])
+def test_store_fails_after_data_changes(maxwell, prepared, step):
+    data = prepared()
+    found = maxwell.overlap(data).indexes(data.zpix, data.xypix).values()
+    if step == "set_to_center":
+        data.set_to_center()
+    else:
+        data.limiting("X", 0, "less")
+    with pytest.raises(ValueError):
+        found.df
+    with pytest.raises(ValueError):
+        found.localizations["X_XY"]
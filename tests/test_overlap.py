@@ -0,0 +1,98 @@
+import numpy
+import pytest
+
+from conftest import ordered
+
+
+@pytest.fixture(scope="module")
+def expected(maxwell, acquisition):
+    data = maxwell.preparation().setting(*acquisition).set_to_center()
+    found = maxwell.overlap(data).indexes(data.zpix, data.xypix, engine="reference")
+    return ordered(found.XY_indexes, found.XZ_indexes)
+
+
+def test_reference_finds_duplicate_pairs(expected):
+    assert len(expected) > 1000
+    assert len(numpy.unique(expected[:, 0])) < len(expected)
+
+
+@pytest.mark.parametrize("z_range, xy_range", [(13, 230), (5, 100), (40, 400)])
+def test_sweep_matches_reference(maxwell, prepared, z_range, xy_range):
+    reference = prepared()
+    found = maxwell.overlap(reference).indexes(z_range, xy_range, engine="reference")
+    data = prepared()
+    swept = maxwell.overlap(data).indexes(z_range, xy_range, engine="sweep")
+    assert numpy.array_equal(numpy.column_stack([swept.XZ_indexes, swept.XY_indexes]),
+                             ordered(found.XY_indexes, found.XZ_indexes))
+
+
+def test_sweep_in_small_chunks(maxwell, prepared, expected):
+    data = prepared()
+    found = maxwell.overlap(data).bounds(data.zpix, data.xypix)
+    XY_indexes, XZ_indexes = found.sweep(found.lower_xy, found.upper_xy, found.lower_xz, found.upper_xz, chunk_size=64)
+    assert numpy.array_equal(ordered(XY_indexes, XZ_indexes), expected)
+
+
+
+@pytest.mark.parametrize("n_workers", [1, 2])
+def test_sweep_keeps_wide_boxes_loose(maxwell, prepared, expected, n_workers):
+    data = prepared()
+    found = maxwell.overlap(data).bounds(data.zpix, data.xypix)
+    _, _, narrow = found.sweep(found.lower_xy, found.upper_xy, found.lower_xz, found.upper_xz, counted=True)
+    lower_xy, upper_xy = found.lower_xy.copy(), found.upper_xy.copy()
+    lower_xy[0, 0], upper_xy[0, 0] = -1e9, 1e9
+    upper_xy[1, 0] = numpy.inf
+    XY_indexes, XZ_indexes, wide = found.sweep(lower_xy, upper_xy, found.lower_xz, found.upper_xz, n_workers=n_workers,
+                                               counted=True)
+    brute = numpy.all((lower_xy[:2, None] < found.upper_xz[None]) & (found.lower_xz[None] < upper_xy[:2, None]), axis=2)
+    rows = numpy.isin(expected[:, 1], [0, 1], invert=True)
+    extra = numpy.column_stack([numpy.nonzero(brute)[1], numpy.nonzero(brute)[0]])
+    assert numpy.array_equal(ordered(XY_indexes, XZ_indexes), numpy.unique(numpy.vstack([expected[rows], extra]), axis=0))
+    assert wide <= narrow+2*len(found.lower_xz)
+
+@pytest.mark.parametrize("cell_size", [None, 50, [100, 100, 30]])
+def test_grid_matches_reference(maxwell, prepared, expected, cell_size):
+    data = prepared().indexing(cell_size)
+    found = maxwell.overlap(data).indexes(data.zpix, data.xypix, engine="grid")
+    assert numpy.array_equal(numpy.column_stack([found.XZ_indexes, found.XY_indexes]), expected)
+
+
+def test_default_engine_uses_grid_once_built(maxwell, prepared, expected):
+    data = prepared().indexing()
+    found = maxwell.overlap(data).indexes(data.zpix, data.xypix)
+    assert numpy.array_equal(ordered(found.XY_indexes, found.XZ_indexes), expected)
+
+
+def test_grid_follows_limiting(maxwell, prepared):
+    data = prepared().indexing()
+    data.limiting("X", 0, "less")
+    assert (data.grid_xy.size, data.grid_xz.size) == (len(data.dfxy), len(data.dfxz))
+    reference = prepared()
+    reference.limiting("X", 0, "less")
+    expected = maxwell.overlap(reference).indexes(reference.zpix, reference.xypix, engine="reference")
+    found = maxwell.overlap(data).indexes(data.zpix, data.xypix, engine="grid")
+    assert numpy.array_equal(ordered(found.XY_indexes, found.XZ_indexes), ordered(expected.XY_indexes, expected.XZ_indexes))
+
+
+@pytest.mark.parametrize("engine", ["sweep", "grid"])
+def test_workers_match_serial(maxwell, prepared, expected, engine):
+    data = prepared().indexing()
+    found = maxwell.overlap(data).indexes(data.zpix, data.xypix, engine=engine, n_workers=2)
+    assert numpy.array_equal(numpy.column_stack([found.XZ_indexes, found.XY_indexes]), expected)
+
+
+def test_values_gather_prepared_columns(maxwell, prepared):
+    data = prepared()
+    found = maxwell.overlap(data).indexes(data.zpix, data.xypix).values()
+    XY_indexes = numpy.asarray(found.XY_indexes)
+    XZ_indexes = numpy.asarray(found.XZ_indexes)
+    for c in data.dfxy.columns:
+        assert numpy.array_equal(found.localizations[c], data.dfxy[c].to_numpy()[XY_indexes], equal_nan=True)
+        assert numpy.array_equal(found.pairs[c], data.dfxy[c].to_numpy(dtype=float)[XY_indexes], equal_nan=True)
+        assert numpy.array_equal(found.df[c].to_numpy(), data.dfxy[c].to_numpy(dtype=float)[XY_indexes], equal_nan=True)
+    for c in data.dfxz.columns:
+        assert numpy.array_equal(found.localizations[c], data.dfxz[c].to_numpy()[XZ_indexes], equal_nan=True)
+        assert numpy.array_equal(found.pairs[c], data.dfxz[c].to_numpy(dtype=float)[XZ_indexes], equal_nan=True)
+        assert numpy.array_equal(found.dfxz[c].to_numpy(), data.dfxz[c].to_numpy(dtype=float)[XZ_indexes], equal_nan=True)
+    assert list(found.df.columns) == list(data.dfxy.columns)+list(data.dfxz.columns)
+    assert list(found.pairs.dtype.names) == list(found.df.columns)
@@ -0,0 +1,91 @@
+import json
+import os
+import subprocess
+import sys
+
+import pandas
+import pytest
+
+
+@pytest.fixture
+def manifest(acquisition, tmp_path):
+    manifest = {"defaults": {"precision": ["Uncertainty Z [nm]"]},
+                "acquisitions": [{"name": "A", "file_xy": acquisition[0], "file_xz": acquisition[1]},
+                                 {"name": "B", "file_xy": acquisition[0], "file_xz": acquisition[1],
+                                  "engine": "grid", "limits": [["X", 0, "less"]]},
+                                 {"name": "C", "file_xy": "Missing.csv", "file_xz": acquisition[1]}]}
+    with open(tmp_path/"Manifest.json", "w") as f:
+        json.dump(manifest, f)
+    return str(tmp_path/"Manifest.json")
+
+
+def test_run_matches_steps(maxwell, prepared, manifest, tmp_path):
+    ran = maxwell.pipeline(manifest, output=str(tmp_path/"Results")).run()
+    A, B, C = ran.summary
+    data = prepared()
+    found = maxwell.overlap(data).indexes(data.zpix, data.xypix).values()
+    filtered = maxwell.filtering(found).merge().selection("uncertainty").points()
+    assert A["overlapped"] == len(found.XY_indexes)
+    assert A["points"] == len(filtered.points)
+    assert "error" not in A
+    assert set(A["timings"]) >= {"setting", "set_to_center", "indexes", "merge", "selection", "points", "get_precision"}
+    assert A["precision"]["Uncertainty Z [nm]"] == "norm"
+    assert B["points"] < A["points"]
+    assert "indexing" in B["timings"]
+    assert "error" in C
+    written = pandas.read_csv(tmp_path/"Results"/"A"/"Filtering_Dataframe.csv")
+    assert len(written) == A["points"]
+    assert os.path.exists(tmp_path/"Results"/"Pipeline_Timings.csv")
+    with open(tmp_path/"Results"/"Pipeline_Summary.json") as f:
+        assert [s["name"] for s in json.load(f)] == ["A", "B", "C"]
+
+
+def test_clustered_acquisition_fits_every_particle(maxwell, acquisition, tmp_path):
+    manifest = [{"name": "A", "file_xy": acquisition[0], "file_xz": acquisition[1],
+                 "clustering": {"eps": 600, "min_samples": 3}}]
+    ran = maxwell.pipeline(manifest, output=str(tmp_path/"Results")).run()
+    summary = ran.summary[0]
+    assert "error" not in summary
+    assert summary["particles"] > 1
+    fits = pandas.read_csv(tmp_path/"Results"/"A"/"Surface_Fits.csv")
+    assert len(fits) == summary["particles"]
+    assert "batch_evaluation" in summary["timings"]
+
+
+def test_reports_are_written(maxwell, acquisition, tmp_path):
+    manifest = [{"name": "A", "file_xy": acquisition[0], "file_xz": acquisition[1], "precision": ["Uncertainty Z [nm]"],
+                 "report": ["tricolumn", {"plot": "three_dimensional", "dimensions": 3, "max_points": 100},
+                            "fitted_precision"]}]
+    summary = maxwell.pipeline(manifest, output=str(tmp_path/"Results")).run().summary[0]
+    assert "error" not in summary
+    assert [os.path.basename(name) for name in summary["report"]] == ["Precision_Uncertainty_Z.png",
+                                                                     "Report_1_tricolumn.html",
+                                                                     "Report_2_three_dimensional.html"]
+    assert all(os.path.getsize(name) > 0 for name in summary["report"])
+
+
+def test_workers_match_serial(maxwell, manifest, tmp_path):
+    serial = maxwell.pipeline(manifest, output=str(tmp_path/"Serial")).run()
+    pooled = maxwell.pipeline(manifest, output=str(tmp_path/"Pooled")).run(n_workers=2)
+    for s, p in zip(serial.summary, pooled.summary):
+        assert (s.get("points"), s.get("error")) == (p.get("points"), p.get("error"))
+
+
+def test_names_are_unique(maxwell, acquisition):
+    with pytest.raises(ValueError):
+        maxwell.pipeline([{"file_xy": acquisition[0], "file_xz": acquisition[1], "name": "A"},
+                          {"file_xy": acquisition[0], "file_xz": acquisition[1], "name": "A"}])
+
+
+@pytest.mark.parametrize("missing, code", [(False, 0), (True, 1)])
+def test_command_line_exit_code(acquisition, tmp_path, missing, code):
+    acquisitions = [{"name": "A", "file_xy": acquisition[0], "file_xz": acquisition[1], "surface": False}]
+    if missing:
+        acquisitions.append({"name": "C", "file_xy": "Missing.csv", "file_xz": acquisition[1]})
+    with open(tmp_path/"Manifest.json", "w") as f:
+        json.dump({"acquisitions": acquisitions}, f)
+    script = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Software", "Pipeline.py")
+    ran = subprocess.run([sys.executable, script, str(tmp_path/"Manifest.json"), "--output", str(tmp_path/"Results")],
+                         cwd=str(tmp_path), capture_output=True, text=True)
+    assert ran.returncode == code, ran.stderr
+    assert ran.stdout.startswith("A ")
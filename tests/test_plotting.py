@@ -0,0 +1,246 @@
+import types
+
+import numpy
+import pandas
+import pytest
+
+
+@pytest.fixture
+def shown(maxwell, monkeypatch):
+    """The figures shown by the plotting methods, kept instead of being displayed."""
+    figures = []
+    monkeypatch.setattr(maxwell.plotly.graph_objects.Figure, "show", lambda fig, *args, **kwargs: figures.append(fig))
+    return figures
+
+
+@pytest.fixture
+def points():
+    rng = numpy.random.default_rng(0)
+    n = 50
+    return pandas.DataFrame({"X [nm]": rng.uniform(-5000, 5000, n), "Y [nm]": rng.uniform(-5000, 5000, n),
+                             "Z [nm]": rng.uniform(-2000, 2000, n), "Sigma XY [nm]": rng.uniform(100, 200, n),
+                             "Sigma Z [nm]": rng.uniform(20, 60, n)})
+
+
+def test_circles_follow_each_box(maxwell):
+    x0, x1 = numpy.array([0.0, 10.0]), numpy.array([2.0, 14.0])
+    y0, y1 = numpy.array([0.0, -3.0]), numpy.array([4.0, 3.0])
+    trace = maxwell.plotting.circles(x0, x1, y0, y1, "red", segments=16)
+    x, y = numpy.asarray(trace.x).reshape(2, 18), numpy.asarray(trace.y).reshape(2, 18)
+    assert x.dtype == numpy.float32
+    assert numpy.isnan(x[:, -1]).all() and numpy.isnan(y[:, -1]).all()
+    assert numpy.allclose(x[:, 0], x[:, -2]) and numpy.allclose(y[:, 0], y[:, -2])
+    cx, cy, rx, ry = (x0+x1)/2, (y0+y1)/2, (x1-x0)/2, (y1-y0)/2
+    on = ((x[:, :-1]-cx[:, None])/rx[:, None])**2+((y[:, :-1]-cy[:, None])/ry[:, None])**2
+    assert numpy.allclose(on, 1, atol=1e-5)
+
+
+def test_ellipsoids_share_one_mesh(maxwell, points):
+    resolution = 8
+    trace = maxwell.plotting.ellipsoids(points["X [nm]"], points["Y [nm]"], points["Z [nm]"], points["Sigma XY [nm]"],
+                                        points["Sigma XY [nm]"], points["Sigma Z [nm]"], resolution=resolution)
+    vertices = numpy.column_stack([trace.x, trace.y, trace.z]).reshape(len(points), -1, 3)
+    faces = numpy.column_stack([trace.i, trace.j, trace.k]).reshape(len(points), -1, 3)
+    per = 2+resolution*(resolution//2-1)
+    assert vertices.shape[1] == per
+    assert faces.dtype == numpy.int32
+    assert faces.shape[1] == 2*resolution*(resolution//2-1)
+    for n in range(0, len(points)):
+        assert (faces[n] // per == n).all()
+    centers = points[["X [nm]", "Y [nm]", "Z [nm]"]].to_numpy()
+    radii = points[["Sigma XY [nm]", "Sigma XY [nm]", "Sigma Z [nm]"]].to_numpy()
+    on = (((vertices-centers[:, None])/radii[:, None])**2).sum(axis=2)
+    assert numpy.allclose(on, 1, atol=1e-3)
+
+
+@pytest.mark.parametrize("dimensions", [2, 3])
+def test_batched_circles_replace_shapes(maxwell, prepared, points, shown, dimensions):
+    data = types.SimpleNamespace(points=points)
+    if dimensions == 2:
+        data = prepared()
+        data.dfxy, data.dfxz = data.dfxy[:40], data.dfxz[:30]
+    maxwell.plotting(data).tricolumn_sigma(dimensions)
+    maxwell.plotting(data).tricolumn_sigma(dimensions, batched=False)
+    batched, shapes = shown
+    assert len(batched.layout.shapes) == 0
+    assert len(batched.data) == dimensions
+    circles = sum(numpy.isnan(numpy.asarray(trace.x, dtype=float)).sum() for trace in batched.data)
+    assert circles == len(shapes.layout.shapes)
+
+
+
+@pytest.mark.parametrize("dimensions", [2, 3])
+def test_many_circles_are_drawn_as_sized_markers(maxwell, prepared, points, shown, dimensions):
+    data = types.SimpleNamespace(points=points)
+    if dimensions == 2:
+        data = prepared()
+        data.dfxy, data.dfxz = data.dfxy[:40], data.dfxz[:30]
+    maxwell.plotting(data).tricolumn_sigma(dimensions, max_points=20)
+    fig, = shown
+    assert len(fig.layout.shapes) == 0
+    assert [trace.type for trace in fig.data] == ["scattergl"]*dimensions
+    if dimensions == 2:
+        assert [len(trace.x) for trace in fig.data] == [40, 30]
+        sigma = data.dfxy["S_XY"].to_numpy()
+    else:
+        assert all(len(trace.x) == len(points) for trace in fig.data)
+        sigma = points["Sigma XY [nm]"].to_numpy()
+    size = numpy.asarray(fig.data[0].marker.size, dtype=float)
+    assert size.max() == 12
+    assert numpy.all(numpy.diff(size[numpy.argsort(sigma, kind="stable")]) >= 0)
+
+
+def test_sized_markers_keep_the_figure_small(maxwell, many):
+    data = types.SimpleNamespace(points=many.points.assign(**{"Sigma XY [nm]": 150.0, "Sigma Z [nm]": 40.0}))
+    fig = maxwell.plotting(data).tricolumn_sigma(3, show=False)
+    assert len(fig.data[0].x) == len(many.points)
+    assert len(fig.to_json()) < 2**20
+
+def test_batched_ellipsoids_are_one_trace(maxwell, points, shown):
+    maxwell.plotting(types.SimpleNamespace(points=points)).three_dimensional_sigma()
+    assert [trace.type for trace in shown[0].data] == ["mesh3d"]
+
+
+def test_many_ellipsoids_are_drawn_as_sized_markers(maxwell, points, shown):
+    maxwell.plotting(types.SimpleNamespace(points=points)).three_dimensional_sigma(max_points=20)
+    trace, = shown[0].data
+    assert trace.type == "scatter3d"
+    assert len(trace.x) == len(points)
+    size = numpy.asarray(trace.marker.size, dtype=float)
+    sigma = (points["Sigma XY [nm]"]+points["Sigma Z [nm]"]).to_numpy()
+    assert numpy.isclose(size.max(), 12)
+    assert numpy.array_equal(numpy.argsort(size, kind="stable"), numpy.argsort(sigma, kind="stable"))
+
+
+@pytest.mark.parametrize("method", ["random", "stratified"])
+def test_downsampled_keeps_some_of_each_region(maxwell, method):
+    rng = numpy.random.default_rng(0)
+    dense = rng.normal(0, 1, (20000, 2))
+    sparse = rng.normal(50, 1, (20, 2))
+    coordinates = list(numpy.vstack([dense, sparse]).T)
+    kept = maxwell.plotting.downsampled(coordinates, 1000, method, numpy.random.default_rng(1))
+    assert numpy.all(numpy.diff(kept) > 0)
+    assert 900 <= len(kept) <= 1000
+    if method == "stratified":
+        assert (kept >= 20000).sum() >= 1
+    assert numpy.array_equal(maxwell.plotting.downsampled(coordinates, 10**5, method), numpy.arange(20020))
+
+
+def test_stratified_never_exceeds_max_points(maxwell):
+    rng = numpy.random.default_rng(3)
+    coordinates = list(rng.standard_cauchy((50000, 3)).T)
+    kept = maxwell.plotting.downsampled(coordinates, 10000, "stratified", rng)
+    assert len(kept) == 10000
+    assert len(numpy.unique(kept)) == 10000
+
+
+def test_density_counts_every_localization(maxwell):
+    rng = numpy.random.default_rng(0)
+    x, y = rng.normal(0, 1, 5000), rng.normal(0, 1, 5000)
+    heatmap = maxwell.plotting.density(numpy.append(x, numpy.nan), numpy.append(y, 0), "red", bins=64)
+    z = numpy.asarray(heatmap.z, dtype=float)
+    assert z.shape == (64, 64)
+    assert numpy.isclose(numpy.expm1(numpy.nan_to_num(z)).sum(), 5000, rtol=1e-4)
+    voxels = maxwell.plotting.voxels(x, y, rng.normal(0, 1, 5000), "blue", bins=64)
+    assert numpy.isclose(numpy.expm1(numpy.asarray(voxels.marker.color, dtype=float)).sum(), 5000, rtol=1e-4)
+    assert len(voxels.x) <= 16**3
+
+
+@pytest.fixture
+def many():
+    rng = numpy.random.default_rng(0)
+    n = 20000
+    return types.SimpleNamespace(points=pandas.DataFrame({"X [nm]": rng.normal(0, 3000, n), "Y [nm]": rng.normal(0, 3000, n),
+                                                          "Z [nm]": rng.normal(0, 1000, n), "Uncertainty XY [nm]": 10.0,
+                                                          "Uncertainty Z [nm]": 30.0}))
+
+
+def test_tricolumn_draws_density_above_max_points(maxwell, many, shown):
+    maxwell.plotting(many).tricolumn(3, max_points=5000)
+    maxwell.plotting(many).tricolumn(3, max_points=5000, downsample="random")
+    maxwell.plotting(many).tricolumn(3)
+    density, sampled, full = shown
+    assert [trace.type for trace in density.data] == ["heatmap"]*3
+    assert [trace.type for trace in sampled.data] == ["scatter"]*3
+    assert all(len(trace.x) == 5000 for trace in sampled.data)
+    assert all(len(trace.x) == 20000 for trace in full.data)
+
+
+
+@pytest.mark.parametrize("downsample", [None, "stratified"])
+def test_markers_are_never_built_above_max_points(maxwell, many, shown, monkeypatch, downsample):
+    built = []
+    for name in ["Scatter", "Scatter3d"]:
+        trace = getattr(maxwell.plotly.graph_objects, name)
+        monkeypatch.setattr(maxwell.plotly.graph_objects, name,
+                            lambda *args, trace=trace, **kwargs: built.append(len(kwargs.get("x", ()))) or trace(*args, **kwargs))
+    maxwell.plotting(many).onecolumn("XZ", 3, max_points=5000, downsample=downsample)
+    maxwell.plotting(many).tricolumn(3, max_points=5000, downsample=downsample)
+    maxwell.plotting(many).three_dimensional(3, max_points=5000, downsample=downsample, bins=64)
+    assert len(built) >= (1 if downsample is None else 5)
+    assert max(built) <= 5000
+
+
+def test_histogram_matches_numpy(maxwell):
+    rng = numpy.random.default_rng(4)
+    coordinates = [numpy.round(rng.normal(0, 1, 3000), 1), rng.uniform(-5, 5, 3000), numpy.full(3000, 2.0)]
+    for d in [1, 2, 3]:
+        counts, edges = maxwell.plotting.histogram(coordinates[:d], 17)
+        expected, expected_edges = numpy.histogramdd(numpy.column_stack(coordinates[:d]), bins=17)
+        assert numpy.array_equal(counts, expected)
+        assert all(numpy.array_equal(e, f) for e, f in zip(edges, expected_edges))
+
+def test_three_dimensional_draws_voxels_above_max_points(maxwell, many, shown):
+    maxwell.plotting(many).three_dimensional(3, max_points=5000, bins=64)
+    maxwell.plotting(many).three_dimensional(3, max_points=5000, downsample="stratified")
+    voxels, sampled = shown
+    assert [trace.type for trace in voxels.data] == ["scatter3d"]
+    assert len(voxels.data[0].x) <= 16**3
+    assert len(sampled.data[0].x) < 20000
+
+
+def test_downsample_is_checked(maxwell, many, shown):
+    with pytest.raises(ValueError):
+        maxwell.plotting(many).tricolumn(3, max_points=5000, downsample="every")
+
+
+def test_render_writes_html_without_display(maxwell, many, shown, tmp_path):
+    fig = maxwell.plotting(many).tricolumn(3, filename=str(tmp_path/"Tricolumn.html"), show=False)
+    assert shown == []
+    assert [trace.type for trace in fig.data] == ["scatter"]*3
+    with open(tmp_path/"Tricolumn.html") as f:
+        assert "plotly" in f.read()
+
+
+def test_render_checks_extension(maxwell, many, shown, tmp_path):
+    with pytest.raises(ValueError):
+        maxwell.plotting(many).three_dimensional(3, filename=str(tmp_path/"Figure.txt"), show=False)
+
+
+def test_render_writes_images(maxwell, many, tmp_path):
+    pytest.importorskip("kaleido")
+    maxwell.plotting(many).three_dimensional(3, max_points=1000, filename=str(tmp_path/"Figure.svg"), show=False)
+    assert (tmp_path/"Figure.svg").stat().st_size > 0
+
+
+def test_projection_is_converted_once(maxwell, prepared):
+    data = prepared()
+    plotted = maxwell.plotting(data)
+    x = plotted.projection("X_XY")
+    assert x.dtype == numpy.float32
+    assert plotted.projection("X_XY") is x
+    assert numpy.allclose(x, data.dfxy["X_XY"].to_numpy())
+    data.limiting("X", 0, "less")
+    assert len(plotted.projection("X_XY")) == len(data.dfxy)
+    with pytest.raises(ValueError):
+        plotted.projection("Missing")
+
+
+def test_fitted_precision_without_display(maxwell, many, tmp_path):
+    fitted = maxwell.precision(many, "Uncertainty Z [nm]")
+    fitted.points = fitted.points.assign(**{"Uncertainty Z [nm]": numpy.random.default_rng(0).gamma(6, 4, len(fitted.points))})
+    fitted.height = fitted.points["Uncertainty Z [nm]"].to_numpy()
+    figure = fitted.fitted_precision(distribution="norm", filename=str(tmp_path/"Precision.png"), show=False)
+    assert isinstance(figure, maxwell.matplotlib.figure.Figure)
+    with open(tmp_path/"Precision.png", "rb") as f:
+        assert f.read(8) == b"\x89PNG\r\n\x1a\n"
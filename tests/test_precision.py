@@ -0,0 +1,75 @@
+import types
+
+import numpy
+import pandas
+import pytest
+
+DISTRIBUTIONS = ["norm", "lognorm", "gamma", "expon", "uniform"]
+
+
+@pytest.fixture(scope="module")
+def height():
+    return numpy.random.default_rng(5).gamma(6, 4, 3000)
+
+
+@pytest.fixture(scope="module")
+def expected(maxwell, height):
+    fitted = maxwell.fitter.Fitter(height, distributions=DISTRIBUTIONS, bins=100)
+    fitted.fit(progress=False, n_jobs=1)
+    return fitted
+
+
+def points(height):
+    return types.SimpleNamespace(points=pandas.DataFrame({"Uncertainty XY [nm]": height}))
+
+
+@pytest.mark.parametrize("n_workers", [1, 2])
+def test_fit_distributions_matches_fitter(maxwell, height, expected, n_workers):
+    fits = maxwell.precision.fit_distributions(DISTRIBUTIONS, height, bins=100, n_workers=n_workers)
+    errors = expected.df_errors.loc[DISTRIBUTIONS]
+    for column in ["sumsquare_error", "aic", "bic", "ks_statistic"]:
+        assert numpy.allclose(fits.loc[DISTRIBUTIONS, column].astype(float), errors[column].astype(float), rtol=1e-6)
+    for d in DISTRIBUTIONS:
+        assert numpy.allclose(fits.loc[d, "params"], expected.fitted_param[d], rtol=1e-6)
+    assert fits.index[0] == expected.df_errors.sort_values("sumsquare_error").index[0]
+
+
+def test_get_precision_matches_fitter(maxwell, height, expected):
+    fitted = maxwell.precision(points(height), "Uncertainty XY [nm]").get_precision(DISTRIBUTIONS, plot=False)
+    assert fitted.best_fit == expected.df_errors.sort_values("sumsquare_error").index[0]
+    assert set(fitted.fitted_params) == set(DISTRIBUTIONS)
+
+
+def test_subsample_selects_the_best(maxwell):
+    height = numpy.random.default_rng(6).gamma(6, 4, 30000)
+    full = maxwell.precision(points(height), "Uncertainty XY [nm]").get_precision(DISTRIBUTIONS, subsample=None, plot=False)
+    pruned = maxwell.precision(points(height), "Uncertainty XY [nm]").get_precision(DISTRIBUTIONS, subsample=3000, n_best=2,
+                                                                                    plot=False)
+    assert len(pruned.fits) == 2
+    assert pruned.best_fit == full.best_fit
+    assert numpy.allclose(pruned.fitted_params[pruned.best_fit], full.fitted_params[full.best_fit])
+
+
+def test_fitted_precision_reuses_parameters(maxwell, height, monkeypatch):
+    fitted = maxwell.precision(points(height), "Uncertainty XY [nm]").get_precision(["gamma"], plot=False)
+    monkeypatch.setattr(maxwell.fitter, "Fitter", None)
+    figure = fitted.fitted_precision(distribution=False, show=False)
+    assert len(figure.axes[0].lines) >= 1
+
+
+def test_binned_precision_matches_raw(maxwell, height):
+    raw = maxwell.precision(points(height), "Uncertainty XY [nm]").get_precision(DISTRIBUTIONS, plot=False)
+    binned = maxwell.precision(points(height), "Uncertainty XY [nm]", bin_width=0.05).get_precision(DISTRIBUTIONS, plot=False)
+    counted = maxwell.histograms(["Uncertainty XY [nm]"], bin_width=0.05).add(points(height))
+    merged = maxwell.precision(counted, "Uncertainty XY [nm]").get_precision(DISTRIBUTIONS, plot=False)
+    assert binned.best_fit == merged.best_fit == raw.best_fit
+    for fitted in [binned, merged]:
+        assert numpy.allclose(fitted.fitted_params[raw.best_fit], raw.fitted_params[raw.best_fit], rtol=2e-2)
+        assert numpy.isclose(fitted.peak(raw.best_fit)[0], raw.peak(raw.best_fit)[0], rtol=1e-2)
+
+
+def test_get_precision_prints_only_when_verbose(maxwell, height, capsys):
+    maxwell.precision(points(height), "Uncertainty XY [nm]").get_precision(["norm", "gamma"], plot=False, verbose=False)
+    assert capsys.readouterr().out == ""
+    maxwell.precision(points(height), "Uncertainty XY [nm]").get_precision(["norm", "gamma"], plot=False)
+    assert "Best Fit Selected" in capsys.readouterr().out
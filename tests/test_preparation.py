@@ -0,0 +1,177 @@
+import numpy
+import pytest
+
+from conftest import ordered
+
+
+def assert_same(first, second, **tolerance):
+    for name in ["dfxy", "dfxz"]:
+        a, b = getattr(first, name), getattr(second, name)
+        assert list(a.columns) == list(b.columns)
+        for c in a.columns:
+            if tolerance:
+                assert numpy.allclose(a[c].to_numpy(dtype=float), b[c].to_numpy(dtype=float), equal_nan=True, **tolerance)
+            else:
+                assert numpy.array_equal(a[c].to_numpy(dtype=float), b[c].to_numpy(dtype=float), equal_nan=True)
+
+
+@pytest.mark.parametrize("chunksize", [1, 333, 10**6])
+def test_chunked_setting_matches_whole_files(maxwell, acquisition, chunksize):
+    whole = maxwell.preparation().setting(*acquisition)
+    chunked = maxwell.preparation().setting(*acquisition, chunksize=chunksize if chunksize > 1 else 97)
+    assert_same(whole, chunked)
+    assert chunked.df_xy is None
+
+
+def test_chunked_setting_in_single_precision(maxwell, acquisition):
+    whole = maxwell.preparation().setting(*acquisition)
+    chunked = maxwell.preparation().setting(*acquisition, chunksize=500, dtype=numpy.float32)
+    assert chunked.dfxy["X_XY"].dtype == numpy.float32
+    assert_same(whole, chunked, rtol=1e-6, atol=1e-3)
+
+
+@pytest.mark.parametrize("chunksize", [None, 500])
+def test_limits_while_reading_match_limiting(maxwell, acquisition, chunksize):
+    limits = [("X", 15000, "less"), ("Z", 200, "more")]
+    limited = maxwell.preparation().setting(*acquisition, chunksize=chunksize, limits=limits)
+    expected = maxwell.preparation().setting(*acquisition)
+    for axis, limit, direction in limits:
+        expected.limiting(axis, limit, direction)
+    assert 0 < len(limited.dfxy) < len(maxwell.preparation().setting(*acquisition).dfxy)
+    assert_same(limited, expected)
+
+
+
+def looped(data, axis, limit, direction):
+    """The limiting of the data row by row, as first written for the method."""
+    for name, orientation in [("dfxy", "XY"), ("dfxz", "XZ")]:
+        df = getattr(data, name)
+        values = df[axis+"_"+orientation]
+        dropped = [i for i, value in enumerate(values) if (value >= limit if direction == "less" else value <= limit)]
+        setattr(data, name, df.drop(dropped).reset_index(drop=True))
+    return data
+
+
+@pytest.mark.parametrize("axis, limit, direction", [("X", 0, "less"), ("Y", -2000, "More"), ("Z", 1000, "LESS")])
+def test_limiting_matches_loop(maxwell, prepared, axis, limit, direction):
+    limited = prepared().limiting(axis, limit, direction)
+    expected = looped(prepared(), axis, limit, direction.lower())
+    assert 0 < len(limited.dfxy) < len(prepared().dfxy)
+    assert_same(limited, expected)
+
+
+def test_limiting_checks_direction(prepared):
+    with pytest.raises(ValueError):
+        prepared().limiting("X", 0, "sideways")
+
+
+def test_box_matches_limiting(prepared):
+    box = [-5000, 8000, -6000, 4000, -7000, 5000]
+    boxed = prepared().region(boxes=box)
+    expected = prepared()
+    for a, axis in enumerate(["X", "Y", "Z"]):
+        expected.limiting(axis, box[2*a], "more").limiting(axis, box[2*a+1], "less")
+    assert 0 < len(boxed.dfxy) < len(prepared().dfxy)
+    assert_same(boxed, expected)
+
+
+def test_polygon_and_sphere(prepared):
+    data = prepared()
+    square = prepared().region(polygon=[[-4000, -4000], [4000, -4000], [4000, 4000], [-4000, 4000]], plane="XY")
+    box = prepared().region(boxes=[-4000, 4000, -4000, 4000, -numpy.inf, numpy.inf])
+    assert_same(square, box)
+    sphere = prepared().region(sphere=[0, 0, 0, 6000])
+    distance = numpy.sqrt(data.dfxy["X_XY"]**2+data.dfxy["Y_XY"]**2+data.dfxy["Z_XY"]**2).to_numpy()
+    assert len(sphere.dfxy) == (distance < 6000).sum()
+
+
+def test_inverted_region_is_the_rest(prepared):
+    box = [[-5000, 0, -5000, 0, -numpy.inf, numpy.inf], [2000, 6000, 2000, 6000, -numpy.inf, numpy.inf]]
+    kept = prepared().region(boxes=box)
+    removed = prepared().region(boxes=box, invert=True)
+    assert len(kept.dfxy)+len(removed.dfxy) == len(prepared().dfxy)
+    assert len(kept.dfxz)+len(removed.dfxz) == len(prepared().dfxz)
+
+
+def test_grid_follows_region(maxwell, prepared):
+    data = prepared().indexing().region(sphere=[0, 0, 0, 8000])
+    assert (data.grid_xy.size, data.grid_xz.size) == (len(data.dfxy), len(data.dfxz))
+    reference = prepared().region(sphere=[0, 0, 0, 8000])
+    expected = maxwell.overlap(reference).indexes(reference.zpix, reference.xypix, engine="reference")
+    found = maxwell.overlap(data).indexes(data.zpix, data.xypix, engine="grid")
+    assert numpy.array_equal(ordered(found.XY_indexes, found.XZ_indexes), ordered(expected.XY_indexes, expected.XZ_indexes))
+
+
+
+def with_missing(data):
+    data.values_xy[0, :20] = numpy.nan
+    data.values_xz[2, 5:9] = numpy.inf
+    return data
+
+
+@pytest.mark.parametrize("step", [
+    lambda d: d.limiting("X", 0, "less"),
+    lambda d: d.limiting("Z", 1000.5, "more").limiting("Y", -2000, "greater"),
+    lambda d: d.region(boxes=[[-5000, 0, -5000, 0, -numpy.inf, numpy.inf], [2000, 6000, 2000, 6000, -3000, 3000]]),
+    lambda d: d.region(polygon=[[-4000, -3000], [5000, 0], [0, 4500]], plane="XZ"),
+    lambda d: d.region(sphere=[[0, 0, 0, 6000], [3000, 3000, 0, 2500]], invert=True),
+])
+def test_indexed_selection_matches_mask(maxwell, prepared, monkeypatch, step):
+    expected = step(with_missing(prepared()))
+    data = with_missing(prepared()).indexing()
+    queried = []
+    query_box = maxwell.grid.query_box
+    monkeypatch.setattr(maxwell.grid, "query_box", lambda self, *box: queried.append(box) or query_box(self, *box))
+    assert_same(step(data), expected)
+    assert len(queried) >= 2
+    assert (data.grid_xy.size, data.grid_xz.size) == (len(data.dfxy), len(data.dfxz))
+
+def test_dimensions_are_checked(maxwell, acquisition):
+    with pytest.raises(ValueError):
+        maxwell.preparation().setting(*acquisition, TS_dims=4)
+
+
+def test_frames_are_views_of_one_array(maxwell, acquisition):
+    data = maxwell.preparation().setting(*acquisition)
+    assert data.values_xy.shape == (len(data.dfxy.columns), len(data.dfxy))
+    assert data.values_xy.flags.c_contiguous
+    assert numpy.shares_memory(data.dfxy["X_XY"].to_numpy(), data.values_xy)
+    assert numpy.shares_memory(data.dfxz["S_Z"].to_numpy(), data.values_xz)
+    assert data.dfxy["Z_XY"].dtype == numpy.float64
+
+
+def test_center_in_place_matches_columns(maxwell, acquisition):
+    data = maxwell.preparation().setting(*acquisition)
+    xy, xz = data.dfxy.copy(), data.dfxz.copy()
+    values_xy = data.values_xy
+    data.set_to_center()
+    assert data.values_xy is values_xy
+    x = (xy["X_XY"].max()+xy["X_XY"].min())/2
+    y = (xy["Y_XY"].max()+xy["Y_XY"].min())/2
+    z = xz["Z_XZ"].max()/2
+    for df, expected in [(data.dfxy, {"X_XY": xy["X_XY"]-x, "Y_XY": xy["Y_XY"]-y, "Z_XY": xy["Z_XY"]-z}),
+                         (data.dfxz, {"X_XZ": xz["X_XZ"]-x, "Y_XZ": xz["Y_XZ"]-y, "Z_XZ": xz["Z_XZ"]-z})]:
+        for c, values in expected.items():
+            assert numpy.array_equal(df[c].to_numpy(), values.to_numpy())
+    assert numpy.array_equal(data.dfxy["U_XY"].to_numpy(), xy["U_XY"].to_numpy())
+
+
+def test_limiting_keeps_one_array(prepared):
+    data = prepared().limiting("X", 0, "less")
+    assert data.values_xy.shape[1] == len(data.dfxy)
+    assert numpy.shares_memory(data.dfxy["X_XY"].to_numpy(), data.values_xy)
+
+
+def test_chunked_setting_stays_memory_mapped(maxwell, acquisition, prepared):
+    data = prepared(chunksize=500).limiting("X", 0, "less")
+    assert isinstance(data.values_xy, numpy.memmap) and isinstance(data.values_xz, numpy.memmap)
+    assert numpy.shares_memory(data.dfxy["X_XY"].to_numpy(), data.values_xy)
+    assert_same(data, prepared().limiting("X", 0, "less"))
+
+
+def test_cached_setting_gathers_in_blocks(maxwell, acquisition, tmp_path):
+    store = maxwell.cache(str(tmp_path/"cache"))
+    maxwell.preparation().setting(*acquisition, cache=store)
+    data = maxwell.preparation().setting(*acquisition, cache=store).set_to_center().region(sphere=[0, 0, 0, 8000])
+    assert isinstance(data.values_xy, numpy.memmap)
+    assert_same(data, maxwell.preparation().setting(*acquisition).set_to_center().region(sphere=[0, 0, 0, 8000]))
@@ -0,0 +1,50 @@
+import numpy
+import pandas
+import pytest
+
+from conftest import ordered
+
+
+@pytest.fixture(scope="module")
+def batch(maxwell, acquisition):
+    """The batch results of each selection type, without set_to_center as in the streaming mode."""
+    data = maxwell.preparation().setting(*acquisition)
+    found = maxwell.overlap(data).indexes(data.zpix, data.xypix).values()
+    return data, found, {selection_type: maxwell.filtering(found).merge().selection(selection_type).points()
+                         for selection_type in ["uncertainty", "intensity"]}
+
+
+@pytest.mark.parametrize("selection_type", ["uncertainty", "intensity"])
+def test_streaming_matches_batch(maxwell, acquisition, batch, selection_type):
+    data, found, filtered = batch
+    df_xy, df_xz = pandas.read_csv(acquisition[0]), pandas.read_csv(acquisition[1])
+    streamed = maxwell.streaming(data.zpix, data.xypix, selection_type=selection_type)
+    emitted = {}
+    for rows_xy, rows_xz in zip(numpy.array_split(numpy.arange(len(df_xy)), 7),
+                                numpy.array_split(numpy.arange(len(df_xz)), 7)):
+        streamed.ingest(df_xy.iloc[rows_xy], df_xz.iloc[rows_xz])
+        for group in streamed.retired_groups:
+            emitted.pop(group, None)
+        emitted.update({group: row for group, row in streamed.new_points.iterrows()})
+    assert numpy.array_equal(ordered(streamed.XY_indexes, streamed.XZ_indexes), ordered(found.XY_indexes, found.XZ_indexes))
+    pandas.testing.assert_frame_equal(streamed.points, filtered[selection_type].points.reset_index(drop=True))
+    assert len(emitted) == len(filtered[selection_type].points)
+
+
+def test_streaming_follows_files(maxwell, acquisition, batch, tmp_path):
+    data, found, filtered = batch
+    streamed = maxwell.streaming(data.zpix, data.xypix)
+    files = [str(tmp_path/"XY.csv"), str(tmp_path/"XZ.csv")]
+    texts = []
+    for name in acquisition:
+        with open(name) as f:
+            texts.append(f.read())
+    for name in files:
+        open(name, "w").close()
+    for i in range(0, 5):
+        for name, text in zip(files, texts):
+            cuts = numpy.linspace(0, len(text), 6).astype(int)
+            with open(name, "a") as f:
+                f.write(text[cuts[i]:cuts[i+1]])
+        streamed.update(*files)
+    pandas.testing.assert_frame_equal(streamed.points, filtered["uncertainty"].points.reset_index(drop=True))
@@ -0,0 +1,103 @@
+import types
+
+import numpy
+import pandas
+import pytest
+
+
+def spheres(centers, radii, n=200, seed=0):
+    """Points lying exactly on spheres, labelled by their sphere."""
+    rng = numpy.random.default_rng(seed)
+    directions = rng.normal(size=(len(centers), n, 3))
+    directions /= numpy.linalg.norm(directions, axis=2)[:, :, None]
+    positions = (numpy.asarray(centers, dtype=float)[:, None]+directions*numpy.asarray(radii, dtype=float)[:, None, None]).reshape(-1, 3)
+    return pandas.DataFrame({"X [nm]": positions[:, 0], "Y [nm]": positions[:, 1], "Z [nm]": positions[:, 2],
+                             "Particle": numpy.repeat(numpy.arange(len(centers)), n)})
+
+
+def test_evaluation_finds_exact_sphere(maxwell):
+    points = spheres([[120, -40, 300]], [75])
+    fitted = maxwell.surface(types.SimpleNamespace(points=points)).evaluation()
+    assert numpy.allclose([fitted.X_cent, fitted.Y_cent, fitted.Z_cent], [120, -40, 300])
+    assert numpy.isclose(fitted.radius, 75)
+    assert numpy.allclose(fitted.error_i, 0, atol=1e-6)
+
+
+def test_batch_matches_each_sphere(maxwell):
+    rng = numpy.random.default_rng(1)
+    centers, radii = rng.uniform(-5000, 5000, (30, 3)), rng.uniform(50, 500, 30)
+    points = spheres(centers, radii, n=50)
+    fitted = maxwell.surface(types.SimpleNamespace(points=points)).batch_evaluation()
+    assert numpy.allclose(fitted.fits[["X Center [nm]", "Y Center [nm]", "Z Center [nm]"]].to_numpy(), centers)
+    assert numpy.allclose(fitted.fits["Radius [nm]"], radii)
+    assert fitted.fits["Localizations"].tolist() == [50]*30
+    one = maxwell.surface(types.SimpleNamespace(points=points[points["Particle"] == 7])).evaluation()
+    assert numpy.isclose(one.radius, fitted.fits["Radius [nm]"][7])
+
+
+def test_batch_skips_noise_and_degenerate_labels(maxwell):
+    points = spheres([[0, 0, 0], [1000, 0, 0]], [100, 200], n=40)
+    labels = points["Particle"].to_numpy().copy()
+    labels[:5] = -1
+    flat = pandas.DataFrame({"X [nm]": [0, 1, 2, 3, 4], "Y [nm]": [0, 2, 1, 3, 5], "Z [nm]": 0.0})
+    points = pandas.concat([points, flat], ignore_index=True)
+    labels = numpy.append(labels, [2, 2, 2, 2, 3])
+    fitted = maxwell.surface(types.SimpleNamespace(points=points)).batch_evaluation(labels)
+    assert fitted.fits["Particle"].tolist() == [0, 1, 2, 3]
+    assert numpy.allclose(fitted.fits["Radius [nm]"][:2], [100, 200])
+    assert fitted.fits["Radius [nm]"][2:].isna().all()
+    assert fitted.radius_i[:5].isna().all()
+
+
+def test_batch_checks_labels(maxwell):
+    points = spheres([[0, 0, 0]], [100], n=10)
+    with pytest.raises(ValueError):
+        maxwell.surface(types.SimpleNamespace(points=points)).batch_evaluation("Missing")
+    with pytest.raises(ValueError):
+        maxwell.surface(types.SimpleNamespace(points=points)).batch_evaluation(numpy.zeros(3, dtype=int))
+
+
+@pytest.fixture
+def outlying():
+    """Two noisy spheres with a fifth of their localizations scattered away from the surface."""
+    rng = numpy.random.default_rng(5)
+    points = spheres([[0, 0, 0], [3000, 1000, -500]], [400, 250], n=400, seed=4)
+    positions = points[["X [nm]", "Y [nm]", "Z [nm]"]].to_numpy(copy=True)
+    positions += rng.normal(0, 5, positions.shape)
+    outliers = rng.random(len(points)) < 0.2
+    positions[outliers] += rng.uniform(-300, 300, (outliers.sum(), 3))
+    points[["X [nm]", "Y [nm]", "Z [nm]"]] = positions
+    points["Uncertainty XY [nm]"] = 5.0
+    points["Uncertainty Z [nm]"] = 5.0
+    return points, outliers
+
+
+@pytest.mark.parametrize("method", ["irls", "ransac"])
+def test_robust_fit_ignores_outliers(maxwell, outlying, method):
+    points, outliers = outlying
+    data = types.SimpleNamespace(points=points)
+    plain = maxwell.surface(data).batch_evaluation()
+    robust = maxwell.surface(data).robust_evaluation(method, labels="Particle", seed=0)
+    truth = numpy.array([[0, 0, 0, 400], [3000, 1000, -500, 250]])
+    columns = ["X Center [nm]", "Y Center [nm]", "Z Center [nm]", "Radius [nm]"]
+    found = robust.fits[columns].to_numpy()
+    assert numpy.abs(found-truth).max() < 3
+    assert numpy.abs(found-truth).max() < numpy.abs(plain.fits[columns].to_numpy()-truth).max()
+    assert (robust.inliers[~outliers]).mean() > 0.95
+    assert (robust.fits["Inliers"] < robust.fits["Localizations"]).all()
+    intervals = robust.fits[[c.replace(" [nm]", " CI [nm]") for c in columns]].to_numpy()
+    assert numpy.all((intervals > 0) & (intervals < 5))
+
+
+def test_robust_fit_of_a_single_particle(maxwell, outlying):
+    points, outliers = outlying
+    points = points[points["Particle"] == 0]
+    fitted = maxwell.surface(types.SimpleNamespace(points=points)).robust_evaluation("irls", weighted=False)
+    assert numpy.isclose(fitted.radius[0], 400, atol=3)
+    assert numpy.allclose([fitted.X_cent, fitted.Y_cent, fitted.Z_cent], 0, atol=3)
+    assert fitted.fits["Iterations"][0] < 100
+
+
+def test_robust_fit_checks_method(maxwell, outlying):
+    with pytest.raises(ValueError):
+        maxwell.surface(types.SimpleNamespace(points=outlying[0])).robust_evaluation("median")
@@ -0,0 +1,40 @@
+import pandas
+import pytest
+
+Z_RANGES, XY_RANGES, SELECTION_TYPES = [5, 13, 40], [100, 230], ["uncertainty", "intensity"]
+
+
+@pytest.fixture(scope="module")
+def swept(maxwell, acquisition):
+    data = maxwell.preparation().setting(*acquisition).set_to_center()
+    return maxwell.sweep(data, Z_RANGES, XY_RANGES, SELECTION_TYPES).run()
+
+
+@pytest.mark.parametrize("z_range", Z_RANGES)
+@pytest.mark.parametrize("xy_range", XY_RANGES)
+@pytest.mark.parametrize("selection_type", SELECTION_TYPES)
+def test_sweep_matches_batch(maxwell, prepared, swept, z_range, xy_range, selection_type):
+    data = prepared()
+    found = maxwell.overlap(data).indexes(z_range, xy_range).values()
+    filtered = maxwell.filtering(found).merge().selection(selection_type).points()
+    results = swept.results
+    result = results[(results["Z Range [nm]"] == z_range) & (results["XY Range [nm]"] == xy_range) &
+                     (results["Selection"] == selection_type)].iloc[0]
+    assert result["Overlapped"] == len(found.XY_indexes)
+    assert result["Points"] == len(filtered.points)
+    pandas.testing.assert_frame_equal(swept.points(z_range, xy_range, selection_type), filtered.points.reset_index(drop=True))
+
+
+def test_groups_are_cached(maxwell, prepared):
+    swept = maxwell.sweep(prepared(), Z_RANGES, XY_RANGES, SELECTION_TYPES, max_cached=2).run()
+    assert swept.misses == len(Z_RANGES)*len(XY_RANGES)
+    assert len(swept.cached) == 2
+    swept.groups(Z_RANGES[-1], XY_RANGES[-1])
+    assert swept.hits >= 1
+    with pytest.raises(ValueError):
+        swept.groups(100, 100)
+
+
+def test_selection_type_is_checked(maxwell, prepared):
+    with pytest.raises(ValueError):
+        maxwell.sweep(prepared(), Z_RANGES, XY_RANGES, ["brightest"])
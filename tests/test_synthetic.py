@@ -0,0 +1,56 @@
+import numpy
+import pytest
+
+
+@pytest.fixture(scope="module")
+def simulated(maxwell, tmp_path_factory):
+    folder = tmp_path_factory.mktemp("synthetic")
+    return maxwell.synthetic(seed=3).generate(2000, density=5).download_dataframe(str(folder/"Synthetic"))
+
+
+def test_tables_are_read_by_setting(maxwell, simulated):
+    data = maxwell.preparation().setting(simulated.file_xy, simulated.file_xz, pixelsize_xy=simulated.xypix,
+                                         pixelsize_xz=simulated.zpix)
+    assert (data.xy_len, data.xz_len) == (2000, 2000)
+    assert numpy.allclose(data.dfxy["X_XY"].to_numpy(), simulated.df_xy["x [nm]"].to_numpy()*simulated.xypix)
+    assert (simulated.matched >= 0).sum() == 1000
+
+
+def test_true_matches_are_overlapped(maxwell, simulated):
+    data = maxwell.preparation().setting(simulated.file_xy, simulated.file_xz, pixelsize_xy=simulated.xypix,
+                                         pixelsize_xz=simulated.zpix).set_to_center()
+    found = maxwell.overlap(data).indexes(data.zpix, data.xypix)
+    matched = numpy.flatnonzero(simulated.matched >= 0)
+    pairs = set(zip(found.XZ_indexes.tolist(), found.XY_indexes.tolist()))
+    recovered = numpy.mean([(i, simulated.matched[i]) in pairs for i in matched])
+    assert recovered > 0.9
+
+
+@pytest.mark.parametrize("uncertainty", ["gamma", "lognormal", "uniform", "constant"])
+def test_uncertainties_have_the_mean(maxwell, uncertainty):
+    values = maxwell.synthetic(seed=0).uncertainties(20000, uncertainty, mean=2)
+    assert numpy.all(values > 0)
+    assert abs(values.mean()-2) < 0.05
+
+
+def test_sphere_is_on_the_surface(maxwell):
+    simulated = maxwell.synthetic(seed=0).generate(500, shape="sphere")
+    radius = numpy.linalg.norm(simulated.positions_xy-simulated.side/2, axis=1)
+    assert numpy.allclose(radius, simulated.side/2)
+
+
+def test_parameters_are_checked(maxwell):
+    with pytest.raises(ValueError):
+        maxwell.synthetic().generate(100, overlap_fraction=2)
+    with pytest.raises(ValueError):
+        maxwell.synthetic().generate(100, shape="cube")
+
+
+def test_benchmark_measures_every_step(maxwell):
+    measured = maxwell.benchmark(sizes=[500, 1000], engine="grid", overlap_fraction=0.8).run()
+    steps = ["setting", "set_to_center", "limiting", "indexing", "indexes", "values", "merge", "selection",
+             "points", "evaluation", "get_precision"]
+    assert measured.summary["Step"].tolist() == 2*steps
+    assert measured.summary["Localizations"].tolist() == [500]*len(steps)+[1000]*len(steps)
+    assert numpy.all(measured.results["Time [s]"] >= 0)
+    assert numpy.all(measured.results["Peak Memory [MB]"] > 0)
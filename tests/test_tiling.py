@@ -0,0 +1,32 @@
+import numpy
+import pandas
+import pytest
+
+from conftest import ordered
+
+
+@pytest.fixture(scope="module")
+def batch(maxwell, acquisition):
+    data = maxwell.preparation().setting(*acquisition).set_to_center()
+    found = maxwell.overlap(data).indexes(data.zpix, data.xypix).values()
+    return found, maxwell.filtering(found).merge().selection("uncertainty").points()
+
+
+def sort(points):
+    columns = list(points.columns)
+    return points[columns].sort_values(columns).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("tiles", [[1, 1, 1], [3, 2, 1], [2, 2, 3]])
+def test_tiling_matches_batch(maxwell, prepared, batch, tiles):
+    found, filtered = batch
+    data = prepared()
+    tiled = maxwell.tiling(data, tiles).indexes(data.zpix, data.xypix, block_size=1000)
+    assert numpy.array_equal(ordered(tiled.XY_indexes, tiled.XZ_indexes), ordered(found.XY_indexes, found.XZ_indexes))
+    tiled.selection("uncertainty", block_size=1000)
+    pandas.testing.assert_frame_equal(sort(tiled.points[filtered.points.columns]), sort(filtered.points))
+
+
+def test_tiles_are_checked(maxwell, prepared):
+    with pytest.raises(ValueError):
+        maxwell.tiling(prepared(), [2, 0, 1])